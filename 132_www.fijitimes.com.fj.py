@@ -4,7 +4,7 @@
 Fiji Times 爬虫 - 每轮新发现链接批量爬取并按日期分组合并存储
 """
 import requests
-from bs4 import BeautifulSoup, Tag
+from bs4 import Tag
 import json
 import os
 from datetime import datetime, timedelta
@@ -17,14 +17,19 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from time import sleep
 import re
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 import warnings
 import logging
 import shutil
+import itertools
 from webdriver_manager.chrome import ChromeDriverManager  # 自动管理ChromeDriver
-
-TXT_FILE = '132_fijitimes.txt'
+from crawler_common import (AdaptiveConcurrency, AsyncFetcher, BrowserPool, DriverCache, HostRateLimiter, LinkHarvester,
+                            FingerprintSet, PageWaiter, SeenStore, XhrTemplateStore, apply_resource_profile,
+                            capture_template, captured_xhr, create_session, enable_performance_log, format_page_stats,
+                            links_in_text, make_soup, page_load_stats, replay_pages, resource_block_patterns,
+                            run_channels, shared_index, site_strainer)
+
+TXT_FILE = '132_fijitimes.txt'  # 旧的标题文件，指纹集合为空时导入
+TITLE_FINGERPRINT_FILE = '132_title_fingerprints.bin'  # 标题的 64 位指纹（有序数组 + 增量日志）
 JSON_DIR = 'data'
 
 # 记录上一次输出 JSON 文件的日期
@@ -44,17 +49,53 @@ MONTH_MAP = {
     'sep': '09', 'oct': '10', 'nov': '11', 'dec': '12'
 }
 
-
-def load_titles():
-    if not os.path.exists(TXT_FILE):
-        return set()
-    with open(TXT_FILE, 'r', encoding='utf-8') as f:
-        return set(line.strip() for line in f if line.strip())
-
-
-def save_title(title):
-    with open(TXT_FILE, 'a', encoding='utf-8') as f:
-        f.write(title + '\n')
+# WordPress REST API 列表模式：直接分页读取文章 JSON，失败时回退到 Selenium 点击 Load more
+USE_WP_API = True
+WP_API_BASE = 'https://www.fijitimes.com.fj/wp-json/wp/v2'
+WP_PER_PAGE = 50
+WP_MAX_PAGES = 20
+WP_PAGE_BATCH = 4  # 每批并发请求的页数；一整批都没有新文章时停止翻页
+
+# “加载更多”接口重放（REST API 不可用时使用）：Selenium 点击 Load more 时记录一次该频道的数据请求（Chrome 性能日志），
+# 之后的运行按模板每批并发请求多页，不再启动浏览器；模板失效时自动删除并回退到 Selenium，由 Selenium 重新记录
+USE_XHR_REPLAY = True
+XHR_TEMPLATE_FILE = '132_xhr.json'
+XHR_PAGE_BATCH = 4
+XHR_MAX_PAGES = 100
+LISTING_SELECTOR = 'a.ps-no-underline.ps-leading-tight.ps-text-blockBlack'
+ARTICLE_LINK_RE = re.compile(r'https://www\.fijitimes\.com\.fj/[a-z0-9]+(?:-[a-z0-9]+){2,}/')
+
+# 频道页资源拦截（CDP）：图片、字体、媒体与第三方统计/广告脚本不加载；
+# 设为 False 时只统计不拦截，可对比前后的加载耗时与传输量
+BLOCK_RESOURCES = True
+BLOCK_DENY = ('*youtube.com*', '*ytimg.com*', '*jwplayer.com*', '*wp-content/uploads/*')
+BLOCK_ALLOW = ()
+
+# 同时爬取的频道数，也是浏览器池中 Chrome 实例数的上限；设为1时按顺序逐个频道爬取。
+# 文章页请求由所有频道共用同一个抓取引擎，按主机的在途上限和限速不随频道数增加
+PARALLEL_CHANNELS = 3
+
+# 文章页限速：每秒请求数与突发容量（令牌桶），替代每篇文章后的固定等待
+RATE_LIMIT = 0.7
+RATE_BURST = 2
+
+# 文章页抓取引擎：同一主机的在途请求数从2开始按 AIMD 在 1~4 之间自适应调整，
+# 连接池复用，SSL等连接错误由会话层退避重试，429/5xx 由引擎重试（每次重试都经过令牌桶）
+article_session = create_session(pool_maxsize=4, verify=False, status_forcelist=())
+fetcher = AsyncFetcher(article_session, timeout=15,
+                       rate_limiter=HostRateLimiter(RATE_LIMIT, RATE_BURST),
+                       concurrency=AdaptiveConcurrency(initial=2, maximum=4))
+# 文章页只构建标题、信息栏和正文三个子树
+ARTICLE_STRAINER = site_strainer('fijitimes')
+
+
+# 去重记录：标题只需判断是否出现过，记在紧凑的指纹集合中（每条 8 字节，mmap 打开）；
+# 文章链接的处理结果记在各站点共用的 SQLite 库中，抓取前过滤
+SEEN_SITE = 'fijitimes'
+title_fingerprints = FingerprintSet(TITLE_FINGERPRINT_FILE)
+seen_store = SeenStore(fingerprints={SEEN_SITE: title_fingerprints})
+# 正文近似重复检测（MinHash/LSH）：各站点共用一个索引，保存前与所有站点已保存的文章比较
+near_dups = shared_index()
 
 
 def safe_publish_time(publish_time: str) -> str:
@@ -126,6 +167,7 @@ def cleanup_chrome_temp():
 def save_articles_grouped_by_date(articles, channel_name):
     """将同一天的文章合并存为一个json文件，所有文件保存在data/下"""
     global last_json_date
+    articles = near_dups.filter_articles('132', articles)
     from collections import defaultdict
     grouped = defaultdict(list)
     for art in articles:
@@ -139,83 +181,256 @@ def save_articles_grouped_by_date(articles, channel_name):
         filepath = os.path.join(JSON_DIR, filename)
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(arts, f, ensure_ascii=False, indent=2)
+        near_dups.add_articles('132', arts)
         print(f'💾 已保存{len(arts)}篇文章到 {filepath}')
         last_json_date = date_str  # 保存这次的日期
 
 
-def crawl_article(url):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    for attempt in range(3):
-        try:
-            response = requests.get(url, headers=headers, timeout=15, verify=False)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            title_elem = soup.find('h1', class_='fijitimes_title wp-block-post-title has-x-large-font-size')
-            if not (isinstance(title_elem, Tag)):
-                print(f"  × 未找到标题元素")
-                return None, None, None
-            title_text = title_elem.get_text(strip=True)
-            content_elem = soup.find('div',
-                                     class_='entry-content post_content wp-block-post-content is-layout-flow wp-block-post-content-is-layout-flow')
-            if not (isinstance(content_elem, Tag)):
-                print(f"  × 未找到内容元素")
-                return None, None, None
-            content = '\n'.join([p.get_text(strip=True) for p in content_elem.find_all('p') if
-                                 isinstance(p, Tag) and p.get_text(strip=True)])
-            info_elem = soup.find('div', class_='fijitimes_post__info')
-            publish_time, authors = '', ''
-            if isinstance(info_elem, Tag):
-                spans = [span for span in info_elem.find_all('span') if isinstance(span, Tag)]
-                if len(spans) >= 2:
-                    publish_time = spans[1].get_text(strip=True)
-                if len(spans) >= 4:
-                    authors = spans[3].get_text(strip=True)
-            if authors.lower().startswith('by '):
-                authors = authors[3:].strip()
-            category = "经济"
-            if '/local-news/' in url:
-                category = "当地新闻"
-            elif '/world/' in url:
-                category = "国际新闻"
-            elif '/business/' in url:
-                category = "经济"
-            article_data = {
-                "title": title_text,
-                "content": content,
-                "sources": {
-                    "current_site": "每日时报",
-                    "current_siteurl": "www.fijitimes.com.fj",
-                    "origin_url": url
-                },
-                "metadata": {
-                    "publish_time": safe_publish_time(publish_time),
-                    "authors": authors,
-                    "category": category
-                },
-                "crawlingtime": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            return article_data, title_text, publish_time
-        except requests.exceptions.SSLError as e:
-            print(f"  × SSL错误，重试第{attempt + 1}次: {url}")
-            sleep(2)
-            continue
-        except Exception as e:
-            print(f"  × 爬取文章失败 {url}: {str(e)}")
+def crawl_article(url, result=None):
+    """解析文章页；result 为抓取引擎返回的结果，未传入时同步抓取"""
+    if result is None:
+        result = fetcher.fetch(url)
+    try:
+        response = result.get_response()
+        response.raise_for_status()
+        soup = make_soup(response.text, parse_only=ARTICLE_STRAINER)
+        title_elem = soup.find('h1', class_='fijitimes_title wp-block-post-title has-x-large-font-size')
+        if not (isinstance(title_elem, Tag)):
+            print(f"  × 未找到标题元素")
+            return None, None, None
+        title_text = title_elem.get_text(strip=True)
+        content_elem = soup.find('div',
+                                 class_='entry-content post_content wp-block-post-content is-layout-flow wp-block-post-content-is-layout-flow')
+        if not (isinstance(content_elem, Tag)):
+            print(f"  × 未找到内容元素")
             return None, None, None
-    return None, None, None
+        content = '\n'.join([p.get_text(strip=True) for p in content_elem.find_all('p') if
+                             isinstance(p, Tag) and p.get_text(strip=True)])
+        info_elem = soup.find('div', class_='fijitimes_post__info')
+        publish_time, authors = '', ''
+        if isinstance(info_elem, Tag):
+            spans = [span for span in info_elem.find_all('span') if isinstance(span, Tag)]
+            if len(spans) >= 2:
+                publish_time = spans[1].get_text(strip=True)
+            if len(spans) >= 4:
+                authors = spans[3].get_text(strip=True)
+        if authors.lower().startswith('by '):
+            authors = authors[3:].strip()
+        category = "经济"
+        if '/local-news/' in url:
+            category = "当地新闻"
+        elif '/world/' in url:
+            category = "国际新闻"
+        elif '/business/' in url:
+            category = "经济"
+        article_data = {
+            "title": title_text,
+            "content": content,
+            "sources": {
+                "current_site": "每日时报",
+                "current_siteurl": "www.fijitimes.com.fj",
+                "origin_url": url
+            },
+            "metadata": {
+                "publish_time": safe_publish_time(publish_time),
+                "authors": authors,
+                "category": category
+            },
+            "crawlingtime": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        return article_data, title_text, publish_time
+    except requests.exceptions.SSLError as e:
+        print(f"  × SSL错误，重试后仍失败: {url}")
+        return None, None, None
+    except Exception as e:
+        print(f"  × 爬取文章失败 {url}: {str(e)}")
+        return None, None, None
+
+
+def get_channel_name(channel_url):
+    """频道名直接根据入口URL判断"""
+    if '/local-news/' in channel_url:
+        return '当地新闻'
+    elif '/world/' in channel_url:
+        return '国际新闻'
+    elif '/business/' in channel_url:
+        return '经济'
+    return '未知频道'
+
+
+def get_wp_category_id(channel_url):
+    """根据频道URL最后一段（分类slug）查询WordPress分类ID"""
+    slug = channel_url.rstrip('/').rsplit('/', 1)[-1]
+    response = fetcher.fetch(f'{WP_API_BASE}/categories?slug={slug}').get_response()
+    response.raise_for_status()
+    categories = response.json()
+    return categories[0]['id'] if categories else None
+
+
+def parse_wp_post(post, channel_name):
+    """把 REST API 返回的文章 JSON 转为与 crawl_article 相同的结构"""
+    title_text = make_soup(post['title']['rendered']).get_text(strip=True)
+    if not title_text:
+        return None, None, None
+    content_soup = make_soup(post['content']['rendered'])
+    content = '\n'.join([p.get_text(strip=True) for p in content_soup.find_all('p') if p.get_text(strip=True)])
+    if not content:
+        return None, None, None
+    publish_time = post.get('date', '')[:10]
+    authors = ''
+    embedded_authors = post.get('_embedded', {}).get('author') or []
+    if embedded_authors and isinstance(embedded_authors[0], dict):
+        authors = embedded_authors[0].get('name', '')
+    article_data = {
+        "title": title_text,
+        "content": content,
+        "sources": {
+            "current_site": "每日时报",
+            "current_siteurl": "www.fijitimes.com.fj",
+            "origin_url": post.get('link', '')
+        },
+        "metadata": {
+            "publish_time": safe_publish_time(publish_time),
+            "authors": authors,
+            "category": channel_name
+        },
+        "crawlingtime": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    return article_data, title_text, publish_time
+
+
+def crawl_channel_api(channel_url):
+    """通过 WordPress REST API 分页爬取频道；接口不可用时返回 False，由调用方回退到 Selenium"""
+    print(f"\n🔌 通过REST API加载频道: {channel_url}")
+    try:
+        category_id = get_wp_category_id(channel_url)
+    except Exception as e:
+        print(f"⚠️ REST API不可用: {e}")
+        return False
+    if category_id is None:
+        print("⚠️ REST API中未找到对应分类")
+        return False
+
+    channel_name = get_channel_name(channel_url)
+    print(f"去重库已有 {seen_store.count(SEEN_SITE)} 个历史标题")
+    page_url = f'{WP_API_BASE}/posts?categories={category_id}&per_page={WP_PER_PAGE}&_embed=author&page='
+
+    # 第一页用于确认接口可用并读取总页数，其余页按批并发请求
+    first = fetcher.fetch(page_url + '1')
+    if first.error is not None or first.status_code != 200:
+        print(f"⚠️ REST API请求失败: {first.error or first.status_code}")
+        return False
+    total_pages = min(int(first.response.headers.get('X-WP-TotalPages', 1)), WP_MAX_PAGES)
+    print(f"REST API共 {total_pages} 页可读取")
+
+    # 各批次在同一秒内完成，文件名会重复，因此整个频道结束后（或中断时）统一按日期分组存储
+    all_articles = []
+    pending_results = [first]
+    next_page = 2
+    try:
+        while pending_results:
+            new_count = 0
+            for result in pending_results:
+                try:
+                    posts = result.get_response().json()
+                except Exception as e:
+                    print(f"  × 列表页请求失败 {result.url}: {e}")
+                    continue
+                for post in posts:
+                    article_data, title_text, publish_time = parse_wp_post(post, channel_name)
+                    if not article_data or not title_text:
+                        continue
+                    if not seen_store.claim_title(SEEN_SITE, title_text, article_data['sources']['origin_url']):
+                        continue
+                    all_articles.append(article_data)
+                    new_count += 1
+                    print(f'  ✅ 新文章: {title_text}')
+            if not new_count:
+                print("本批列表页没有新文章，停止翻页")
+                break
+            pages = range(next_page, min(next_page + WP_PAGE_BATCH, total_pages + 1))
+            next_page += len(pages)
+            pending_results = list(fetcher.iter_fetch([page_url + str(page) for page in pages], ordered=True))
+    finally:
+        if all_articles:
+            if not os.path.exists(JSON_DIR):
+                os.makedirs(JSON_DIR)
+            save_articles_grouped_by_date(all_articles, channel_name)
+    print(f"🎉 {channel_name} 完成（REST API），共获取 {len(all_articles)} 篇")
+    return True
 
 
-def crawl_channel(channel_url, chromedriver_path=None):
-    print(f"\n🌐 启动无头浏览器加载频道: {channel_url}")
+xhr_store = XhrTemplateStore(XHR_TEMPLATE_FILE)
 
-    # 1. 为每个爬虫实例创建独立的临时目录，避免冲突
-    import uuid
-    unique_temp_dir = os.path.abspath(f'./chrome_temp_{uuid.uuid4().hex[:8]}')
-    os.makedirs(unique_temp_dir, exist_ok=True)
 
-    # 2. 配置Chrome选项为无头模式，添加反检测功能
+def extract_article_links_from_xhr(text):
+    """接口响应（JSON 或 HTML 片段）中的文章链接"""
+    return links_in_text(text, ARTICLE_LINK_RE)
+
+
+def crawl_channel_xhr(channel_url):
+    """
+    按记录的 Load more 接口模板直接翻页，不启动浏览器。
+    没有模板、或模板第一批就拿不到链接（接口已变化）时返回 False，由调用方回退到 Selenium
+    """
+    template = xhr_store.get(channel_url)
+    if template is None:
+        return False
+    print(f"\n📡 通过接口重放加载频道: {channel_url}（{template.describe()}）")
+    channel_name = get_channel_name(channel_url)
+    seen_links = set()
+    all_articles = []
+    no_new_batches = 0
+
+    # 频道首页仍用普通请求读取文章列表，其后的页面按模板每批并发请求 XHR_PAGE_BATCH 页
+    first = fetcher.fetch(channel_url)
+    first_links = []
+    if first.status_code == 200:
+        first_links = [a.get('href', '') for a in make_soup(first.response.text).select(LISTING_SELECTOR)]
+        first_links = [href for href in dict.fromkeys(first_links) if href.startswith('http')]
+    pages = replay_pages(fetcher, template, extract_article_links_from_xhr, XHR_PAGE_BATCH, XHR_MAX_PAGES)
+    try:
+        for links in itertools.chain([first_links], pages):
+            new_urls = [u for u in links if u not in seen_links]
+            seen_links.update(new_urls)
+            # 之前的运行中已处理过的链接直接跳过，不再请求
+            fetch_urls = seen_store.unseen_urls(SEEN_SITE, new_urls)
+            articles_this_round = []
+            for result in fetcher.iter_fetch(fetch_urls):
+                article_data, title_text, publish_time = crawl_article(result.url, result)
+                if not article_data or not title_text:
+                    seen_store.mark_unparsed(SEEN_SITE, result)
+                    continue
+                if not seen_store.claim_title(SEEN_SITE, title_text, result.url):
+                    continue
+                articles_this_round.append(article_data)
+                print(f'  ✅ 新文章: {title_text}')
+            if articles_this_round:
+                all_articles.extend(articles_this_round)
+                no_new_batches = 0
+            else:
+                no_new_batches += 1
+                if no_new_batches >= 2:
+                    print("连续两批没有新文章，停止翻页")
+                    break
+    except ValueError as e:
+        print(f"⚠️ {e}，删除模板并回退到Selenium")
+        xhr_store.drop(channel_url)
+        return False
+    finally:
+        pages.close()
+        # 与 REST API 模式相同，各批次可能在同一秒内完成，整个频道结束后（或中断时）统一按日期分组存储
+        if all_articles:
+            if not os.path.exists(JSON_DIR):
+                os.makedirs(JSON_DIR)
+            save_articles_grouped_by_date(all_articles, channel_name)
+    print(f"🎉 {channel_name} 完成（接口重放），共 {len(seen_links)} 个链接，新文章 {len(all_articles)} 篇")
+    return True
+
+
+def create_driver(profile_dir):
+    """浏览器池的工厂函数：以 profile_dir 为用户目录启动无头 Chrome，并开启资源拦截"""
+    # 配置Chrome选项为无头模式，添加反检测功能
     chrome_options = Options()
     chrome_options.add_argument('--headless=new')  # 使用新版无头模式
     chrome_options.add_argument('--no-sandbox')
@@ -233,40 +448,50 @@ def crawl_channel(channel_url, chromedriver_path=None):
     chrome_options.add_argument('--disable-web-security')  # 禁用Web安全，可能解决SSL问题
     chrome_options.add_argument('--ignore-ssl-errors')  # 忽略SSL错误
     chrome_options.add_argument('--ignore-certificate-errors')  # 忽略证书错误
-    chrome_options.add_argument(f'--user-data-dir={unique_temp_dir}')  # 使用独立临时目录
+    chrome_options.add_argument(f'--user-data-dir={profile_dir}')  # 使用独立临时目录
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
     chrome_options.add_experimental_option('useAutomationExtension', False)
-
-    # 3. 使用传入的ChromeDriver路径或下载新的
-    try:
-        if chromedriver_path is None:
-            # 只有第一个频道需要下载ChromeDriver
-            chromedriver_path = ChromeDriverManager().install()
-            print(f"webdriver-manager下载/使用的ChromeDriver路径: {chromedriver_path}")
-        else:
-            print(f"复用已下载的ChromeDriver路径: {chromedriver_path}")
-
-        service = Service(chromedriver_path)
-        driver = webdriver.Chrome(options=chrome_options, service=service)
-        version = driver.capabilities.get('browserVersion') or driver.capabilities.get('version')
-        print(f"当前Selenium调用的Chrome版本: {version}")
-        # 获取并打印ChromeDriver版本
-        chromedriver_version = driver.capabilities.get('chrome', {}).get('chromedriverVersion', '未知')
-        print(f"当前Selenium调用的ChromeDriver版本: {chromedriver_version}")
-    except Exception as e:
-        print(f"ChromeDriver下载或启动失败: {e}")
-        # 清理临时目录
-        if os.path.exists(unique_temp_dir):
-            try:
-                shutil.rmtree(unique_temp_dir)
-            except:
-                pass
-        return
+    enable_performance_log(chrome_options)
+
+    chromedriver_path = get_chromedriver_path()
+    print(f"🌐 启动无头浏览器，ChromeDriver路径: {chromedriver_path}")
+    service = Service(chromedriver_path)
+    driver = webdriver.Chrome(options=chrome_options, service=service)
+    version = driver.capabilities.get('browserVersion') or driver.capabilities.get('version')
+    print(f"当前Selenium调用的Chrome版本: {version}")
+    # 获取并打印ChromeDriver版本
+    chromedriver_version = driver.capabilities.get('chrome', {}).get('chromedriverVersion', '未知')
+    print(f"当前Selenium调用的ChromeDriver版本: {chromedriver_version}")
 
     # 执行JavaScript来隐藏自动化特征
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
     driver.execute_script("Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]})")
     driver.execute_script("Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']})")
+    apply_resource_profile(driver, BLOCK_RESOURCES, BLOCK_DENY, BLOCK_ALLOW)
+    return driver
+
+
+# 已验证的ChromeDriver按Chrome主版本持久缓存，与其他爬虫共用；main() 开始时在后台解析，与REST API抓取同时进行
+driver_cache = DriverCache()
+chromedriver_future = None
+
+
+def get_chromedriver_path():
+    """等待后台解析完成并返回ChromeDriver路径；无法获取时抛出异常"""
+    path = chromedriver_future.result() if chromedriver_future is not None else None
+    if path is None:
+        raise RuntimeError("无法获取ChromeDriver")
+    return path
+
+
+# 浏览器池：最多 PARALLEL_CHANNELS 个浏览器，三个频道（以及每天的多次运行）复用，打开20个频道页或内存超过1.5GB后重建
+browser_pool = BrowserPool(create_driver, size=PARALLEL_CHANNELS, max_pages=20, max_memory_mb=1500)
+
+
+def crawl_channel(channel_url, driver):
+    """用池中的浏览器加载频道页并逐批点击 Load more；频道页连续打不开时返回 False（浏览器可能已失去响应）"""
+    print(f"\n🌐 加载频道: {channel_url}")
+    blocked_count = len(resource_block_patterns(BLOCK_DENY, BLOCK_ALLOW)) if BLOCK_RESOURCES else 0
 
     try:
         driver.get(channel_url)
@@ -287,75 +512,50 @@ def crawl_channel(channel_url, chromedriver_path=None):
                 print(f'❌ 重试第{retry_count}次失败: {retry_e}')
                 if retry_count >= max_retries:
                     print(f'⚠️ 连续{max_retries}次访问失败，跳过当前频道')
-                    try:
-                        driver.quit()
-                        print("🔚 浏览器已关闭")
-                    except:
-                        pass
-                    # 清理临时目录和ChromeDriver缓存
-                    try:
-                        if os.path.exists(unique_temp_dir):
-                            shutil.rmtree(unique_temp_dir)
-                            print("🧹 已清理临时目录")
-                        if os.path.exists('./chromedriver_cache'):
-                            shutil.rmtree('./chromedriver_cache')
-                            print("🧹 已清理ChromeDriver缓存目录")
-                    except Exception as cleanup_e:
-                        print(f"⚠️ 清理目录失败: {cleanup_e}")
-                    return
+                    return False
                 continue
-    # 等待页面完全加载
-    sleep(3)
+    # 等待文章列表渲染出来（最多3秒），网络空闲时提前返回
+    listing_selector = LISTING_SELECTOR
+    waiter = PageWaiter(driver, listing_selector)
+    waiter.wait(0, timeout=3)
+    print(f"📉 {format_page_stats(page_load_stats(driver), blocked_count)}")
 
     max_clicks = 100
     click_count = 0
     seen_links = set()
-    titles_set = load_titles()
-    print(f"已加载 {len(titles_set)} 个历史标题用于去重")
-    # 频道名直接根据入口URL判断
-    if '/local-news/' in channel_url:
-        channel_name = '当地新闻'
-    elif '/world/' in channel_url:
-        channel_name = '国际新闻'
-    elif '/business/' in channel_url:
-        channel_name = '经济'
-    else:
-        channel_name = '未知频道'
+    print(f"去重库已有 {seen_store.count(SEEN_SITE)} 个历史标题")
+    channel_name = get_channel_name(channel_url)
 
     # 用于中断保存的变量
     all_articles = []
     no_loadmore_count = 0  # 连续未检测到Load more按钮的计数器
     no_loadmore_threshold = 15
+    # 浏览器内收集文章链接，每轮只传回新增的部分
+    harvester = LinkHarvester(driver, listing_selector)
+    # 该频道还没有接口模板时，在下面点击 Load more 之后从性能日志中记录
+    xhr_captured = xhr_store.get(channel_url) is not None
     try:
         while click_count < max_clicks:
             print(f"\n--- 第 {click_count + 1} 次加载 ---")
-            html = driver.page_source
-            soup = BeautifulSoup(html, 'html.parser')
-            links = soup.find_all('a', class_='ps-no-underline ps-leading-tight ps-text-blockBlack')
-            urls = []
-            for link in links:
-                if isinstance(link, Tag):
-                    href = link.get('href')
-                    if isinstance(href, str) and href.startswith('http'):
-                        urls.append(href)
-            urls = list(set(urls))
+            urls = list({href for href in harvester.collect() if href.startswith('http')})
             new_urls = [u for u in urls if u not in seen_links]
-            print(f'本轮新发现 {len(new_urls)} 个链接')
+            seen_links.update(new_urls)
+            # 之前的运行中已处理过的链接直接跳过，不再请求
+            fetch_urls = seen_store.unseen_urls(SEEN_SITE, new_urls)
+            print(f'本轮新发现 {len(new_urls)} 个链接，其中 {len(new_urls) - len(fetch_urls)} 个已处理过')
             # 批量爬取本轮所有新链接
             articles_this_round = []
-            for url in new_urls:
-                seen_links.add(url)
-                article_data, title_text, publish_time = crawl_article(url)
+            for result in fetcher.iter_fetch(fetch_urls):
+                url = result.url
+                article_data, title_text, publish_time = crawl_article(url, result)
                 if not article_data or not title_text:
+                    seen_store.mark_unparsed(SEEN_SITE, result)
                     continue
-                if title_text in titles_set:
+                if not seen_store.claim_title(SEEN_SITE, title_text, url):
                     print(f'  × 已爬取过: {title_text}')
                     continue
                 articles_this_round.append(article_data)
-                save_title(title_text)
-                titles_set.add(title_text)
                 print(f'  ✅ 新文章: {title_text}')
-                sleep(1.5)
             # 本轮所有新文章按日期分组存储
             if not os.path.exists(JSON_DIR):
                 os.makedirs(JSON_DIR)
@@ -376,22 +576,27 @@ def crawl_channel(channel_url, chromedriver_path=None):
                     print(f"连续{no_loadmore_threshold}次未检测到'Load more'按钮，频道可能已加载全部内容")
                     break
                 else:
-                    sleep(2)
+                    waiter.wait(timeout=2)
                     continue
             # 点击按钮前先滚动到可见区域，失败重试3次
             click_success = False
             for click_attempt in range(3):
                 try:
                     driver.execute_script("arguments[0].scrollIntoView(true);", load_btn)
-                    sleep(0.5)
+                    before = waiter.snapshot()
+                    # 丢弃之前的性能日志，使记录到的只有这次点击触发的请求
+                    captured_xhr(driver)
                     load_btn.click()
                     click_count += 1
                     print(f"点击'Load more'按钮 ({click_count}/{max_clicks})")
-                    sleep(2)
+                    # 新文章出现或网络空闲即继续，最多等10秒
+                    reason, waited = waiter.wait(before, timeout=10)
+                    print(f"⏱️ 等待 {waited:.1f} 秒（{PageWaiter.LABELS[reason]}）")
+                    if not xhr_captured:
+                        xhr_captured = capture_template(driver, xhr_store, channel_url, 'fijitimes.com.fj') is not None
                     try:
                         driver.execute_script('window.scrollTo(0, document.body.scrollHeight);')
                         print("已滚动到页面底部")
-                        sleep(1)
                     except:
                         print("滚动失败，继续处理")
                     click_success = True
@@ -405,54 +610,56 @@ def crawl_channel(channel_url, chromedriver_path=None):
     except KeyboardInterrupt:
         print("\n⚠️ 检测到用户中断（Ctrl+C），正在保存已爬取内容...")
     finally:
+        print(f"⏱️ {waiter.describe()}")
         # 无论如何都保存一次
         if all_articles:
             print(f"\n⚠️ 正在保存已爬取的{len(all_articles)}篇文章...")
             save_articles_grouped_by_date(all_articles, channel_name)
         else:
             print("\n⚠️ 没有需要额外保存的文章。")
-        try:
-            driver.quit()
-            print("🔚 浏览器已关闭")
-        except:
-            pass
+    return True
 
-        # 清理临时目录和ChromeDriver缓存
-        try:
-            if os.path.exists(unique_temp_dir):
-                shutil.rmtree(unique_temp_dir)
-                print("🧹 已清理临时目录")
-            if os.path.exists('./chromedriver_cache'):
-                shutil.rmtree('./chromedriver_cache')
-                print("🧹 已清理ChromeDriver缓存目录")
-        except Exception as e:
-            print(f"⚠️ 清理目录失败: {e}")
 
+def crawl_pooled_channel(channel_url):
+    """从浏览器池取得一个浏览器爬取频道；取得之后的任何失败都会把浏览器归还（或回收），池的容量不会减少"""
+    try:
+        driver = browser_pool.acquire()
+    except Exception as e:
+        print(f"ChromeDriver启动失败: {e}")
+        return
+    # 中途抛出异常时浏览器状态未知，直接回收
+    broken = True
+    try:
+        broken = not crawl_channel(channel_url, driver)
+    finally:
+        # 浏览器放回池中，供下一个频道（或下一次运行）复用
+        browser_pool.release(driver, broken=broken)
+        print(f"🧰 {browser_pool.describe()}")
 
-def main():
-    print("🎯 Fiji Times 频道逐步爬虫启动")
 
+def install_chromedriver(main_version=None):
+    """DriverCache 未命中时下载ChromeDriver（带重试机制），main_version 为本地Chrome主版本号，失败返回 None"""
     # 先设置webdriver-manager环境变量
     os.environ['WDM_MIRROR'] = 'https://registry.npmmirror.com/-/binary/chromedriver'
     os.environ['WDM_CACHE_PATH'] = os.path.abspath('./chromedriver_cache')
     os.environ['WDM_LOCAL'] = '0'
     os.environ['WDM_SSL_VERIFY'] = 'false'
 
-    channels = [
-        "https://www.fijitimes.com.fj/category/news/business/",
-        "https://www.fijitimes.com.fj/category/news/local-news/",
-        "https://www.fijitimes.com.fj/category/news/world/"
-    ]
-
-    # 先下载ChromeDriver，供所有频道使用（添加重试机制）
-    chromedriver_path = None
     max_retries = 3
     for retry_count in range(max_retries):
         try:
             print(f"🔧 正在下载ChromeDriver... (第{retry_count + 1}次尝试)")
-            chromedriver_path = ChromeDriverManager().install()
+            chromedriver_path = None
+            if main_version:
+                # Chrome 115 起 webdriver-manager 可能需要完整版本号，只给主版本号失败时改为由它自行检测浏览器版本
+                try:
+                    chromedriver_path = ChromeDriverManager(driver_version=main_version).install()
+                except Exception as e:
+                    print(f"⚠️ 按主版本号 {main_version} 下载失败，改为自动检测版本: {e}")
+            if not chromedriver_path:
+                chromedriver_path = ChromeDriverManager().install()
             print(f"✅ ChromeDriver下载完成: {chromedriver_path}")
-            break
+            return chromedriver_path
         except Exception as e:
             print(f"❌ ChromeDriver下载失败 (第{retry_count + 1}次): {e}")
             if retry_count < max_retries - 1:
@@ -466,30 +673,50 @@ def main():
                 except:
                     pass
             else:
-                print(f"❌ 连续{max_retries}次下载失败，程序退出")
-                return
+                print(f"❌ 连续{max_retries}次下载失败")
+    return None
+
+
+def crawl_one_channel(channel_url):
+    print(f"\n📺 开始爬取频道: {channel_url}")
+    if USE_WP_API and crawl_channel_api(channel_url):
+        return
+    if USE_XHR_REPLAY and crawl_channel_xhr(channel_url):
+        return
+    crawl_pooled_channel(channel_url)
+
+
+def main():
+    print("🎯 Fiji Times 频道逐步爬虫启动")
+
+    channels = [
+        "https://www.fijitimes.com.fj/category/news/business/",
+        "https://www.fijitimes.com.fj/category/news/local-news/",
+        "https://www.fijitimes.com.fj/category/news/world/"
+    ]
+
+    if not title_fingerprints:
+        imported = title_fingerprints.import_lines(TXT_FILE)
+        if imported:
+            print(f"📥 已将 {imported} 条历史标题从 {TXT_FILE} 导入指纹集合")
+
+    # 缓存命中时只需校验一次，未命中时才下载；Chrome 升级后会在这里自动换成对应版本的驱动
+    global chromedriver_future
+    chromedriver_future = driver_cache.resolve_async(install_chromedriver)
 
     try:
-        for i, channel_url in enumerate(channels):
-            try:
-                print(f"\n📺 开始爬取第{i + 1}个频道: {channel_url}")
-                crawl_channel(channel_url, chromedriver_path)
-            except KeyboardInterrupt:
-                print("\n⚠️ 检测到用户中断（Ctrl+C），程序直接退出")
-                return
+        run_channels(channels, crawl_one_channel, workers=PARALLEL_CHANNELS)
         print("\n🎯 所有频道爬取完成！")
+        print(f"📶 {fetcher.concurrency.describe()}")
+        print(f"🗃️ {seen_store.describe(SEEN_SITE)}")
+        print(f"🧬 {near_dups.describe('132')}")
     except KeyboardInterrupt:
         print("\n⚠️ 检测到用户中断（Ctrl+C），程序直接退出")
+        # 关闭浏览器，使仍在进行中的频道线程尽快结束
+        browser_pool.close_all()
         return
     finally:
         cleanup_chrome_temp()
-        # 清理ChromeDriver缓存目录
-        try:
-            if os.path.exists('./chromedriver_cache'):
-                shutil.rmtree('./chromedriver_cache')
-                print("🧹 已清理ChromeDriver缓存目录")
-        except Exception as e:
-            print(f"⚠️ 清理ChromeDriver缓存失败: {e}")
 
 
 if __name__ == '__main__':
@@ -3,8 +3,7 @@
 """
 RG.ru 爬虫 - 带异常中断重启功能
 """
-import requests
-from bs4 import BeautifulSoup, Tag
+from bs4 import Tag
 import json
 import os
 from datetime import datetime, timedelta
@@ -19,13 +18,21 @@ from time import sleep
 import re
 import warnings
 import logging
-import shutil
 import subprocess
 import platform
 import random
 import traceback
 import time
 import glob
+import html as html_lib
+import itertools
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
+from crawler_common import (AdaptiveConcurrency, AsyncFetcher, BrowserPool, DriverCache, HostRateLimiter, LinkHarvester,
+                            PageWaiter, SeenStore, XhrTemplateStore, apply_resource_profile,
+                            capture_template, captured_xhr, create_session, enable_performance_log, format_page_stats,
+                            links_in_text, make_soup, page_load_stats, replay_pages, resource_block_patterns,
+                            run_channels, shared_index)
 
 # 尝试导入webdriver_manager，如果失败则使用备用方案
 try:
@@ -59,6 +66,44 @@ exception_count = 0
 MAX_EXCEPTION_RETRY = 5
 EXCEPTION_COOLDOWN = 60  # 异常后冷却时间（秒）
 
+# 频道页资源拦截（CDP）：图片、字体、媒体与第三方统计/广告脚本不加载；
+# 设为 False 时只统计不拦截，可对比前后的加载耗时与传输量
+BLOCK_RESOURCES = True
+BLOCK_DENY = ('*mc.yandex.ru*', '*an.yandex.ru*', '*yastatic.net/pcode*', '*adfox.ru*', '*top-fwz1.mail.ru*',
+              '*smi2.ru*', '*24smi.*', '*relap.io*', '*mediametrics.ru*')
+BLOCK_ALLOW = ()
+
+# 同时爬取的频道数，也是浏览器池中 Chrome 实例数的上限；设为1时按顺序逐个频道爬取。
+# 文章页请求由所有频道共用同一个抓取引擎，令牌桶限速和按主机的在途上限不随频道数增加
+PARALLEL_CHANNELS = 3
+
+# “加载更多”接口重放：Selenium 翻页时记录一次该频道的数据请求（Chrome 性能日志），之后的运行按模板
+# 每批并发请求多页，不再启动浏览器；模板失效时自动删除并回退到 Selenium，由 Selenium 重新记录
+USE_XHR_REPLAY = True
+XHR_TEMPLATE_FILE = 'rg_ru_xhr.json'
+XHR_PAGE_BATCH = 4
+XHR_MAX_PAGES = 50
+
+# 文章页限速：每秒请求数与突发容量（令牌桶），替代每篇文章前后的固定等待
+RATE_LIMIT = 0.4
+RATE_BURST = 1
+
+# 创建会话，连接池复用；429/5xx 由抓取引擎退避重试，每次重试都经过令牌桶
+session = create_session(headers={
+    'Accept-Language': 'ru-RU,ru;q=0.8,en-US;q=0.5,en;q=0.3',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Cache-Control': 'max-age=0'
+}, pool_maxsize=3, verify=False, status_forcelist=())
+# 文章页抓取引擎：同一主机的在途请求数从1开始按 AIMD 在 1~3 之间自适应调整，所有请求（含重试）都经过令牌桶；
+# SSL/连接错误和超时重试 2 次，429/5xx 按退避重试，均在引擎的主机名额内进行
+fetcher = AsyncFetcher(session, timeout=30, retries=2, retry_delay=3,
+                       rate_limiter=HostRateLimiter(RATE_LIMIT, RATE_BURST),
+                       concurrency=AdaptiveConcurrency(initial=1, maximum=3))
+
 
 def find_chromedriver():
     """查找系统中已安装的ChromeDriver"""
@@ -165,44 +210,8 @@ def download_chromedriver_manual():
         return None
 
 
-def get_local_chrome_version():
-    """自动检测本地Chrome主版本号（仅支持Windows）"""
-    import winreg
-    chrome_reg_paths = [
-        r"SOFTWARE\Google\Chrome\BLBeacon",
-        r"SOFTWARE\WOW6432Node\Google\Chrome\BLBeacon"
-    ]
-    for reg_path in chrome_reg_paths:
-        try:
-            reg_key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, reg_path)
-            version, _ = winreg.QueryValueEx(reg_key, "version")
-            winreg.CloseKey(reg_key)
-            return version
-        except:
-            pass
-        try:
-            reg_key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, reg_path)
-            version, _ = winreg.QueryValueEx(reg_key, "version")
-            winreg.CloseKey(reg_key)
-            return version
-        except:
-            pass
-    # 备选：尝试通过chrome.exe --version
-    try:
-        result = subprocess.run([
-            r"C:\Program Files\Google\Chrome\Application\chrome.exe", "--version"
-        ], capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            m = re.search(r"(\d+\.\d+\.\d+\.\d+)", result.stdout)
-            if m:
-                return m.group(1)
-    except:
-        pass
-    return None
-
-
-def get_chromedriver_path():
-    """获取ChromeDriver路径，优先自动检测本地Chrome主版本号并下载对应版本"""
+def install_chromedriver(main_version=None):
+    """DriverCache 未命中时获取ChromeDriver；main_version 为本地Chrome主版本号，检测不到时为 None"""
     # 方案1: 查找系统中已安装的ChromeDriver
     chromedriver_path = find_chromedriver()
     if chromedriver_path:
@@ -211,9 +220,7 @@ def get_chromedriver_path():
 
     # 方案2: 自动检测本地Chrome主版本号并下载对应版本
     if WEBDRIVER_MANAGER_AVAILABLE:
-        chrome_version = get_local_chrome_version()
-        if chrome_version:
-            main_version = chrome_version.split('.')[0]
+        if main_version:
             print(f"🔍 检测到本地Chrome主版本号: {main_version}")
             sources = [
                 ("默认源", None),
@@ -281,16 +288,11 @@ def get_chromedriver_path():
     return None
 
 
-def load_titles():
-    if not os.path.exists(TXT_FILE):
-        return set()
-    with open(TXT_FILE, 'r', encoding='utf-8') as f:
-        return set(line.strip() for line in f if line.strip())
-
-
-def save_title(title):
-    with open(TXT_FILE, 'a', encoding='utf-8') as f:
-        f.write(title + '\n')
+# 去重记录：各站点共用的 SQLite 库（按需查询，不再整份读入内存），旧的标题文件在首次运行时导入一次
+SEEN_SITE = 'rg.ru'
+seen_store = SeenStore()
+# 正文近似重复检测（MinHash/LSH）：各站点共用一个索引，保存前与所有站点已保存的文章比较
+near_dups = shared_index()
 
 
 def safe_publish_time(publish_time):
@@ -353,25 +355,21 @@ def safe_filename(s):
 
 
 def get_latest_date_from_titles():
-    """从标题文件中提取最新日期"""
-    if not os.path.exists(TXT_FILE):
-        return None
-
+    """从去重库的历史标题中提取最新日期"""
     latest_date = None
-    with open(TXT_FILE, 'r', encoding='utf-8') as f:
-        for line in f:
-            # 尝试从标题行中提取日期信息
-            match = re.search(r'(\d{2})\.(\d{2})\.(\d{4})', line)
-            if match:
-                day = match.group(1)
-                month = match.group(2)
-                year = match.group(3)
-                try:
-                    date_obj = datetime(int(year), int(month), int(day))
-                    if latest_date is None or date_obj > latest_date:
-                        latest_date = date_obj
-                except:
-                    continue
+    for line in seen_store.keys(SEEN_SITE):
+        # 尝试从标题中提取日期信息
+        match = re.search(r'(\d{2})\.(\d{2})\.(\d{4})', line)
+        if match:
+            day = match.group(1)
+            month = match.group(2)
+            year = match.group(3)
+            try:
+                date_obj = datetime(int(year), int(month), int(day))
+                if latest_date is None or date_obj > latest_date:
+                    latest_date = date_obj
+            except:
+                continue
 
     return latest_date
 
@@ -393,6 +391,7 @@ def get_previous_day_date():
 
 def save_articles_grouped_by_date(articles, channel_name):
     from collections import defaultdict
+    articles = near_dups.filter_articles('146', articles)
     grouped = defaultdict(list)
     for art in articles:
         # 只取年月日部分作为分组依据
@@ -439,6 +438,7 @@ def save_articles_grouped_by_date(articles, channel_name):
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
                 json.dump(arts, f, ensure_ascii=False, indent=2)
+            near_dups.add_articles('146', arts)
             print(f'💾 已保存{len(arts)}篇文章到 {filepath} (原始日期: {original_date_str})')
         except Exception as e:
             print(f'❌ 保存文件失败: {filepath}, 错误: {str(e)}')
@@ -448,173 +448,308 @@ def save_articles_grouped_by_date(articles, channel_name):
             try:
                 with open(backup_filepath, 'w', encoding='utf-8') as f:
                     json.dump(arts, f, ensure_ascii=False, indent=2)
+                near_dups.add_articles('146', arts)
                 print(f'💾 已保存{len(arts)}篇文章到备用文件 {backup_filepath}')
             except Exception as e2:
                 print(f'❌ 备用文件保存也失败: {str(e2)}')
 
 
-def crawl_article(url, session=None):
-    if session is None:
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'ru-RU,ru;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Cache-Control': 'max-age=0'
-        })
-
-    for attempt in range(3):
-        try:
-            # 增加随机延迟，避免被反爬虫检测
-            sleep(1 + attempt * 0.5)
-
-            # 使用更长的超时时间
-            response = session.get(url, timeout=30, verify=False)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # 查找标题 - 根据提供的HTML结构
-            title_elem = soup.find('h1', class_='PageArticleCommonTitle_title__fUDQW')
-            if not isinstance(title_elem, Tag):
-                print(f"  × 未找到标题元素，重试第{attempt + 1}次")
-                if attempt < 2:  # 如果不是最后一次尝试，继续重试
-                    continue
-                else:
-                    print(f"  × 连续3次未找到标题元素，跳过: {url}")
-                    return None, None, None
+# 页面内嵌的 Next.js 数据与文章链接
+NEXT_DATA_RE = re.compile(r'<script[^>]*id=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>', re.S)
+ARTICLE_LINK_RE = re.compile(r'(?:https://rg\.ru)?(/20\d\d/[^"\'\s<>?#\\]*?\.html)')
+HREF_RE = re.compile(r'href=["\']([^"\']+)["\']')
+NEXT_BODY_KEYS = ('text', 'body', 'content', 'html')
+NEXT_DATE_KEYS = ('published_at', 'publishedAt', 'datetime', 'date_published', 'pub_date', 'date')
+NEXT_URL_KEYS = ('url', 'link', 'href', 'canonical', 'canonical_url', 'path', 'uri')
+NEXT_SLUG_KEYS = ('slug', 'id', 'uid')
+MOSCOW_TZ = ZoneInfo('Europe/Moscow')
+
+
+def build_article_data(url, title_text, content, authors, publish_time):
+    """按统一结构组装文章数据，分类根据URL确定"""
+    category = "新闻"
+    if '/tema/gos' in url:
+        category = "政府"
+    elif '/tema/ekonomika' in url:
+        category = "经济"
+    elif '/tema/mir' in url:
+        category = "国际"
+    elif '/tema/obshestvo' in url:
+        category = "社会"
+    elif '/tema/bezopasnost' in url:
+        category = "安全"
+
+    return {
+        "title": title_text,
+        "content": content,
+        "sources": {
+            "current_site": "俄罗斯报",
+            "current_siteurl": "rg.ru",
+            "origin_url": url
+        },
+        "metadata": {
+            "publish_time": safe_publish_time(publish_time),
+            "authors": authors,
+            "category": category
+        },
+        "crawlingtime": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+def load_next_data(html):
+    """取出 __NEXT_DATA__ 脚本中的JSON，没有或无法解析时返回 None"""
+    m = NEXT_DATA_RE.search(html)
+    if not m:
+        return None
+    try:
+        return json.loads(m.group(1))
+    except ValueError:
+        return None
 
-            title_text = title_elem.get_text(strip=True)
 
-            # 优先查找作者 - PageArticleContent_authors__eRDtn 下所有 <a> 标签文本
-            authors = ''
-            author_elem = soup.find(class_='PageArticleContent_authors__eRDtn')
-            if isinstance(author_elem, Tag):
-                a_tags = author_elem.find_all('a')
-                authors = ' '.join(a.get_text(strip=True) for a in a_tags if a.get_text(strip=True))
-            else:
-                # 其次查找 PageArticle_authors__cFIb5 下所有 <a> 标签文本
-                author_elem = soup.find(class_='PageArticle_authors__cFIb5')
-                if isinstance(author_elem, Tag):
-                    a_tags = author_elem.find_all('a')
-                    authors = ' '.join(a.get_text(strip=True) for a in a_tags if a.get_text(strip=True))
-                else:
-                    # 备选作者查找逻辑
-                    author_elem = (
-                            soup.find('span', class_='author') or
-                            soup.find('div', class_='author') or
-                            soup.find('span', class_='byline') or
-                            soup.find('div', class_='byline')
-                    )
-                    if isinstance(author_elem, Tag):
-                        authors = author_elem.get_text(strip=True)
-
-            # 查找文章内容 - 根据提供的HTML结构
-            content_elem = soup.find('div', class_='PageContentCommonStyling_text__CKOzO')
-            if not isinstance(content_elem, Tag):
-                print(f"  × 未找到内容元素，重试第{attempt + 1}次")
-                if attempt < 2:  # 如果不是最后一次尝试，继续重试
-                    continue
-                else:
-                    print(f"  × 连续3次未找到内容元素，跳过: {url}")
-                    return None, None, None
-
-            # 提取段落内容 - 查找所有p标签，特别是带有_msttexthash属性的
-            paragraphs = []
-            # 查找所有p标签
-            all_p_tags = content_elem.find_all('p')
-            for p in all_p_tags:
-                if isinstance(p, Tag):
-                    # 检查是否有_msttexthash属性
-                    class_attr = p.get('class')
-                    has_msttexthash = class_attr and any('_msttexthash' in str(cls) for cls in class_attr)
-                    text = p.get_text(strip=True)
-                    if text and len(text) > 10:  # 过滤太短的段落
-                        paragraphs.append(text)
-                        if has_msttexthash:
-                            print(f"    ✓ 找到带_msttexthash属性的段落: {text[:50]}...")
-
-            # 如果上面的方法没有找到内容，尝试其他方法
-            if not paragraphs:
-                # 查找所有p标签，不管是否有_msttexthash属性
-                all_p_tags = content_elem.find_all('p')
-                for p in all_p_tags:
-                    if isinstance(p, Tag):
-                        text = p.get_text(strip=True)
-                        if text and len(text) > 10:
-                            paragraphs.append(text)
-
-            # 如果仍然没有找到内容，重试
-            if not paragraphs:
-                print(f"  × 未找到文章内容，重试第{attempt + 1}次")
-                if attempt < 2:  # 如果不是最后一次尝试，继续重试
-                    continue
-                else:
-                    print(f"  × 连续3次未找到文章内容，跳过: {url}")
-                    return None, None, None
-
-            content = ''.join(paragraphs)
-
-            # 查找发布时间（只用ContentMetaDefault_date__wS0te类）
-            publish_time = ''
-            time_elem = soup.find(class_='ContentMetaDefault_date__wS0te')
-            if isinstance(time_elem, Tag):
-                publish_time = time_elem.get_text(strip=True)
-
-            # 确定分类
-            category = "新闻"
-            if '/tema/gos' in url:
-                category = "政府"
-            elif '/tema/ekonomika' in url:
-                category = "经济"
-            elif '/tema/mir' in url:
-                category = "国际"
-            elif '/tema/obshestvo' in url:
-                category = "社会"
-            elif '/tema/bezopasnost' in url:
-                category = "安全"
-
-            article_data = {
-                "title": title_text,
-                "content": content,
-                "sources": {
-                    "current_site": "俄罗斯报",
-                    "current_siteurl": "rg.ru",
-                    "origin_url": url
-                },
-                "metadata": {
-                    "publish_time": safe_publish_time(publish_time),
-                    "authors": authors,
-                    "category": category
-                },
-                "crawlingtime": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-
-            return article_data, title_text, publish_time
-
-        except requests.exceptions.SSLError as e:
-            print(f"  × SSL错误，重试第{attempt + 1}次: {url}")
-            sleep(3 + attempt * 2)  # 增加延迟时间
-            continue
-        except requests.exceptions.ConnectionError as e:
-            print(f"  × 连接错误，重试第{attempt + 1}次: {url}")
-            sleep(3 + attempt * 2)
-            continue
-        except requests.exceptions.Timeout as e:
-            print(f"  × 超时错误，重试第{attempt + 1}次: {url}")
-            sleep(3 + attempt * 2)
+def iter_json_dicts(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            yield node
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+def next_data_text(value):
+    """正文字段可能是HTML字符串，也可能是由若干块组成的列表"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        parts = []
+        for item in value:
+            if isinstance(item, dict):
+                item = next((item[k] for k in NEXT_BODY_KEYS if isinstance(item.get(k), str)), '')
+            if isinstance(item, str):
+                parts.append(item)
+        return '\n'.join(parts)
+    return ''
+
+
+def next_data_publish_time(node):
+    """把JSON里的发布时间转为页面上显示的莫斯科时间格式（07.07.2025 16:00）"""
+    for key in NEXT_DATE_KEYS:
+        value = node.get(key)
+        if isinstance(value, (int, float)) and value > 0:
+            if value > 1e12:  # 毫秒时间戳
+                value /= 1000
+            return datetime.fromtimestamp(value, MOSCOW_TZ).strftime('%d.%m.%Y %H:%M')
+        if isinstance(value, str) and value:
+            try:
+                dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                return value
+            if dt.tzinfo is not None:
+                dt = dt.astimezone(MOSCOW_TZ)
+            return dt.strftime('%d.%m.%Y %H:%M')
+    return ''
+
+
+def next_data_matches(node, url):
+    """节点的链接（或 slug / id）是否指向所请求的文章；相关文章、推荐位等节点不匹配"""
+    path = urlsplit(url).path.rstrip('/')
+    stem = path.rsplit('/', 1)[-1].removesuffix('.html')
+    for key in NEXT_URL_KEYS:
+        value = node.get(key)
+        if isinstance(value, str) and value.strip():
+            value_path = urlsplit(value.strip()).path.rstrip('/')
+            if value_path and ('/' + value_path.lstrip('/')) == path:
+                return True
+    for key in NEXT_SLUG_KEYS:
+        value = node.get(key)
+        if isinstance(value, (str, int)) and not isinstance(value, bool) and str(value).strip():
+            if str(value).strip().strip('/').removesuffix('.html') == stem:
+                return True
+    return False
+
+
+def parse_article_from_next_data(url, html):
+    """
+    从内嵌的 Next.js 数据中提取文章；数据缺失、结构不符或找不到指向该URL的节点时返回 None，由调用方走DOM解析
+    """
+    data = load_next_data(html)
+    if data is None:
+        return None
+
+    # 链接（或 slug / id）与所请求的URL一致、带标题的节点中正文最长的即为文章本身；
+    # 页面数据里还有相关文章和推荐位，不能只按正文长度挑选
+    article_node, body, body_len = None, '', 0
+    for node in iter_json_dicts(data):
+        title = node.get('title')
+        if not isinstance(title, str) or not title.strip():
             continue
-        except Exception as e:
-            print(f"  × 爬取文章失败 {url}: {str(e)}")
-            sleep(2)
+        if not next_data_matches(node, url):
             continue
+        for key in NEXT_BODY_KEYS:
+            text = next_data_text(node.get(key))
+            if len(text) > body_len:
+                article_node, body, body_len = node, text, len(text)
+    if article_node is None:
+        return None
+
+    if '<' in body:
+        body_soup = make_soup(body)
+        paragraphs = [p.get_text(strip=True) for p in body_soup.find_all('p')]
+        if not paragraphs:
+            paragraphs = body_soup.get_text('\n', strip=True).split('\n')
+    else:
+        paragraphs = body.split('\n')
+    paragraphs = [p.strip() for p in paragraphs if len(p.strip()) > 10]
+    if not paragraphs:
+        return None
+
+    title_text = make_soup(article_node['title']).get_text(strip=True)
+    authors = []
+    for author in article_node.get('authors') or []:
+        name = (author.get('name') or author.get('title')) if isinstance(author, dict) else author
+        if isinstance(name, str) and name.strip():
+            authors.append(name.strip())
+    publish_time = next_data_publish_time(article_node)
+
+    article_data = build_article_data(url, title_text, ''.join(paragraphs), ' '.join(authors), publish_time)
+    return article_data, title_text, publish_time
 
-    return None, None, None
+
+def normalize_article_href(href):
+    """站内文章链接补全为完整URL，其它链接返回 None"""
+    if href.startswith('/'):
+        full_url = 'https://rg.ru' + href
+    elif href.startswith('https://rg.ru/'):
+        full_url = href
+    else:
+        return None
+    if '/202' in full_url and '.html' in full_url:
+        return full_url
+    return None
+
+
+def extract_article_links_from_html(html):
+    """不构建DOM，直接从内嵌JSON和 href 属性中用正则提取文章链接"""
+    urls = set()
+    m = NEXT_DATA_RE.search(html)
+    if m:
+        for path in ARTICLE_LINK_RE.findall(m.group(1)):
+            urls.add('https://rg.ru' + path)
+    for href in HREF_RE.findall(html):
+        full_url = normalize_article_href(html_lib.unescape(href))
+        if full_url:
+            urls.add(full_url)
+    return list(urls)
+
+
+def crawl_article(url, result):
+    """
+    解析抓取引擎返回的文章页。连接错误、超时和 429/5xx 已由引擎重试（经过主机在途名额和令牌桶），
+    这里只解析一次：同一页面重新下载得到的HTML相同，解析失败不再重复请求
+    """
+    try:
+        response = result.get_response()
+        response.raise_for_status()
+    except Exception as e:
+        print(f"  × 请求失败 {url}: {str(e)}")
+        return None, None, None
+
+    # 优先读取页面内嵌的 Next.js 数据，不依赖随构建变化的CSS类名
+    parsed = parse_article_from_next_data(url, response.text)
+    if parsed is not None:
+        return parsed
+
+    # 兜底：按CSS类名解析DOM（同一份响应）
+    try:
+        return parse_article_from_dom(url, response.text)
+    except Exception as e:
+        print(f"  × 解析文章失败 {url}: {str(e)}")
+        return None, None, None
+
+
+def parse_article_from_dom(url, html):
+    """按CSS类名解析文章页，找不到标题或正文时返回 (None, None, None)"""
+    soup = make_soup(html)
+
+    # 查找标题 - 根据提供的HTML结构
+    title_elem = soup.find('h1', class_='PageArticleCommonTitle_title__fUDQW')
+    if not isinstance(title_elem, Tag):
+        print(f"  × 未找到标题元素，跳过: {url}")
+        return None, None, None
+
+    title_text = title_elem.get_text(strip=True)
+
+    # 优先查找作者 - PageArticleContent_authors__eRDtn 下所有 <a> 标签文本
+    authors = ''
+    author_elem = soup.find(class_='PageArticleContent_authors__eRDtn')
+    if isinstance(author_elem, Tag):
+        a_tags = author_elem.find_all('a')
+        authors = ' '.join(a.get_text(strip=True) for a in a_tags if a.get_text(strip=True))
+    else:
+        # 其次查找 PageArticle_authors__cFIb5 下所有 <a> 标签文本
+        author_elem = soup.find(class_='PageArticle_authors__cFIb5')
+        if isinstance(author_elem, Tag):
+            a_tags = author_elem.find_all('a')
+            authors = ' '.join(a.get_text(strip=True) for a in a_tags if a.get_text(strip=True))
+        else:
+            # 备选作者查找逻辑
+            author_elem = (
+                    soup.find('span', class_='author') or
+                    soup.find('div', class_='author') or
+                    soup.find('span', class_='byline') or
+                    soup.find('div', class_='byline')
+            )
+            if isinstance(author_elem, Tag):
+                authors = author_elem.get_text(strip=True)
+
+    # 查找文章内容 - 根据提供的HTML结构
+    content_elem = soup.find('div', class_='PageContentCommonStyling_text__CKOzO')
+    if not isinstance(content_elem, Tag):
+        print(f"  × 未找到内容元素，跳过: {url}")
+        return None, None, None
+
+    # 提取段落内容 - 查找所有p标签，特别是带有_msttexthash属性的
+    paragraphs = []
+    # 查找所有p标签
+    all_p_tags = content_elem.find_all('p')
+    for p in all_p_tags:
+        if isinstance(p, Tag):
+            # 检查是否有_msttexthash属性
+            class_attr = p.get('class')
+            has_msttexthash = class_attr and any('_msttexthash' in str(cls) for cls in class_attr)
+            text = p.get_text(strip=True)
+            if text and len(text) > 10:  # 过滤太短的段落
+                paragraphs.append(text)
+                if has_msttexthash:
+                    print(f"    ✓ 找到带_msttexthash属性的段落: {text[:50]}...")
+
+    # 如果上面的方法没有找到内容，尝试其他方法
+    if not paragraphs:
+        # 查找所有p标签，不管是否有_msttexthash属性
+        all_p_tags = content_elem.find_all('p')
+        for p in all_p_tags:
+            if isinstance(p, Tag):
+                text = p.get_text(strip=True)
+                if text and len(text) > 10:
+                    paragraphs.append(text)
+
+    # 如果仍然没有找到内容，跳过
+    if not paragraphs:
+        print(f"  × 未找到文章内容，跳过: {url}")
+        return None, None, None
+
+    content = ''.join(paragraphs)
+
+    # 查找发布时间（只用ContentMetaDefault_date__wS0te类）
+    publish_time = ''
+    time_elem = soup.find(class_='ContentMetaDefault_date__wS0te')
+    if isinstance(time_elem, Tag):
+        publish_time = time_elem.get_text(strip=True)
+
+    article_data = build_article_data(url, title_text, content, authors, publish_time)
+    return article_data, title_text, publish_time
 
 
 def extract_article_links_from_page_rubric(soup, base_url):
@@ -711,93 +846,152 @@ def extract_article_links_from_page(soup, base_url):
     return list(set(urls))
 
 
-def crawl_channel(channel_url, driver=None, unique_temp_dir=None, chromedriver_path=None):
+def create_driver(profile_dir):
+    """浏览器池的工厂函数：以 profile_dir 为用户目录启动无头 Chrome，并开启资源拦截"""
+    print("🔧 创建新的浏览器实例...")
+    chrome_options = Options()
+    chrome_options.add_argument('--headless=new')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--window-size=1920,1080')
+    chrome_options.add_argument(
+        '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+    chrome_options.add_argument(f'--user-data-dir={profile_dir}')
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    enable_performance_log(chrome_options)
+    service = Service(get_chromedriver_path())
+    driver = webdriver.Chrome(options=chrome_options, service=service)
+    apply_resource_profile(driver, BLOCK_RESOURCES, BLOCK_DENY, BLOCK_ALLOW)
+    return driver
+
+
+# 已验证的ChromeDriver按Chrome主版本持久缓存，与其他爬虫共用；run_crawler() 每次运行开始时在后台解析
+driver_cache = DriverCache()
+chromedriver_future = None
+
+
+def get_chromedriver_path():
+    """等待后台解析完成并返回ChromeDriver路径；无法获取时抛出异常，由浏览器池跳过该频道"""
+    path = chromedriver_future.result() if chromedriver_future is not None else None
+    if path is None:
+        raise RuntimeError("无法获取ChromeDriver")
+    return path
+
+# 浏览器池：最多 PARALLEL_CHANNELS 个浏览器，五个频道以及每天的多次运行复用，打开30个频道页或内存超过1.5GB后重建
+browser_pool = BrowserPool(create_driver, size=PARALLEL_CHANNELS, max_pages=30, max_memory_mb=1500)
+
+
+def get_channel_name(channel_url):
+    """根据URL确定频道名称"""
+    if '/tema/gos' in channel_url:
+        return '政府'
+    elif '/tema/ekonomika' in channel_url:
+        return '经济'
+    elif '/tema/mir' in channel_url:
+        return '国际'
+    elif '/tema/obshestvo' in channel_url:
+        return '社会'
+    elif '/tema/bezopasnost' in channel_url:
+        return '安全'
+    return '新闻'
+
+
+xhr_store = XhrTemplateStore(XHR_TEMPLATE_FILE)
+
+
+def extract_article_links_from_xhr(text):
+    """接口响应（JSON 或 HTML 片段）中的文章链接"""
+    return ['https://rg.ru' + path for path in links_in_text(text, ARTICLE_LINK_RE)]
+
+
+def crawl_channel_xhr(channel_url):
+    """
+    按记录的“加载更多”接口模板直接翻页，不启动浏览器。
+    没有模板、或模板第一批就拿不到链接（接口已变化）时返回 False，由调用方回退到 Selenium
+    """
+    template = xhr_store.get(channel_url)
+    if template is None:
+        return False
+    print(f"\n📡 通过接口重放加载频道: {channel_url}（{template.describe()}）")
+    channel_name = get_channel_name(channel_url)
+    seen_links = set()
+    all_articles = []
+    no_new_batches = 0
+
+    # 频道首页仍用普通请求读取，其后的页面按模板每批并发请求 XHR_PAGE_BATCH 页
+    first = fetcher.fetch(channel_url)
+    first_links = extract_article_links_from_html(first.response.text) if first.status_code == 200 else []
+    pages = replay_pages(fetcher, template, extract_article_links_from_xhr, XHR_PAGE_BATCH, XHR_MAX_PAGES)
+    try:
+        for links in itertools.chain([first_links], pages):
+            new_urls = [u for u in links if u not in seen_links]
+            seen_links.update(new_urls)
+            # 之前的运行中已处理过的链接直接跳过，不再请求
+            fetch_urls = seen_store.unseen_urls(SEEN_SITE, new_urls)
+            articles_this_round = []
+            for result in fetcher.iter_fetch(fetch_urls):
+                article_data, title_text, publish_time = crawl_article(result.url, result)
+                if not article_data or not title_text:
+                    seen_store.mark_unparsed(SEEN_SITE, result)
+                    continue
+                if not seen_store.claim_title(SEEN_SITE, title_text, result.url):
+                    continue
+                articles_this_round.append(article_data)
+                print(f'  ✅ 新文章: {title_text}')
+            if articles_this_round:
+                if not os.path.exists(JSON_DIR):
+                    os.makedirs(JSON_DIR)
+                save_articles_grouped_by_date(articles_this_round, channel_name)
+                all_articles.extend(articles_this_round)
+                no_new_batches = 0
+            else:
+                no_new_batches += 1
+                if no_new_batches >= 2:
+                    print("连续两批没有新文章，停止翻页")
+                    break
+    except ValueError as e:
+        print(f"⚠️ {e}，删除模板并回退到Selenium")
+        xhr_store.drop(channel_url)
+        return False
+    finally:
+        pages.close()
+    print(f"🎉 {channel_name} 完成（接口重放），共 {len(seen_links)} 个链接，新文章 {len(all_articles)} 篇")
+    return True
+
+
+def crawl_channel(channel_url, driver):
     print(f"\n🌐 加载频道: {channel_url}")
-    # 只在driver为None时才创建新实例，否则始终复用
-    if driver is None:
-        print("🔧 创建新的浏览器实例...")
-        import uuid
-        unique_temp_dir = os.path.abspath(f'./chrome_temp_{uuid.uuid4().hex[:8]}')
-        os.makedirs(unique_temp_dir, exist_ok=True)
-        chrome_options = Options()
-        chrome_options.add_argument('--headless=new')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument(
-            '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_argument(f'--user-data-dir={unique_temp_dir}')
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        try:
-            if chromedriver_path is None:
-                chromedriver_path = get_chromedriver_path()
-                if chromedriver_path is None:
-                    print("❌ 无法获取ChromeDriver，跳过当前频道")
-                    return None, None
-            service = Service(chromedriver_path)
-            driver = webdriver.Chrome(options=chrome_options, service=service)
-        except Exception as e:
-            print(f"ChromeDriver启动失败: {e}")
-            if unique_temp_dir and os.path.exists(unique_temp_dir):
-                try:
-                    shutil.rmtree(unique_temp_dir)
-                except:
-                    pass
-            return None, None
-    else:
-        print("♻️ 复用现有浏览器实例...")
-        # 复用时不再更换unique_temp_dir
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
 
     try:
         driver.get(channel_url)
     except Exception as e:
         print(f'⚠️ 访问频道失败: {e}')
-        return driver, unique_temp_dir
+        return
 
-    sleep(3)
+    # 等待文章链接渲染出来（最多3秒），网络空闲时提前返回
+    waiter = PageWaiter(driver, 'a[href*="/202"][href$=".html"]')
+    waiter.wait(0, timeout=3)
+    blocked_count = len(resource_block_patterns(BLOCK_DENY, BLOCK_ALLOW)) if BLOCK_RESOURCES else 0
+    print(f"📉 {format_page_stats(page_load_stats(driver), blocked_count)}")
 
     max_scrolls = 50  # 最大滚动次数
     scroll_count = 0
     seen_links = set()
-    titles_set = load_titles()
-    print(f"已加载 {len(titles_set)} 个历史标题用于去重")
+    print(f"去重库已有 {seen_store.count(SEEN_SITE)} 个历史标题")
 
-    # 根据URL确定频道名称
-    if '/tema/gos' in channel_url:
-        channel_name = '政府'
-    elif '/tema/ekonomika' in channel_url:
-        channel_name = '经济'
-    elif '/tema/mir' in channel_url:
-        channel_name = '国际'
-    elif '/tema/obshestvo' in channel_url:
-        channel_name = '社会'
-    elif '/tema/bezopasnost' in channel_url:
-        channel_name = '安全'
-    else:
-        channel_name = '新闻'
+    channel_name = get_channel_name(channel_url)
+    # 该频道还没有接口模板时，在下面的滚动/点击之后从性能日志中记录
+    xhr_captured = xhr_store.get(channel_url) is not None
 
     all_articles = []
     no_new_content_count = 0
     no_new_content_threshold = 5
-
-    # 创建会话，提高连接效率
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'ru-RU,ru;q=0.8,en-US;q=0.5,en;q=0.3',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Sec-Fetch-Dest': 'document',
-        'Sec-Fetch-Mode': 'navigate',
-        'Sec-Fetch-Site': 'none',
-        'Cache-Control': 'max-age=0'
-    })
+    # 浏览器内收集站内链接，每轮只传回新增的部分
+    harvester = LinkHarvester(driver, 'a[href]', pattern=r'^(?:https://rg\.ru)?/')
 
     try:
         while scroll_count < max_scrolls:
@@ -806,10 +1000,17 @@ def crawl_channel(channel_url, driver=None, unique_temp_dir=None, chromedriver_p
             # 新增：频道无文章时重试机制
             retry_channel_count = 0
             while retry_channel_count < 3:
-                html = driver.page_source
-                soup = BeautifulSoup(html, 'html.parser')
-                urls = extract_article_links_from_page(soup, channel_url)
-                if urls:
+                links = harvester.collect()
+                urls = set()
+                if harvester.reset:
+                    # 刚进入（或重新进入）频道页：内嵌的 __NEXT_DATA__ 里还有尚未渲染成 <a> 的链接，整页提取一次
+                    html = driver.page_source
+                    urls.update(extract_article_links_from_html(html)
+                                or extract_article_links_from_page(make_soup(html), channel_url))
+                urls.update(u for u in map(normalize_article_href, links) if u)
+                urls = list(urls)
+                # 页面上已有文章链接但本轮没有新增时照常继续，由后面的“未发现新内容”计数决定是否停止
+                if urls or seen_links:
                     break
                 else:
                     retry_channel_count += 1
@@ -818,10 +1019,13 @@ def crawl_channel(channel_url, driver=None, unique_temp_dir=None, chromedriver_p
                     sleep(3 + random.uniform(1, 2))
             else:
                 print(f"❌ 连续3次未能在频道页面发现文章，跳过该频道: {channel_url}")
-                return driver, unique_temp_dir
+                return
 
             new_urls = [u for u in urls if u not in seen_links]
-            print(f'本轮新发现 {len(new_urls)} 个链接')
+            seen_links.update(new_urls)
+            # 之前的运行中已处理过的链接直接跳过，不再请求
+            fetch_urls = seen_store.unseen_urls(SEEN_SITE, new_urls)
+            print(f'本轮新发现 {len(new_urls)} 个链接，其中 {len(new_urls) - len(fetch_urls)} 个已处理过')
 
             # 批量爬取本轮所有新链接
             articles_this_round = []
@@ -829,26 +1033,22 @@ def crawl_channel(channel_url, driver=None, unique_temp_dir=None, chromedriver_p
             fail_count = 0
 
             try:
-                for i, url in enumerate(new_urls):
-                    seen_links.add(url)
-                    print(f'  [{i + 1}/{len(new_urls)}] 爬取: {url}')
+                for i, result in enumerate(fetcher.iter_fetch(fetch_urls)):
+                    url = result.url
+                    print(f'  [{i + 1}/{len(fetch_urls)}] 爬取: {url}')
 
-                    article_data, title_text, publish_time = crawl_article(url, session)
+                    article_data, title_text, publish_time = crawl_article(url, result)
                     if not article_data or not title_text:
+                        seen_store.mark_unparsed(SEEN_SITE, result)
                         fail_count += 1
                         continue
-                    if title_text in titles_set:
+                    if not seen_store.claim_title(SEEN_SITE, title_text, url):
                         print(f'  × 已爬取过: {title_text}')
                         continue
 
                     articles_this_round.append(article_data)
-                    save_title(title_text)
-                    titles_set.add(title_text)
                     success_count += 1
                     print(f'  ✅ 新文章: {title_text}')
-
-                    # 增加随机延迟，避免被反爬虫检测
-                    sleep(2 + (i % 3) * 0.5)
             except KeyboardInterrupt:
                 print(f"\n⚠️ 在爬取过程中检测到中断，正在保存当前轮已爬取的{len(articles_this_round)}篇文章...")
                 if articles_this_round:
@@ -861,10 +1061,9 @@ def crawl_channel(channel_url, driver=None, unique_temp_dir=None, chromedriver_p
 
             print(f'  本轮成功: {success_count}, 失败: {fail_count}')
 
-            # 如果失败率过高，暂停一段时间
-            if len(new_urls) > 0 and fail_count / len(new_urls) > 0.7:
-                print(f"⚠️ 失败率过高 ({fail_count}/{len(new_urls)})，暂停30秒...")
-                sleep(30)
+            # 限流/超时由自适应并发控制器在请求过程中即时降速，这里只报告当前上限
+            if len(fetch_urls) > 0 and fail_count / len(fetch_urls) > 0.7:
+                print(f"⚠️ 失败率过高 ({fail_count}/{len(fetch_urls)})，{fetcher.concurrency.describe()}")
 
             if not os.path.exists(JSON_DIR):
                 os.makedirs(JSON_DIR)
@@ -880,37 +1079,27 @@ def crawl_channel(channel_url, driver=None, unique_temp_dir=None, chromedriver_p
                     print(f"连续{no_new_content_threshold}次未发现新内容，停止滚动")
                     break
 
-            # 滚动到页面底部，等待PageRubricSeo_text__9XF1J元素加载
+            # 滚动到页面底部，等待新文章加载
             try:
                 last_height = driver.execute_script("return document.body.scrollHeight")
-                # 平滑下滑到底部
-                for y in range(0, last_height, 200):
-                    driver.execute_script(f"window.scrollTo(0, {y});")
-                    sleep(0.02)
+                before = waiter.snapshot()
+                # 丢弃之前的性能日志，使记录到的只有这次滚动触发的请求
+                captured_xhr(driver)
+                # 滑到底部触发懒加载，再往上滑一小部分，模拟真人操作
                 driver.execute_script(f"window.scrollTo(0, {last_height});")
-                sleep(0.2)
-                # 再往上滑一小部分，模拟真人操作
                 driver.execute_script(f"window.scrollTo(0, {last_height - 300});")
-                sleep(0.2)
-                print("已平滑滚动到页面底部并上滑一小段，等待PageRubricSeo_wrapper__gIhVV元素加载")
-                sleep(5 + random.uniform(1, 3))  # 增加随机延迟
-
-                # 等待PageRubricSeo_wrapper__gIhVV元素出现
-                try:
-                    WebDriverWait(driver, 15).until(
-                        EC.presence_of_element_located((By.CLASS_NAME, "PageRubricSeo_wrapper__gIhVV"))
-                    )
-                    print("PageRubricSeo_wrapper__gIhVV元素已加载")
-                except:
-                    print("未检测到PageRubricSeo_wrapper__gIhVV元素，继续尝试...")
-
-                # 等待PageRubricSeo_text__9XF1J元素出现
+                print("已滚动到页面底部并上滑一小段，等待新文章加载")
+                # 新文章出现或网络空闲即继续，最多等15秒
+                reason, waited = waiter.wait(before, timeout=15)
+                print(f"⏱️ 等待 {waited:.1f} 秒（{PageWaiter.LABELS[reason]}）")
+                if not xhr_captured:
+                    xhr_captured = capture_template(driver, xhr_store, channel_url, 'rg.ru') is not None
+
+                # PageRubricSeo 区块出现后才有 LoadMore 按钮
                 try:
-                    WebDriverWait(driver, 15).until(
+                    WebDriverWait(driver, 5).until(
                         EC.presence_of_element_located((By.CLASS_NAME, "PageRubricSeo_text__9XF1J"))
                     )
-                    print("PageRubricSeo_text__9XF1J元素已加载")
-                    sleep(5)  # 元素加载后等待5秒
                 except:
                     print("未检测到PageRubricSeo_text__9XF1J元素，继续尝试...")
 
@@ -930,16 +1119,21 @@ def crawl_channel(channel_url, driver=None, unique_temp_dir=None, chromedriver_p
                         found = False
                         for btn in btns:
                             try:
+                                before = waiter.snapshot()
+                                captured_xhr(driver)
                                 btn.click()
                                 print("已点击LoadMore按钮，等待内容加载...")
-                                sleep(3 + random.uniform(1, 2))
+                                reason, waited = waiter.wait(before, timeout=10)
+                                print(f"⏱️ 等待 {waited:.1f} 秒（{PageWaiter.LABELS[reason]}）")
+                                if not xhr_captured:
+                                    xhr_captured = capture_template(driver, xhr_store, channel_url, 'rg.ru') is not None
                                 found = True
                                 break
                             except Exception as e:
                                 print(f"点击LoadMore按钮异常: {e}")
                         if not found:
-                            print("未找到LoadMore按钮，等待后重试...")
-                            sleep(3 + random.uniform(1, 2))
+                            print("未找到LoadMore按钮，等待网络空闲后重试...")
+                            waiter.wait(timeout=5)
                         loadmore_fail_count += 1
                         if loadmore_fail_count >= 5:
                             print("连续5次等待和点击LoadMore都无效，跳到下一个频道")
@@ -976,10 +1170,11 @@ def crawl_channel(channel_url, driver=None, unique_temp_dir=None, chromedriver_p
         if all_articles:
             print(f"\n⚠️ 尝试保存已爬取的{len(all_articles)}篇文章...")
             save_articles_grouped_by_date(all_articles, channel_name)
-        # 返回driver和unique_temp_dir供后续使用
-        return driver, unique_temp_dir
+        return
     finally:
         print(f"\n📊 频道爬取完成统计:")
+        print(f"  - {fetcher.concurrency.describe()}")
+        print(f"  - {waiter.describe()}")
         print(f"  - 总文章数: {len(all_articles)}")
         print(f"  - 已见过的链接数: {len(seen_links)}")
         print(f"  - 滚动次数: {scroll_count}")
@@ -990,8 +1185,29 @@ def crawl_channel(channel_url, driver=None, unique_temp_dir=None, chromedriver_p
             save_articles_grouped_by_date(all_articles, channel_name)
         else:
             print("\n✅ 所有文章已在每轮中保存到JSON文件，无需额外保存")
-        # 返回driver和unique_temp_dir供后续频道使用
-        return driver, unique_temp_dir
+        return
+
+
+def crawl_pooled_channel(channel_url):
+    """从浏览器池取得一个浏览器爬取频道，可在多个线程中同时调用"""
+    print(f"\n📺 开始爬取频道: {channel_url}")
+    if USE_XHR_REPLAY and crawl_channel_xhr(channel_url):
+        return
+    try:
+        driver = browser_pool.acquire()
+    except Exception as e:
+        print(f"ChromeDriver启动失败，跳过频道 {channel_url}: {e}")
+        return
+    broken = False
+    try:
+        crawl_channel(channel_url, driver)
+    except Exception as e:
+        broken = True
+        print(f"❌ 爬取频道 {channel_url} 时发生异常: {str(e)}")
+        traceback.print_exc()
+    finally:
+        # 浏览器放回池中，供下一个频道（或下一次运行）复用；出过异常的会话直接回收
+        browser_pool.release(driver, broken=broken)
 
 
 def run_crawler():
@@ -1006,67 +1222,28 @@ def run_crawler():
         "https://rg.ru/tema/bezopasnost"  # 安全
     ]
 
-    chromedriver_path = get_chromedriver_path()
-    if chromedriver_path is None:
-        print("❌ 无法获取ChromeDriver，程序退出")
-        return
+    imported = seen_store.import_lines(SEEN_SITE, TXT_FILE)
+    if imported:
+        print(f"📥 已将 {imported} 条历史标题从 {TXT_FILE} 导入去重库")
+
+    # 缓存命中时只需校验一次；Chrome 升级后会在这里自动换成对应版本的驱动
+    global chromedriver_future
+    chromedriver_future = driver_cache.resolve_async(install_chromedriver)
 
-    driver = None
-    unique_temp_dir = None
     try:
-        for i, channel_url in enumerate(channels):
-            try:
-                print(f"\n📺 开始爬取第{i + 1}个频道: {channel_url}")
-                driver, unique_temp_dir = crawl_channel(channel_url, driver, unique_temp_dir, chromedriver_path)
-                if driver is None:
-                    print("❌ 浏览器启动失败，跳过后续频道")
-                    break
-            except Exception as e:
-                print(f"❌ 爬取频道 {channel_url} 时发生异常: {str(e)}")
-                traceback.print_exc()
-                # 继续下一个频道
-                continue
+        run_channels(channels, crawl_pooled_channel, workers=PARALLEL_CHANNELS)
         print("\n🎯 所有频道爬取完成！")
+        print(f"🧰 {browser_pool.describe()}")
+        print(f"🗃️ {seen_store.describe(SEEN_SITE)}")
+        print(f"🧬 {near_dups.describe('146')}")
     except KeyboardInterrupt:
         print("\n⚠️ 检测到用户中断（Ctrl+C），正在清理资源...")
-        if driver:
-            try:
-                driver.quit()
-                print("🔚 浏览器已关闭")
-            except:
-                pass
-        if unique_temp_dir and os.path.exists(unique_temp_dir):
-            try:
-                shutil.rmtree(unique_temp_dir)
-                print("🧹 已清理临时目录")
-            except:
-                pass
+        browser_pool.close_all()
+        print("🔚 浏览器已关闭")
         return
     except Exception as e:
         print(f"❌ 爬虫运行过程中发生异常: {str(e)}")
         traceback.print_exc()
-    finally:
-        # 确保浏览器被关闭（只在所有频道后关闭）
-        if driver:
-            try:
-                driver.quit()
-                print("🔚 浏览器已关闭")
-            except:
-                pass
-        # 清理临时目录
-        if unique_temp_dir and os.path.exists(unique_temp_dir):
-            try:
-                shutil.rmtree(unique_temp_dir)
-                print("🧹 已清理临时目录")
-            except:
-                pass
-        # 清理ChromeDriver缓存
-        try:
-            if os.path.exists('./chromedriver_cache'):
-                shutil.rmtree('./chromedriver_cache')
-                print("🧹 已清理ChromeDriver缓存目录")
-        except Exception as e:
-            print(f"⚠️ 清理ChromeDriver缓存失败: {e}")
 
 
 def calculate_next_run():
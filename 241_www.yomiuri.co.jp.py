@@ -1,5 +1,3 @@
-from bs4 import BeautifulSoup
-import requests
 from datetime import datetime, timedelta, timezone
 import time
 import json
@@ -7,8 +5,11 @@ import signal
 import sys
 import logging
 import os
+import re
 import threading
 from zoneinfo import ZoneInfo  # NEW: 用于时区转换
+from crawler_common import AdaptiveConcurrency, AdaptiveStop, AsyncFetcher, HostRateLimiter, HttpCache, IdIndex, create_session, make_soup, shared_index, site_strainer
+from crawler_common.stopmodel import max_gap
 
 # 配置日志
 logging.basicConfig(
@@ -25,7 +26,19 @@ logging.basicConfig(
 current_channel_articles = []
 current_channel_name = ""
 current_date = ""
+# 当前 (频道, 日期) 各路径的进度：路径 -> (最后处理完的编号, 已找到的文章数)，随文章文件一起写入台账
+current_progress = {}
+# 定期保存的定时器：每次重新安排时更新，日期爬完时取消；save_lock 使定期保存与最终保存互斥（信号处理中可重入）
+save_timer = None
+save_lock = threading.RLock()
 DATA_DIR = "data"
+DATE_LOG_FILE = "241_date.txt"  # 旧的完成记录（按文件名），首次运行时导入台账后改名
+HTTP_CACHE_DIR = "241_http_cache"  # 历史文章页的磁盘缓存（条件请求）
+HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024
+ID_INDEX_PATH = "241_id_index.sqlite3"  # 每个 (路径, 日期) 的文章编号存在位图
+MAX_ARTICLE_ID = 998
+MAX_CONSECUTIVE_MISSES = 150  # 历史样本不足或未超过预测上限时的固定阈值
+MIN_CONSECUTIVE_MISSES = 5  # 超过预测上限后至少连续无效这么多个才停止
 
 crawler_state = {
     "running": True,
@@ -36,24 +49,12 @@ crawler_state = {
 
 def save_data_on_exit(signal, frame):
     """在程序退出时保存数据"""
-    if current_channel_articles and current_channel_name and current_date:
-        chinese_name = channel_to_chinese[current_channel_name]
-        current_time = datetime.now().strftime("%H%M%S")
-        output_filename = f"241_{chinese_name}_{current_date}_{current_time}.json"
-        output_path = os.path.join(DATA_DIR, output_filename)
-
-        os.makedirs(DATA_DIR, exist_ok=True)
-
-        with open(output_path, 'w', encoding='utf-8') as json_file:
-            json.dump(current_channel_articles, json_file, ensure_ascii=False, indent=4)
-
-        date_txt_path = "241_date.txt"
-        try:
-            with open(date_txt_path, 'a', encoding='utf-8') as f:
-                f.write(output_filename + '\n')
-        except Exception as e:
-            logging.error(f"写入241_date.txt失败: {e}")
-        logging.info(f"\n程序被强制暂停，{chinese_name}频道的数据已保存到 {output_path}")
+    with save_lock:
+        if current_channel_name and current_date:
+            output_path = save_current_articles()
+            if output_path:
+                chinese_name = channel_to_chinese[current_channel_name]
+                logging.info(f"\n程序被强制暂停，{chinese_name}频道的数据已保存到 {output_path}")
     sys.exit(0)
 
 signal.signal(signal.SIGINT, save_data_on_exit)
@@ -88,76 +89,172 @@ channel_to_chinese = {
     "sengo": "历史"
 }
 
-session = requests.Session()
-session.headers.update({
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
+# 429/5xx 由抓取引擎退避重试，每次重试都经过令牌桶并反馈给并发控制器
+session = create_session(headers={
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
     'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-    'Connection': 'keep-alive',
     'Referer': 'https://www.yomiuri.co.jp/',
     'DNT': '1',
-})
+}, pool_maxsize=16, status_forcelist=())
+
+# 限速：每秒请求数与突发容量（令牌桶），替代每次请求后的固定等待
+RATE_LIMIT = 10.0
+RATE_BURST = 5
+# 存在性探测只发 HEAD 请求，允许更高的速率
+PROBE_RATE_LIMIT = 30.0
+PROBE_RATE_BURST = 10
+
+# 文章页抓取引擎：按编号顺序返回结果，便于统计连续无效数并提前停止；在途请求数在 1~8 之间自适应
+fetcher = AsyncFetcher(session, timeout=10, concurrency=AdaptiveConcurrency(initial=4, maximum=8),
+                       rate_limiter=HostRateLimiter(RATE_LIMIT, RATE_BURST),
+                       cache=HttpCache(HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES))
+# 探测引擎：高并发 HEAD 请求，只判断编号是否存在；在途请求数在 1~16 之间自适应
+probe_fetcher = AsyncFetcher(session, max_in_flight=32, timeout=10,
+                             concurrency=AdaptiveConcurrency(initial=8, maximum=16),
+                             rate_limiter=HostRateLimiter(PROBE_RATE_LIMIT, PROBE_RATE_BURST))
+id_index = IdIndex(ID_INDEX_PATH)
+# 文章页只构建标题、段落、时间和作者所在的子树
+ARTICLE_STRAINER = site_strainer('yomiuri')
+# 正文近似重复检测（MinHash/LSH）：各站点共用一个索引，同一篇报道更新后换了编号重发的不再保存
+near_dups = shared_index()
 
 def get_current_time_iso():
     tz = timezone(timedelta(hours=8))
     return datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
 
-def crawl_single_path(path, articles, channel_name, date_str):
-    """爬取单个路径"""
-    consecutive_invalid_count = 0
-    articles_found = 0
-    logging.info(f"开始爬取路径：{path} (日期: {date_str})")
-
-    for i in range(1, 999):
-        formatted_number = str(i).zfill(3)
-        if path.endswith('/'):
-            url = f"https://www.yomiuri.co.jp/{path}{date_str}-OYT1T50{formatted_number}/"
+def build_article_url(path, date_str, i):
+    formatted_number = str(i).zfill(3)
+    if path.endswith('/'):
+        return f"https://www.yomiuri.co.jp/{path}{date_str}-OYT1T50{formatted_number}/"
+    return f"https://www.yomiuri.co.jp/{path}/{date_str}-OYT1T50{formatted_number}/"
+
+PAR_CLASS_RE = re.compile(r'par\d+$')
+
+
+def extract_paragraphs(soup):
+    """
+    一次遍历收集正文段落：按编号依次取 par1、par2……（遇到缺号即停止，每个编号取文档中第一个）；
+    没有编号段落时，依次退回 div.article-body、article、div.content 中的非空 <p>
+    """
+    numbered = {}
+    containers = {}
+    for tag in soup.find_all(['p', 'div', 'article']):
+        classes = tag.get('class') or []
+        if tag.name == 'p':
+            for cls in classes:
+                if PAR_CLASS_RE.match(cls):
+                    numbered.setdefault(cls, tag)
+        elif tag.name == 'article':
+            containers.setdefault('article', tag)
         else:
-            url = f"https://www.yomiuri.co.jp/{path}/{date_str}-OYT1T50{formatted_number}/"
+            if 'article-body' in classes:
+                containers.setdefault('article-body', tag)
+            if 'content' in classes:
+                containers.setdefault('content', tag)
+
+    paragraphs = []
+    for p_count in range(1, 100):
+        paragraph = numbered.get(f'par{p_count}')
+        if paragraph is None:
+            break
+        paragraphs.append(paragraph.get_text(strip=True))
+    if paragraphs:
+        return paragraphs
+
+    for key in ('article-body', 'article', 'content'):
+        content_div = containers.get(key)
+        if content_div is not None:
+            return [p.get_text(strip=True) for p in content_div.find_all('p') if p.get_text(strip=True)]
+    return []
+
+
+def is_final_date(date_str):
+    """早于东京时间昨天的日期不会再新增文章，其编号位图可以直接复用"""
+    yesterday = (datetime.now(ZoneInfo("Asia/Tokyo")) - timedelta(days=1)).strftime("%Y%m%d")
+    return date_str < yesterday
+
+def probe_existing_ids(path, date_str):
+    """用 HEAD 请求探测该路径当天存在的文章编号，结果以位图形式持久化"""
+    key = f"{path}|{date_str}"
+    weekday = datetime.strptime(date_str, "%Y%m%d").weekday()
+    ids = id_index.get_ids(key)
+    if ids is not None:
+        id_index.record_history(path, date_str, weekday, ids[-1] if ids else 0, max_gap(ids))
+        logging.info(f"读取编号位图：{path} (日期: {date_str})，存在 {len(ids)} 个编号")
+        return ids
+
+    # 按路径和星期几学习停止条件；同一星期几样本不足时使用该路径的全部历史
+    history = id_index.get_history(path, weekday)
+    if len(history) < 5:
+        history = id_index.get_history(path)
+    stop = AdaptiveStop(history, max_misses=MAX_CONSECUTIVE_MISSES, min_misses=MIN_CONSECUTIVE_MISSES)
+    logging.info(f"停止条件：{path} (日期: {date_str}) - {stop.report()}")
+
+    ids = []
+    consecutive_misses = 0
+    reliable = True
+    urls = (build_article_url(path, date_str, i) for i in range(1, MAX_ARTICLE_ID + 1))
+    probed = 0
+    for i, result in enumerate(probe_fetcher.iter_fetch(urls, ordered=True, method='HEAD'), start=1):
+        probed = i
+        if result.status_code == 200:
+            consecutive_misses = 0
+            ids.append(i)
+            continue
+        consecutive_misses += 1
+        if result.status_code != 404:
+            # 请求异常、被限流或不支持HEAD：无法确定，交给完整抓取判断
+            reliable = False
+            ids.append(i)
+        if stop.should_stop(i, consecutive_misses):
+            break
 
-        try:
-            response = session.get(url, timeout=10)
-            time.sleep(0.1)
+    id_index.put_ids(key, ids, complete=reliable and is_final_date(date_str))
+    if reliable:
+        id_index.record_history(path, date_str, weekday, ids[-1] if ids else 0, max_gap(ids))
+    logging.info(f"编号探测完成：{path} (日期: {date_str})，共探测 {probed} 个，存在 {len(ids)} 个")
+    return ids
 
-            if response.status_code == 404:
-                consecutive_invalid_count += 1
-                if consecutive_invalid_count >= 150:
-                    break
-                continue
+def crawl_single_path(path, articles, channel_name, date_str):
+    """
+    爬取单个路径：先探测存在的编号，只对存在的编号做完整抓取和解析。
+    台账中已完成的直接跳过，有部分进度的从上次处理完的编号之后继续。
+    何时停止由探测阶段的停止条件（AdaptiveStop）决定，这里只逐个处理探测得到的编号
+    """
+    articles_found = 0
+    progress = id_index.get_progress(channel_name, path, date_str)
+    if progress and progress[0] == 'done':
+        return 0
+    last_id, found_before = (progress[1], progress[2]) if progress else (0, 0)
+    if last_id:
+        logging.info(f"继续爬取路径：{path} (日期: {date_str})，从编号 {last_id + 1} 开始")
+    else:
+        logging.info(f"开始爬取路径：{path} (日期: {date_str})")
+
+    existing_ids = [i for i in probe_existing_ids(path, date_str) if i > last_id]
+    current_progress[path] = (last_id, found_before)
+    urls = (build_article_url(path, date_str, i) for i in existing_ids)
+    for article_id, result in zip(existing_ids, fetcher.iter_fetch(urls, ordered=True)):
+        # 之前的编号都已处理完（文章已放入 articles），作为可以恢复的进度
+        current_progress[path] = (last_id, found_before + articles_found)
+        last_id = article_id
+        url = result.url
+        try:
+            response = result.get_response()
 
             if response.status_code != 200:
-                consecutive_invalid_count += 1
-                if consecutive_invalid_count >= 150:
-                    break
                 continue
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = make_soup(response.text, parse_only=ARTICLE_STRAINER)
             title = soup.find('h1', class_='title-article') or soup.find('h1', class_='c-article-title')
             if not title:
                 title = soup.find('h1')
                 if not title:
-                    consecutive_invalid_count += 1
-                    if consecutive_invalid_count >= 150:
-                        break
                     continue
 
-            paragraphs = []
-            for p_count in range(1, 100):
-                paragraph = soup.find('p', class_=f'par{p_count}')
-                if paragraph:
-                    paragraphs.append(paragraph.get_text(strip=True))
-                else:
-                    break
+            paragraphs = extract_paragraphs(soup)
 
             if not paragraphs:
-                content_div = soup.find('div', class_='article-body') or soup.find('article') or soup.find('div','content')
-                if content_div:
-                    paragraphs = [p.get_text(strip=True) for p in content_div.find_all('p') if p.get_text(strip=True)]
-
-            if not paragraphs:
-                consecutive_invalid_count += 1
-                if consecutive_invalid_count >= 150:
-                    break
                 continue
 
             # === NEW: 过滤含有 "読者会員" 的文章 ===
@@ -165,7 +262,6 @@ def crawl_single_path(path, articles, channel_name, date_str):
                 logging.info(f"文章包含 読者会員 ，跳过: {url}")
                 continue
 
-            consecutive_invalid_count = 0
             article = {}
             article["title"] = title.get_text(strip=True)
             article["content"] = ' '.join(paragraphs)
@@ -210,48 +306,64 @@ def crawl_single_path(path, articles, channel_name, date_str):
                 article["metadata"]["authors"] = author_element.get_text(strip=True)
 
             article["crawling_time"] = crawling_time
+            near_dup = near_dups.check('241', url, article["title"], article["content"])
+            if near_dup:
+                logging.info(f"近似重复（相似度 {near_dup['similarity']:.2f}），跳过: {url} ≈ "
+                             f"[{near_dup['site']}] {near_dup['title']}")
+                continue
             articles.append(article)
             articles_found += 1
             logging.info(f"成功爬取文章: {article['title']}")
 
         except Exception as e:
-            consecutive_invalid_count += 1
             logging.error(f"错误 {e} - URL: {url}")
-            if consecutive_invalid_count >= 150:
-                break
             time.sleep(3)
 
-        if consecutive_invalid_count >= 150:
-            break
-
-    logging.info(f"{path} 路径爬取完成 (日期: {date_str})，共 {articles_found} 篇")
+    current_progress[path] = (last_id, found_before + articles_found)
+    logging.info(f"{path} 路径爬取完成 (日期: {date_str})，共 {articles_found} 篇，"
+                 f"累计缓存命中 {fetcher.cache.hits} 次；{fetcher.concurrency.describe()}")
     return articles_found
 
 def crawl_channel_for_date(channel_name, date_str):
-    global current_channel_articles, current_channel_name, current_date
+    global current_channel_articles, current_channel_name, current_date, current_progress
     current_channel_articles = []
+    current_progress = {}
     current_channel_name = channel_name
     current_date = date_str
-    channel_info = channel_dict[channel_name]
     chinese_name = channel_to_chinese[channel_name]
 
     logging.info(f"=== 开始爬取 {chinese_name} (日期: {date_str}) ===")
 
-    save_timer = threading.Timer(300, save_data_periodically)
-    save_timer.daemon = True
-    save_timer.start()
+    with save_lock:
+        schedule_periodic_save()
 
-    crawl_single_path(channel_info["base_path"], current_channel_articles, channel_name, date_str)
-    for sub_path in channel_info["sub_channels"]:
-        crawl_single_path(sub_path, current_channel_articles, channel_name, date_str)
+    for path in channel_paths(channel_name):
+        crawl_single_path(path, current_channel_articles, channel_name, date_str)
 
-    save_timer.cancel()
-    save_data_periodically()
-    logging.info(f"{chinese_name} 完成 (日期: {date_str})，共 {len(current_channel_articles)} 篇")
-    current_channel_articles = []
+    # 取消定时器并清空当前日期后再释放锁，之后触发的定时器既不会把台账改回 partial，也不会再重新安排
+    with save_lock:
+        save_timer.cancel()
+        save_current_articles(finished=True)
+        article_count = len(current_channel_articles)
+        current_channel_name = ""
+        current_date = ""
+        current_progress = {}
+        current_channel_articles = []
+    logging.info(f"{chinese_name} 完成 (日期: {date_str})，共 {article_count} 篇；{near_dups.describe('241')}")
 
-def save_data_periodically():
-    if current_channel_articles and current_channel_name and current_date:
+def channel_paths(channel_name):
+    channel_info = channel_dict[channel_name]
+    return [channel_info["base_path"], *channel_info["sub_channels"]]
+
+def save_current_articles(finished=False):
+    """
+    保存当前 (频道, 日期) 已爬到的文章，并把各路径的进度写入台账，返回文件路径（没有文章时为 None）。
+    进度在写文件之前取快照，台账中的编号之前的文章一定已经落盘。
+    finished 为 True 且日期已完结时记为 done，之后的运行直接跳过；否则记为 partial，下次从该编号继续
+    """
+    progress = dict(current_progress)
+    output_path = None
+    if current_channel_articles:
         chinese_name = channel_to_chinese[current_channel_name]
         current_time = datetime.now().strftime("%H%M%S")
         output_filename = f"241_{chinese_name}_{current_date}_{current_time}.json"
@@ -259,15 +371,31 @@ def save_data_periodically():
         os.makedirs(DATA_DIR, exist_ok=True)
         with open(output_path, 'w', encoding='utf-8') as json_file:
             json.dump(current_channel_articles, json_file, ensure_ascii=False, indent=4)
-        try:
-            with open("241_date.txt", 'a', encoding='utf-8') as f:
-                f.write(output_filename + '\n')
-        except Exception as e:
-            logging.error(f"写入241_date.txt失败: {e}")
-        logging.info(f"定期保存: {chinese_name} 已保存到 {output_path}")
-        save_timer = threading.Timer(300, save_data_periodically)
-        save_timer.daemon = True
-        save_timer.start()
+        # 落盘后才记入近似重复索引；之前定期保存过的文章已在索引中，add 直接跳过
+        near_dups.add_articles('241', current_channel_articles)
+    status = 'done' if finished and is_final_date(current_date) else 'partial'
+    id_index.put_progress_many([(current_channel_name, path, current_date, status, last_id, found)
+                                for path, (last_id, found) in progress.items()])
+    return output_path
+
+def schedule_periodic_save():
+    """300 秒后定期保存一次；调用方持有 save_lock。先取消之前的定时器（上一个日期异常中断时可能还在），始终只有一个"""
+    global save_timer
+    if save_timer is not None:
+        save_timer.cancel()
+    save_timer = threading.Timer(300, save_data_periodically)
+    save_timer.daemon = True
+    save_timer.start()
+
+def save_data_periodically():
+    with save_lock:
+        # 日期已经爬完（最终保存后清空了当前日期）时不再保存，也不再重新安排
+        if not (current_channel_name and current_date):
+            return
+        output_path = save_current_articles()
+        if output_path:
+            logging.info(f"定期保存: {channel_to_chinese[current_channel_name]} 已保存到 {output_path}")
+        schedule_periodic_save()
 
 def generate_date_range():
     start_date = datetime(2025, 1, 1)
@@ -281,30 +409,46 @@ def generate_date_range():
         current_date += timedelta(days=1)
     return date_list[::-1]
 
+def import_date_log():
+    """
+    把旧的 241_date.txt 一次性导入台账，导入后改名不再读取。
+    旧记录无法区分完整爬完和中途定期保存，已完结的日期一律按 done 导入（与原来的跳过行为一致），
+    未完结的日期不导入，下次运行重新爬取
+    """
+    if not os.path.exists(DATE_LOG_FILE):
+        return
+    chinese_to_channel = {v: k for k, v in channel_to_chinese.items()}
+    rows = set()
+    with open(DATE_LOG_FILE, 'r', encoding='utf-8') as f:
+        for line in f:
+            # 241_政治_20250101_120000.json
+            parts = line.strip().split('_')
+            if len(parts) >= 3 and parts[1] in chinese_to_channel and is_final_date(parts[2]):
+                channel_name = chinese_to_channel[parts[1]]
+                rows.update((channel_name, path, parts[2], 'done', 0, 0) for path in channel_paths(channel_name))
+    id_index.put_progress_many(sorted(rows))
+    os.replace(DATE_LOG_FILE, DATE_LOG_FILE + '.imported')
+    logging.info(f"已将 {DATE_LOG_FILE} 导入完成台账（{len(rows)} 条），原文件改名为 {DATE_LOG_FILE}.imported")
+
 def run_crawler():
     os.makedirs(DATA_DIR, exist_ok=True)
+    import_date_log()
     date_range = generate_date_range()
     logging.info(f"开始爬取 {len(date_range)} 天 (2025-01-01 到今天)")
 
     for channel_name in ["politics", "science", "economic", "sengo"]:
         chinese_name = channel_to_chinese[channel_name]
-        date_txt_path = "241_date.txt"
-        if os.path.exists(date_txt_path):
-            with open(date_txt_path, 'r', encoding='utf-8') as f:
-                date_txt_lines = [line.strip() for line in f if line.strip()]
-        else:
-            date_txt_lines = []
+        # 台账按主键读出该频道已完成的 (路径, 日期)，每个日期的判断为集合查找
+        done = id_index.completed(channel_name)
+        paths = channel_paths(channel_name)
+        pending_dates = [d for d in date_range if not all((path, d) in done for path in paths)]
+        logging.info(f"{chinese_name}: 待爬取 {len(pending_dates)} 天，台账中已完成 {len(date_range) - len(pending_dates)} 天")
 
-        for date_str in date_range:
+        for date_str in pending_dates:
             if crawler_state["force_restart"]:
                 crawler_state["force_restart"] = False
                 logging.info("检测到重启请求，继续爬取...")
 
-            file_prefix = f"241_{chinese_name}_{date_str}"
-            if any(line.startswith(file_prefix) for line in date_txt_lines):
-                logging.info(f"已记录: {file_prefix}，跳过")
-                continue
-
             try:
                 crawler_state["last_channel"] = channel_name
                 crawler_state["last_date"] = date_str
@@ -5,12 +5,13 @@ Straits Times 爬虫 - 本地新闻 / 国际新闻 / 经济
 每日早晨6点运行，异常自动重启
 """
 
-import requests
-from bs4 import BeautifulSoup
+import itertools
 import json
 import os
+import re
 import time
 import shutil
+import threading
 import traceback
 from datetime import datetime, timedelta
 from selenium import webdriver
@@ -20,17 +21,53 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
-
-driver = None
+from crawler_common import (AdaptiveConcurrency, AsyncFetcher, BrowserPool, HostRateLimiter, LinkHarvester,
+                            FingerprintSet, PageWaiter, SeenStore, XhrTemplateStore, apply_resource_profile,
+                            capture_template, captured_xhr, create_session, enable_performance_log, format_page_stats,
+                            links_in_text, make_soup, page_load_stats, replay_pages, resource_block_patterns,
+                            run_channels, shared_index)
+
+# 频道页资源拦截（CDP）：图片、字体、媒体与第三方统计/广告脚本不加载；
+# 设为 False 时只统计不拦截，可对比前后的加载耗时与传输量
+BLOCK_RESOURCES = True
+BLOCK_DENY = ('*brightcove*', '*permutive*', '*cxense.com*', '*tinypass.com*', '*sph-ads*')
+BLOCK_ALLOW = ()
+blocked_patterns = resource_block_patterns(BLOCK_DENY, BLOCK_ALLOW) if BLOCK_RESOURCES else []
+
+# 同时爬取的频道数，也是浏览器池中 Chrome 实例数的上限；设为1时按顺序逐个频道爬取。
+# 文章页请求由所有频道共用同一个抓取引擎，令牌桶限速和按主机的在途上限不随频道数增加
+PARALLEL_CHANNELS = 3
+
+# “加载更多”接口重放：Selenium 点击 Load more 时记录一次该频道的数据请求（Chrome 性能日志），之后的运行按模板
+# 每批并发请求多页，不再启动浏览器；模板失效时自动删除并回退到 Selenium，由 Selenium 重新记录
+USE_XHR_REPLAY = True
+XHR_TEMPLATE_FILE = "254_xhr.json"
+XHR_PAGE_BATCH = 4
+XHR_MAX_PAGES = 30
+xhr_store = XhrTemplateStore(XHR_TEMPLATE_FILE)
+
+# 文章页限速：每秒请求数与突发容量（令牌桶），替代每篇文章后的固定等待
+RATE_LIMIT = 1.0
+RATE_BURST = 2
+
+# 文章页抓取引擎：同一主机最多4个在途请求，连接池复用；429/5xx 由引擎退避重试，每次重试都经过令牌桶
+article_session = create_session(pool_maxsize=4, status_forcelist=())
+fetcher = AsyncFetcher(article_session, timeout=15,
+                       rate_limiter=HostRateLimiter(RATE_LIMIT, RATE_BURST),
+                       concurrency=AdaptiveConcurrency(initial=2, maximum=4))
 
 # ========== Chrome 内核 ==========
-def kernel_chrome():
-    global driver
-    if os.path.exists("254_chromedriver.exe"):
-        print("✅ ChromeDriver已存在")
-    else:
-        driver_path = ChromeDriverManager().install()
-        shutil.move(driver_path, "254_chromedriver.exe")
+# 多个频道线程同时启动浏览器时，只由第一个下载并移动 ChromeDriver
+chromedriver_lock = threading.Lock()
+
+def kernel_chrome(profile_dir):
+    """浏览器池的工厂函数：每个会话使用独立的用户目录"""
+    with chromedriver_lock:
+        if os.path.exists("254_chromedriver.exe"):
+            print("✅ ChromeDriver已存在")
+        else:
+            driver_path = ChromeDriverManager().install()
+            shutil.move(driver_path, "254_chromedriver.exe")
     target_path = os.path.join(os.getcwd(), "254_chromedriver.exe")
     print(f"✅ ChromeDriver已复制到: {target_path}")
 
@@ -40,12 +77,18 @@ def kernel_chrome():
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+    enable_performance_log(chrome_options)
 
     service = ChromeService(executable_path=target_path)
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    driver.get("https://www.straitstimes.com/singapore")
+    new_driver = webdriver.Chrome(service=service, options=chrome_options)
+    apply_resource_profile(new_driver, BLOCK_RESOURCES, BLOCK_DENY, BLOCK_ALLOW)
+    return new_driver
+
+# 浏览器会话在每日循环之间保持，打开20个频道页或内存超过1500MB后重建
+browser_pool = BrowserPool(kernel_chrome, size=PARALLEL_CHANNELS, max_pages=20, max_memory_mb=1500)
 
-def dismiss_overlays():
+def dismiss_overlays(driver):
     """处理页面可能出现的弹窗"""
     try:
         close_btn = WebDriverWait(driver, 3).until(
@@ -77,6 +120,7 @@ def safe_publish_time(raw_time):
 
 # ========== JSON 存储 ==========
 def save_articles_grouped_by_date(articles, channel_name):
+    articles = near_dups.filter_articles('254', articles)
     if not articles:
         return
     today = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -90,29 +134,31 @@ def save_articles_grouped_by_date(articles, channel_name):
 
     with open(filepath, "w", encoding="utf-8") as f:
         json.dump(articles, f, ensure_ascii=False, indent=2)
+    near_dups.add_articles('254', articles)
 
     print(f"💾 已保存 {len(articles)} 篇文章到 {filepath}")
 
 # ✅ 改名为 254_titles.txt
-titles_file = "254_titles.txt"
+titles_file = "254_titles.txt"  # 旧的标题文件，指纹集合为空时导入
+TITLE_FINGERPRINT_FILE = "254_title_fingerprints.bin"  # 标题的 64 位指纹（有序数组 + 增量日志）
 
-def load_titles():
-    if os.path.exists(titles_file):
-        with open(titles_file, "r", encoding="utf-8") as f:
-            return set(line.strip() for line in f)
-    return set()
-
-def save_title(title):
-    with open(titles_file, "a", encoding="utf-8") as f:
-        f.write(title.strip() + "\n")
+# 去重记录：标题只需判断是否出现过，记在紧凑的指纹集合中（每条 8 字节，mmap 打开）；
+# 文章链接的处理结果记在各站点共用的 SQLite 库中，抓取前过滤
+SEEN_SITE = 'straitstimes'
+title_fingerprints = FingerprintSet(TITLE_FINGERPRINT_FILE)
+seen_store = SeenStore(fingerprints={SEEN_SITE: title_fingerprints})
+# 正文近似重复检测（MinHash/LSH）：各站点共用一个索引，保存前与所有站点已保存的文章比较
+near_dups = shared_index()
 
 # ========== 文章解析 ==========
-def crawl_st_article(url):
-    headers = {'User-Agent': 'Mozilla/5.0'}
+def crawl_st_article(url, result=None):
+    """解析文章页；result 为抓取引擎返回的结果，未传入时同步抓取"""
+    if result is None:
+        result = fetcher.fetch(url)
     try:
-        resp = requests.get(url, headers=headers, timeout=15)
+        resp = result.get_response()
         resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, 'html.parser')
+        soup = make_soup(resp.text)
 
         # 标题
         title_elem = soup.find("h1")
@@ -177,49 +223,50 @@ def find_bottom_load_more(driver, wait_sec=5):
     except:
         return None
 
-def crawl_channel(channel_url, channel_name):
+def crawl_channel(channel_url, channel_name, driver):
     seen_links = set()
-    titles_set = load_titles()
     all_articles = []
     fail_clicks = 0
     last_article_count = 0
 
     driver.get(channel_url)
-    time.sleep(3)
+    dismiss_overlays(driver)
+    # 等待文章卡片渲染出来（最多3秒），网络空闲时提前返回
+    card_selector = 'div[data-testid="headline-lg-card-test-id"]'
+    waiter = PageWaiter(driver, card_selector)
+    waiter.wait(0, timeout=3)
+    print(f"📉 {format_page_stats(page_load_stats(driver), len(blocked_patterns))}")
     print(f"📺 开始爬取频道: {channel_name} {channel_url}")
+    # ✅ headline-lg-card-test-id 区块外层链接，在浏览器内收集，每轮只传回新增的部分
+    harvester = LinkHarvester(driver, card_selector, closest='a[data-testid="custom-link"]')
+    # 该频道还没有接口模板时，在下面点击 Load more 之后从性能日志中记录
+    xhr_captured = xhr_store.get(channel_url) is not None
 
     while True:
-        html = driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
-
-        # ✅ headline-lg-card-test-id 区块里的链接
-        article_blocks = soup.find_all("div", {"data-testid": "headline-lg-card-test-id"})
         urls = []
-        for block in article_blocks:
-            parent_a = block.find_parent("a", {"data-testid": "custom-link"})
-            if parent_a and parent_a.has_attr("href"):
-                href = parent_a['href']
-                if href.startswith("http"):
-                    urls.append(href)
-                else:
-                    urls.append("https://www.straitstimes.com" + href)
+        for href in harvester.collect():
+            if href.startswith("http"):
+                urls.append(href)
+            else:
+                urls.append("https://www.straitstimes.com" + href)
 
         new_urls = [u for u in urls if u not in seen_links]
-        print(f"发现 {len(new_urls)} 个新文章链接")
+        seen_links.update(new_urls)
+        # 之前的运行中已处理过的链接直接跳过，不再请求
+        fetch_urls = seen_store.unseen_urls(SEEN_SITE, new_urls)
+        print(f"发现 {len(new_urls)} 个新文章链接，其中 {len(new_urls) - len(fetch_urls)} 个已处理过")
 
         articles_this_round = []
-        for url in new_urls:
-            seen_links.add(url)
-            article_data, title_text, publish_time = crawl_st_article(url)
+        for result in fetcher.iter_fetch(fetch_urls):
+            url = result.url
+            article_data, title_text, publish_time = crawl_st_article(url, result)
             if not article_data or not title_text:
+                seen_store.mark_unparsed(SEEN_SITE, result)
                 continue
-            if title_text in titles_set:
+            if not seen_store.claim_title(SEEN_SITE, title_text, url):
                 continue
             articles_this_round.append(article_data)
-            save_title(title_text)
-            titles_set.add(title_text)
             print(f"  ✅ 新文章: {title_text}")
-            time.sleep(1)
 
         if articles_this_round:
             save_articles_grouped_by_date(articles_this_round, channel_name)
@@ -232,10 +279,16 @@ def crawl_channel(channel_url, channel_name):
             break
         try:
             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", load_btn)
-            time.sleep(0.5)
+            before = waiter.snapshot()
+            # 丢弃之前的性能日志，使记录到的只有这次点击触发的请求
+            captured_xhr(driver)
             driver.execute_script("arguments[0].click();", load_btn)
             print("点击 Load more")
-            time.sleep(3)
+            # 新卡片出现或网络空闲即继续，最多等10秒
+            reason, waited = waiter.wait(before, timeout=10)
+            print(f"⏱️ 等待 {waited:.1f} 秒（{PageWaiter.LABELS[reason]}）")
+            if not xhr_captured:
+                xhr_captured = capture_template(driver, xhr_store, channel_url, "straitstimes.com") is not None
 
             new_article_count = len(seen_links)
             if new_article_count <= last_article_count:
@@ -256,19 +309,103 @@ def crawl_channel(channel_url, channel_name):
                 break
 
     print(f"🎉 {channel_name} 完成，共获取 {len(all_articles)} 篇")
+    print(f"⏱️ {waiter.describe()}")
+    print(f"📶 {fetcher.concurrency.describe()}")
+
+# ========== 接口重放 ==========
+def channel_article_pattern(channel_url):
+    """频道栏目下的文章链接：最后一段是至少四个单词的 slug，如 /singapore/politics/xxx-yyy-zzz-www"""
+    section = re.escape(channel_url.rstrip("/").rsplit("/", 1)[-1])
+    return re.compile(r'(?:https://www\.straitstimes\.com)?(/' + section + r'/(?:[a-z0-9-]+/)*[a-z0-9]+(?:-[a-z0-9]+){3,})')
+
+def crawl_channel_xhr(channel_url, channel_name):
+    """
+    按记录的 Load more 接口模板直接翻页，不启动浏览器。
+    没有模板、或模板第一批就拿不到链接（接口已变化）时返回 False，由调用方回退到 Selenium
+    """
+    template = xhr_store.get(channel_url)
+    if template is None:
+        return False
+    print(f"📡 通过接口重放加载频道: {channel_name} {channel_url}（{template.describe()}）")
+    pattern = channel_article_pattern(channel_url)
+    extract = lambda text: ["https://www.straitstimes.com" + path for path in links_in_text(text, pattern)]
+    seen_links = set()
+    all_articles = []
+    no_new_batches = 0
+
+    # 频道首页仍用普通请求读取文章卡片，其后的页面按模板每批并发请求 XHR_PAGE_BATCH 页
+    first = fetcher.fetch(channel_url)
+    first_links = []
+    if first.status_code == 200:
+        soup = make_soup(first.response.text)
+        for a in soup.select('a[data-testid="custom-link"]:has(div[data-testid="headline-lg-card-test-id"])'):
+            href = a.get("href", "")
+            first_links.append(href if href.startswith("http") else "https://www.straitstimes.com" + href)
+    pages = replay_pages(fetcher, template, extract, XHR_PAGE_BATCH, XHR_MAX_PAGES)
+    try:
+        for links in itertools.chain([first_links], pages):
+            new_urls = [u for u in links if u not in seen_links]
+            seen_links.update(new_urls)
+            # 之前的运行中已处理过的链接直接跳过，不再请求
+            fetch_urls = seen_store.unseen_urls(SEEN_SITE, new_urls)
+            articles_this_round = []
+            for result in fetcher.iter_fetch(fetch_urls):
+                article_data, title_text, publish_time = crawl_st_article(result.url, result)
+                if not article_data or not title_text:
+                    seen_store.mark_unparsed(SEEN_SITE, result)
+                    continue
+                if not seen_store.claim_title(SEEN_SITE, title_text, result.url):
+                    continue
+                articles_this_round.append(article_data)
+                print(f"  ✅ 新文章: {title_text}")
+            if articles_this_round:
+                save_articles_grouped_by_date(articles_this_round, channel_name)
+                all_articles.extend(articles_this_round)
+                no_new_batches = 0
+            else:
+                no_new_batches += 1
+                if no_new_batches >= 2:
+                    print("🛑 连续两批没有新文章，结束该频道")
+                    break
+    except ValueError as e:
+        print(f"⚠️ {e}，删除模板并回退到Selenium")
+        xhr_store.drop(channel_url)
+        return False
+    finally:
+        pages.close()
+    print(f"🎉 {channel_name} 完成（接口重放），共 {len(seen_links)} 个链接，新文章 {len(all_articles)} 篇")
+    return True
 
 # ========== 主函数 ==========
+def crawl_pooled_channel(channel):
+    """从浏览器池取得一个浏览器爬取频道，可在多个线程中同时调用"""
+    url, name = channel
+    if USE_XHR_REPLAY and crawl_channel_xhr(url, name):
+        return
+    driver = browser_pool.acquire()
+    broken = False
+    try:
+        crawl_channel(url, name, driver)
+    except Exception:
+        broken = True
+        raise
+    finally:
+        browser_pool.release(driver, broken=broken)
+
 def main():
-    kernel_chrome()
-    dismiss_overlays()
     channels = [
         ("https://www.straitstimes.com/singapore", "本地新闻"),
         ("https://www.straitstimes.com/world", "国际新闻"),
         ("https://www.straitstimes.com/business", "经济"),
     ]
-    for url, name in channels:
-        crawl_channel(url, name)
-    driver.quit()
+    if not title_fingerprints:
+        imported = title_fingerprints.import_lines(titles_file)
+        if imported:
+            print(f"📥 已将 {imported} 条历史标题从 {titles_file} 导入指纹集合")
+    run_channels(channels, crawl_pooled_channel, workers=PARALLEL_CHANNELS)
+    print(f"🧭 {browser_pool.describe()}")
+    print(f"🗃️ {seen_store.describe(SEEN_SITE)}")
+    print(f"🧬 {near_dups.describe('254')}")
 
 # ========== 自动调度 ==========
 if __name__ == "__main__":
@@ -279,6 +416,7 @@ if __name__ == "__main__":
             wait_until_next_6am()
         except KeyboardInterrupt:
             print("检测到手动关闭，程序退出。")
+            browser_pool.close_all()
             break
         except Exception as e:
             print(f"爬虫异常中断，自动重启。异常信息: {e}")
@@ -1,18 +1,15 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import requests
-from bs4 import BeautifulSoup
 import datetime
 import time
-import random
 import re
 import json
 import sys
 import ssl
 import os
-import hashlib
 from requests.exceptions import SSLError, RequestException
+from crawler_common import AdaptiveConcurrency, AsyncFetcher, FingerprintSet, HostRateLimiter, HttpCache, IdIndex, create_session, find_id_ceiling, fingerprint, hex_fingerprint, make_soup, shared_index, site_strainer
 
 # 配置参数
 START_DATE = datetime.date(2025, 1, 1)  # 起始日期
@@ -20,47 +17,59 @@ END_DATE = datetime.date.today()  # 结束日期
 BASE_URL = "https://www.cna.com.tw/news/aipl/{date}{num:04d}.aspx"
 VALID_CATEGORIES = {'政治', '國際', '兩岸', '產經', '證券', '科技'}
 HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    'Accept-Language': 'zh-TW,zh;q=0.9,en;q=0.8'
 }
 
 DATA_DIR = "data"
 if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR)
 
-TITLE_HASH_FILE = "crawled_title_hashes.txt"
+TITLE_HASH_FILE = "crawled_title_hashes.txt"  # 旧的去重文件（标题 MD5），指纹集合为空时导入
+TITLE_FINGERPRINT_FILE = "62_title_fingerprints.bin"  # 标题的 64 位指纹（有序数组 + 增量日志）
+HTTP_CACHE_DIR = "62_http_cache"  # 历史文章页的磁盘缓存（条件请求）
+HTTP_CACHE_MAX_BYTES = 512 * 1024 * 1024
+MAX_ARTICLE_NUM = 500
+# 探测每天的最大编号（指数+二分），只枚举上限以内的编号；False 时枚举全部 500 个
+DISCOVER_CEILING = True
+CEILING_GAP_TOLERANCE = 10  # 允许的最大连续空缺编号数
+ID_INDEX_PATH = "62_id_index.sqlite3"  # 每天的最大编号
 
 grouped_articles = {}
+# 日期 -> 需要枚举的最大编号（已记录或本次探测得到），用于计算总URL数和进度
+daily_ceilings = {}
 processed_urls = 0
 success_count = 0
 error_count = 0
 last_save_time = time.time()
 SAVE_INTERVAL = 20 * 60
-crawled_title_hashes = set()
 
-
-def load_crawled_hashes():
-    if not os.path.exists(TITLE_HASH_FILE):
-        return set()
-    try:
-        with open(TITLE_HASH_FILE, 'r', encoding='utf-8') as f:
-            return set(line.strip() for line in f if line.strip())
-    except Exception as e:
-        print(f"加载去重文件失败: {str(e)}")
-        return set()
-
-
-def save_crawled_hash(title_hash):
-    try:
-        with open(TITLE_HASH_FILE, 'a', encoding='utf-8') as f:
-            f.write(title_hash + '\n')
-        return True
-    except Exception as e:
-        print(f"保存去重哈希失败: {str(e)}")
-        return False
-
-
-def generate_title_hash(title):
-    return hashlib.md5(title.encode('utf-8')).hexdigest()
+# 限速：每秒请求数与突发容量（令牌桶），替代每次请求前的随机等待
+RATE_LIMIT = 1.0
+RATE_BURST = 3
+
+# 每个主机的在途请求上限：文章页按 AIMD 在 1~6 之间调整；上限探测一个窗口内的编号并发探测
+ARTICLE_MAX_CONCURRENCY = 6
+PROBE_MAX_CONCURRENCY = CEILING_GAP_TOLERANCE
+# 两个引擎共用一个会话，连接池取二者在途上限的较大值
+POOL_MAXSIZE = max(ARTICLE_MAX_CONCURRENCY, PROBE_MAX_CONCURRENCY)
+
+# 文章页抓取引擎：同一主机的在途请求数在 1~6 之间按 AIMD 自适应，连接池复用；
+# 429/5xx 由引擎退避重试，每次重试都经过令牌桶并反馈给并发控制器
+session = create_session(headers=HEADERS, pool_maxsize=POOL_MAXSIZE, status_forcelist=())
+fetcher = AsyncFetcher(session, timeout=15, concurrency=AdaptiveConcurrency(initial=3, maximum=ARTICLE_MAX_CONCURRENCY),
+                       rate_limiter=HostRateLimiter(RATE_LIMIT, RATE_BURST),
+                       cache=HttpCache(HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES))
+# 上限探测引擎：只发 HEAD 请求，一个窗口内的编号并发探测
+probe_fetcher = AsyncFetcher(session, timeout=15,
+                             concurrency=AdaptiveConcurrency(initial=5, maximum=PROBE_MAX_CONCURRENCY),
+                             rate_limiter=HostRateLimiter(5.0, CEILING_GAP_TOLERANCE))
+id_index = IdIndex(ID_INDEX_PATH)
+# 标题去重只需判断是否出现过，用紧凑的指纹集合：每条 8 字节，mmap 打开，不需要读入内存
+title_fingerprints = FingerprintSet(TITLE_FINGERPRINT_FILE)
+# 正文近似重复检测（MinHash/LSH）：各站点共用一个索引，标题不同但正文是同一篇通稿的也跳过
+near_dups = shared_index()
+# 文章页只构建面包屑、标题、正文、时间和作者所在的子树
+ARTICLE_STRAINER = site_strainer('cna')
 
 
 def generate_dates():
@@ -70,6 +79,54 @@ def generate_dates():
         current -= datetime.timedelta(days=1)
 
 
+def probe_article_nums(date_str, nums):
+    """HEAD 探测一批编号是否存在；非 404 的响应（含请求异常）都按存在处理，交给完整抓取判断"""
+    urls = {BASE_URL.format(date=date_str, num=num): num for num in nums}
+    return {urls[result.url]: result.status_code != 404
+            for result in probe_fetcher.iter_fetch(list(urls), method='HEAD')}
+
+
+def get_daily_ceiling(date_str):
+    """返回当天需要枚举的最大编号；早于昨天的日期探测结果会持久化复用"""
+    if not DISCOVER_CEILING:
+        return MAX_ARTICLE_NUM
+    ceiling = id_index.get_ceiling(date_str)
+    if ceiling is not None:
+        print(f"已记录的编号上限: {ceiling}")
+        daily_ceilings[date_str] = ceiling
+        return ceiling
+    ceiling = find_id_ceiling(lambda nums: probe_article_nums(date_str, nums), MAX_ARTICLE_NUM,
+                              CEILING_GAP_TOLERANCE)
+    yesterday = (datetime.date.today() - datetime.timedelta(days=1)).strftime("%Y%m%d")
+    id_index.put_ceiling(date_str, ceiling, complete=date_str < yesterday)
+    print(f"探测到编号上限: {ceiling}")
+    daily_ceilings[date_str] = ceiling
+    return ceiling
+
+
+def load_known_ceilings(dates):
+    """从 id_index 读入各日期已记录的编号上限（含尚未完结的日期），用于估算总URL数"""
+    if not DISCOVER_CEILING:
+        return
+    for date_str in dates:
+        ceiling = id_index.get_ceiling(date_str, complete_only=False)
+        if ceiling is not None:
+            daily_ceilings.setdefault(date_str, ceiling)
+
+
+def estimate_total_urls(dates):
+    """
+    按各日期的编号上限计算总URL数；上限未知的日期按已知日期的平均值估算（都未知时按 MAX_ARTICLE_NUM），
+    随着每天的上限探测出来逐步变准。返回 (总数, 是否为估算)
+    """
+    if not DISCOVER_CEILING:
+        return len(dates) * MAX_ARTICLE_NUM, False
+    known = [daily_ceilings[d] for d in dates if d in daily_ceilings]
+    unknown = len(dates) - len(known)
+    average = round(sum(known) / len(known)) if known else MAX_ARTICLE_NUM
+    return sum(known) + unknown * average, unknown > 0
+
+
 def extract_category(soup):
     breadcrumb_div = soup.find('div', class_='breadcrumb')
     if not breadcrumb_div:
@@ -132,6 +189,7 @@ def save_grouped_articles(target_date=None):
         try:
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(articles_list, f, ensure_ascii=False, indent=2)
+            near_dups.add_articles('62', articles_list)
             print(f"已保存分组文件: {filename} ({len(articles_list)} 篇文章)")
             saved_files += 1
         except Exception as e:
@@ -141,13 +199,15 @@ def save_grouped_articles(target_date=None):
 
 def print_progress():
     global processed_urls, success_count, error_count
-    total_urls = len(list(generate_dates())) * 500
+    total_urls, estimated = estimate_total_urls(list(generate_dates()))
     progress_percent = (processed_urls / total_urls) * 100 if total_urls > 0 else 0
     grouped_count = sum(len(articles) for articles in grouped_articles.values())
     print("\n" + "=" * 60)
-    print(f"爬取进度: {processed_urls}/{total_urls} ({progress_percent:.1f}%)")
+    print(f"爬取进度: {processed_urls}/{'约' if estimated else ''}{total_urls} ({progress_percent:.1f}%)")
     print(f"成功文章: {success_count} | 错误/跳过: {error_count}")
     print(f"分组文章: {grouped_count} 篇 ({len(grouped_articles)} 个分组)")
+    print(f"缓存命中(304): {fetcher.cache.hits} | 缓存大小: {fetcher.cache.total_bytes / 1024 / 1024:.1f} MB")
+    print(f"并发: {fetcher.concurrency.describe()}")
     print(f"当前时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 60 + "\n")
 
@@ -168,28 +228,30 @@ def check_and_save_grouped():
 
 def crawl_articles():
     global grouped_articles, processed_urls, success_count, error_count, last_save_time
-    global crawled_title_hashes
     try:
         dates = list(generate_dates())
         total_days = len(dates)
-        total_urls = total_days * 500
+        load_known_ceilings(dates)
+        total_urls, estimated = estimate_total_urls(dates)
         print(f"爬取日期范围: {START_DATE} 到 {END_DATE}")
-        print(f"总天数: {total_days}, 总URL数: {total_urls}")
-        print(f"已加载去重记录: {len(crawled_title_hashes)} 条")
+        print(f"总天数: {total_days}, 总URL数: {'约' if estimated else ''}{total_urls}"
+              f"（已知编号上限 {len(daily_ceilings)} 天）")
+        print(f"已有去重记录: {len(title_fingerprints)} 条")
         for day_idx, date_str in enumerate(dates):
             print(f"\n{'=' * 60}")
             print(f"处理日期: {date_str} ({day_idx + 1}/{total_days})")
             date_count = 0
-            for article_num in range(1, 501):
+            ceiling = get_daily_ceiling(date_str)
+            urls = [BASE_URL.format(date=date_str, num=article_num) for article_num in range(1, ceiling + 1)]
+            for result in fetcher.iter_fetch(urls):
                 processed_urls += 1
                 if processed_urls % 20 == 0:
                     print_progress()
                 check_and_save_grouped()
-                url = BASE_URL.format(date=date_str, num=article_num)
+                url = result.url
                 print(f"正在爬取: {url}")
                 try:
-                    time.sleep(random.uniform(0.5, 1.5))
-                    response = requests.get(url, headers=HEADERS, timeout=15)
+                    response = result.get_response()
                     if response.status_code == 404:
                         print(f"  × 页面不存在 (404) - 跳过")
                         error_count += 1
@@ -198,7 +260,7 @@ def crawl_articles():
                         print(f"  × 非HTML内容 - 跳过")
                         error_count += 1
                         continue
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = make_soup(response.text, parse_only=ARTICLE_STRAINER)
                     category = extract_category(soup)
                     if not category:
                         print(f"  × 未找到有效分类 - 跳过")
@@ -210,8 +272,8 @@ def crawl_articles():
                         error_count += 1
                         continue
                     title_text_content = title_tag.get_text(strip=True)
-                    title_hash = generate_title_hash(title_text_content)
-                    if title_hash in crawled_title_hashes:
+                    title_fp = fingerprint(title_text_content)
+                    if title_fp in title_fingerprints:
                         print(f"  × 重复文章: {title_text_content} - 跳过")
                         error_count += 1
                         continue
@@ -238,10 +300,16 @@ def crawl_articles():
                         },
                         "crawling_time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                     }
+                    near_dup = near_dups.check('62', url, title_text_content, content_text)
+                    if near_dup:
+                        print(f"  × 近似重复（相似度 {near_dup['similarity']:.2f}）: "
+                              f"[{near_dup['site']}] {near_dup['title']} - 跳过")
+                        title_fingerprints.add(title_fp)
+                        error_count += 1
+                        continue
                     group_key = (category, date_str)
                     grouped_articles.setdefault(group_key, []).append(article_data)
-                    crawled_title_hashes.add(title_hash)
-                    save_crawled_hash(title_hash)
+                    title_fingerprints.add(title_fp)
                     date_count += 1
                     success_count += 1
                     print(f"  ✓ 找到文章: {category} - {title_text_content}")
@@ -262,16 +330,29 @@ def crawl_articles():
         sys.exit(0)
 
 
+def import_legacy_hashes():
+    """把旧的 MD5 去重文件换算成指纹导入；MD5 的前 16 位即指纹，不需要原标题"""
+    try:
+        imported = title_fingerprints.import_lines(TITLE_HASH_FILE, key=hex_fingerprint)
+        if imported:
+            print(f"已将 {imported} 条去重记录导入指纹集合 {TITLE_FINGERPRINT_FILE}")
+    except Exception as e:
+        print(f"导入去重记录失败: {str(e)}")
+
+
 # 新增：守护调度逻辑
 def run_once():
-    global crawled_title_hashes, grouped_articles, processed_urls, success_count, error_count
+    global grouped_articles, processed_urls, success_count, error_count
     grouped_articles = {}
     processed_urls = 0
     success_count = 0
     error_count = 0
-    crawled_title_hashes = load_crawled_hashes()
+    if not title_fingerprints:
+        import_legacy_hashes()
     print(f"\n===== 启动爬虫 {datetime.datetime.now()} =====")
     crawl_articles()
+    print(title_fingerprints.describe())
+    print(near_dups.describe('62'))
     print(f"===== 本轮完成 {datetime.datetime.now()} =====")
 
 
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+各站点爬虫共用的基础组件
+"""
+from .browser import BrowserPool, PageWaiter, apply_resource_profile, format_page_stats, page_load_stats, resource_block_patterns
+from .channels import run_channels
+from .concurrency import AdaptiveConcurrency
+from .drivercache import DriverCache, chrome_major_version
+from .fetcher import AsyncFetcher, FetchResult
+from .fingerprint import FingerprintSet, fingerprint, hex_fingerprint
+from .harvest import LinkHarvester
+from .httpcache import HttpCache
+from .idindex import IdIndex, find_id_ceiling
+from .neardup import NearDupIndex, shared_index
+from .parsing import TagStrainer, make_soup, site_strainer
+from .ratelimit import HostRateLimiter, TokenBucket
+from .seenstore import SeenStore, normalize_url
+from .session import DEFAULT_HEADERS, create_session
+from .stopmodel import AdaptiveStop
+from .xhrreplay import (XhrTemplate, XhrTemplateStore, capture_template, captured_xhr, enable_performance_log,
+                        links_in_text, replay_pages)
+
+__all__ = [
+    'BrowserPool', 'PageWaiter', 'apply_resource_profile', 'format_page_stats', 'page_load_stats', 'resource_block_patterns',
+    'run_channels',
+    'AdaptiveConcurrency',
+    'DriverCache', 'chrome_major_version',
+    'AsyncFetcher', 'FetchResult',
+    'FingerprintSet', 'fingerprint', 'hex_fingerprint',
+    'LinkHarvester',
+    'HttpCache',
+    'IdIndex', 'find_id_ceiling',
+    'NearDupIndex', 'shared_index',
+    'TagStrainer', 'make_soup', 'site_strainer',
+    'HostRateLimiter', 'TokenBucket',
+    'SeenStore', 'normalize_url',
+    'DEFAULT_HEADERS', 'create_session',
+    'AdaptiveStop',
+    'XhrTemplate', 'XhrTemplateStore', 'capture_template', 'captured_xhr', 'enable_performance_log',
+    'links_in_text', 'replay_pages',
+]
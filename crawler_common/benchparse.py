@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+解析基准 - 对保存下来的文章页比较完整解析与按站点规则部分解析的耗时、峰值内存和节点数
+用法: python -m crawler_common.benchparse <站点> <已保存的文章页.html> [...]
+      python -m crawler_common.benchparse --compare <站点> <已保存的文章页.html> [...]
+--compare 用 html.parser 和 lxml 分别解析，逐个核对站点规则中各元素的文本，全部一致后才应在 SITE_BACKENDS 中启用 lxml
+"""
+import sys
+import time
+import tracemalloc
+
+from .parsing import SITE_SPECS, available_backends, make_soup, resolve_backend, site_strainer
+
+
+def benchmark(markup, parse_only, backend=None, repeat=5):
+    """返回 {'full': {...}, 'partial': {...}}，各项为平均耗时（毫秒）、峰值内存（KB）和节点数"""
+    report = {}
+    # 完整解析与部分解析使用同一后端
+    backend = backend or getattr(parse_only, 'backend', None)
+    for label, strainer in (('full', None), ('partial', parse_only)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            soup = make_soup(markup, backend, parse_only=strainer)
+        elapsed = (time.perf_counter() - start) / repeat
+        tracemalloc.start()
+        soup = make_soup(markup, backend, parse_only=strainer)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        report[label] = {
+            'ms': round(elapsed * 1000, 2),
+            'peak_kb': round(peak / 1024, 1),
+            'nodes': sum(1 for _ in soup.descendants),
+        }
+    return report
+
+
+def extracted_texts(markup, site, backend):
+    """按站点规则解析，返回规则中每个元素的文本列表，用于比较不同后端的提取结果"""
+    soup = make_soup(markup, backend, parse_only=site_strainer(site))
+    texts = []
+    for name, cls in SITE_SPECS[site]:
+        for element in soup.find_all(name, class_=cls) if cls is not None else soup.find_all(name):
+            texts.append((name, element.get_text(' ', strip=True)))
+    return texts
+
+
+def compare(site, paths):
+    """逐页比较 html.parser 与 lxml 的提取结果，返回不一致的页面列表"""
+    if 'lxml' not in available_backends():
+        print("⚠️ 未安装 lxml，无法比较")
+        return list(paths)
+    different = []
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            html = f.read()
+        if extracted_texts(html, site, 'html.parser') == extracted_texts(html, site, 'lxml'):
+            print(f"✅ {path}: 两种后端提取结果一致")
+        else:
+            print(f"❌ {path}: html.parser 与 lxml 提取结果不同")
+            different.append(path)
+    print(f"共 {len(paths)} 页，不一致 {len(different)} 页")
+    return different
+
+
+def main(argv):
+    if argv and argv[0] == '--compare':
+        if len(argv) < 3 or argv[1] not in SITE_SPECS:
+            print(f"用法: python -m crawler_common.benchparse --compare <{'|'.join(SITE_SPECS)}> page.html [...]")
+            return 1
+        return 1 if compare(argv[1], argv[2:]) else 0
+    if len(argv) < 2 or argv[0] not in SITE_SPECS:
+        print(f"用法: python -m crawler_common.benchparse <{'|'.join(SITE_SPECS)}> page.html [...]")
+        return 1
+    strainer = site_strainer(argv[0])
+    for path in argv[1:]:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            html = f.read()
+        result = benchmark(html, strainer)
+        full, partial = result['full'], result['partial']
+        print(f"📄 {path} ({resolve_backend(strainer.backend)})")
+        print(f"  完整解析: {full['ms']} ms, 峰值 {full['peak_kb']} KB, {full['nodes']} 个节点")
+        print(f"  部分解析: {partial['ms']} ms, 峰值 {partial['peak_kb']} KB, {partial['nodes']} 个节点")
+        if full['ms'] and full['peak_kb']:
+            print(f"  节省: CPU {100 - partial['ms'] * 100 / full['ms']:.0f}%，"
+                  f"内存 {100 - partial['peak_kb'] * 100 / full['peak_kb']:.0f}%")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
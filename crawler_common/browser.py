@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+无头 Chrome 辅助 - 通过 DevTools 协议（CDP）拦截列表页不需要的资源（图片、字体、媒体、第三方统计/广告脚本），
+并从 Performance API 读取页面加载耗时与传输字节数，便于对比拦截前后的效果；
+PageWaiter 在点击“加载更多”后按事件等待（元素增加 / 网络空闲 / 超时），代替固定 sleep；
+BrowserPool 长期保持浏览器会话，跨频道、跨每日运行复用，按页数或内存回收
+"""
+import atexit
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter
+
+# psutil 为可选依赖：安装后按 Chrome 进程的实际内存回收会话，否则按页面 JS 堆大小估算
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 默认拦截：按扩展名匹配的静态资源
+BLOCKED_EXTENSIONS = (
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico', '*.bmp',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.m3u8', '*.ts', '*.mp3', '*.ogg',
+)
+
+# 默认拦截：常见第三方统计、广告与社交脚本
+BLOCKED_THIRD_PARTY = (
+    '*googletagmanager.com*', '*google-analytics.com*', '*googlesyndication.com*', '*doubleclick.net*',
+    '*adservice.google.*', '*googleadservices.com*', '*amazon-adsystem.com*', '*adnxs.com*',
+    '*pubmatic.com*', '*criteo.*', '*taboola.com*', '*outbrain.com*', '*scorecardresearch.com*',
+    '*chartbeat.com*', '*chartbeat.net*', '*quantserve.com*', '*hotjar.com*', '*facebook.net*',
+    '*connect.facebook.com*', '*platform.twitter.com*', '*nr-data.net*', '*newrelic.com*',
+)
+
+# 每次导航前执行：放大资源计时缓冲区（默认只保留 250 条），并统计在途的 fetch/XHR 请求数
+_NEW_DOCUMENT_JS = r"""
+performance.setResourceTimingBufferSize(10000);
+(function () {
+    if (window.__crawlerInflight !== undefined) return;
+    window.__crawlerInflight = 0;
+    var done = function () { window.__crawlerInflight = Math.max(0, window.__crawlerInflight - 1); };
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function () {
+            window.__crawlerInflight += 1;
+            return originalFetch.apply(this, arguments).finally(done);
+        };
+    }
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        window.__crawlerInflight += 1;
+        this.addEventListener('loadend', done);
+        return originalSend.apply(this, arguments);
+    };
+})();
+"""
+
+_WAIT_STATE_JS = r"""
+return {count: document.querySelectorAll(arguments[0]).length,
+        inflight: window.__crawlerInflight || 0,
+        resources: performance.getEntriesByType('resource').length};
+"""
+
+_PAGE_STATS_JS = r"""
+var nav = performance.getEntriesByType('navigation')[0];
+var resources = performance.getEntriesByType('resource');
+var bytes = nav ? (nav.transferSize || 0) : 0;
+resources.forEach(function (r) { bytes += r.transferSize || 0; });
+var end = nav ? (nav.loadEventEnd || nav.domContentLoadedEventEnd || performance.now()) : performance.now();
+return {load_ms: Math.round(end - (nav ? nav.startTime : 0)),
+        dom_ms: nav ? Math.round(nav.domContentLoadedEventEnd - nav.startTime) : null,
+        bytes: bytes, resources: resources.length + (nav ? 1 : 0)};
+"""
+
+
+def resource_block_patterns(deny=(), allow=()):
+    """默认拦截列表加上站点的 deny，再去掉站点 allow 中列出的模式"""
+    patterns = []
+    for pattern in (*BLOCKED_EXTENSIONS, *BLOCKED_THIRD_PARTY, *deny):
+        if pattern not in allow and pattern not in patterns:
+            patterns.append(pattern)
+    return patterns
+
+
+def apply_resource_profile(driver, block=True, deny=(), allow=()):
+    """
+    对 driver 开启网络拦截、加载统计和在途请求计数；block=False 时不拦截，用于测量拦截前的基线。
+    返回实际生效的拦截模式列表。每个浏览器实例调用一次即可，对之后的所有导航生效。
+    """
+    patterns = resource_block_patterns(deny, allow) if block else []
+    driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': _NEW_DOCUMENT_JS})
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    return patterns
+
+
+def page_load_stats(driver):
+    """
+    当前页面的加载耗时（毫秒）、DOMContentLoaded 耗时、传输字节数和资源个数。
+    跨域资源没有 Timing-Allow-Origin 头时浏览器报告的 transferSize 为 0，字节数偏小，仅用于前后对比。
+    """
+    try:
+        return driver.execute_script(_PAGE_STATS_JS)
+    except Exception:
+        return None
+
+
+def format_page_stats(stats, blocked):
+    """blocked 为生效的拦截规则数"""
+    if not stats:
+        return "页面加载统计不可用"
+    state = f"拦截规则 {blocked} 条" if blocked else "未拦截"
+    return (f"页面加载 {stats['load_ms']} ms（DOM {stats['dom_ms']} ms），"
+            f"传输 {stats['bytes'] / 1024:.0f} KB，资源 {stats['resources']} 个（{state}）")
+
+
+class PageWaiter:
+    """
+    selector 为列表页文章元素的 CSS 选择器。wait(baseline) 在以下任一条件满足时立即返回：
+      grew    - 匹配 selector 的元素数超过 baseline（点击前用 snapshot() 取得）；
+      idle    - 没有在途的 fetch/XHR，且 idle 秒内没有新的资源请求；
+      timeout - 超过 timeout 秒。
+    每次等待的实际耗时和原因都会累计，describe() 输出汇总。
+    在途请求计数依赖 apply_resource_profile() 注入的脚本，未注入时只按资源请求数判断空闲。
+    """
+
+    LABELS = {'grew': '内容增加', 'idle': '网络空闲', 'timeout': '超时'}
+
+    def __init__(self, driver, selector, poll=0.1):
+        self.driver = driver
+        self.selector = selector
+        self.poll = poll
+        self.total = 0.0
+        self.reasons = Counter()
+
+    def _state(self):
+        try:
+            return self.driver.execute_script(_WAIT_STATE_JS, self.selector)
+        except Exception:
+            # 页面正在跳转等情况，按“仍有活动”处理
+            return None
+
+    def snapshot(self):
+        state = self._state()
+        return state['count'] if state else 0
+
+    def wait(self, baseline=None, timeout=10, idle=1.0):
+        """返回 (原因, 实际等待秒数)；baseline 为 None 时只等待网络空闲"""
+        start = time.monotonic()
+        last_activity = start
+        last_resources = None
+        reason = 'timeout'
+        while True:
+            state = self._state()
+            now = time.monotonic()
+            if state and baseline is not None and state['count'] > baseline:
+                reason = 'grew'
+                break
+            if state is None or state['inflight'] or state['resources'] != last_resources:
+                last_activity = now
+                last_resources = state['resources'] if state else None
+            elif now - last_activity >= idle:
+                reason = 'idle'
+                break
+            if now - start >= timeout:
+                break
+            time.sleep(self.poll)
+        elapsed = time.monotonic() - start
+        self.total += elapsed
+        self.reasons[reason] += 1
+        return reason, elapsed
+
+    def describe(self):
+        detail = '，'.join(f"{self.LABELS[r]} {n} 次" for r, n in self.reasons.items())
+        return f"事件等待共 {sum(self.reasons.values())} 次，累计 {self.total:.1f} 秒（{detail or '无'}）"
+
+
+class _Session:
+    __slots__ = ('driver', 'profile_dir', 'pages', 'created')
+
+    def __init__(self, driver, profile_dir):
+        self.driver = driver
+        self.profile_dir = profile_dir
+        self.pages = 0
+        self.created = time.time()
+
+
+class BrowserPool:
+    """
+    长期保持的无头 Chrome 会话池，模块级创建一次即可在多个频道和每日循环之间复用。
+    factory(profile_dir) 创建 WebDriver（站点自行配置 Options/Service，并以 profile_dir 作为 --user-data-dir）。
+    acquire() 取出一个通过健康检查的空闲会话，没有空闲会话且总数未达 size 时新建，否则等待归还；
+    release(driver, pages) 归还并累计打开过的页面数，超过 max_pages、内存超过 max_memory_mb
+    或 broken=True 时关闭浏览器并删除其用户目录。进程退出时自动关闭所有会话。
+    """
+
+    def __init__(self, factory, size=1, max_pages=30, max_memory_mb=1500, profile_prefix='chrome_temp'):
+        self.factory = factory
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.profile_prefix = profile_prefix
+        self._idle = []
+        self._busy = {}
+        self._starting = 0
+        self._cond = threading.Condition()
+        self.created = 0
+        self.reused = 0
+        self.recycled = Counter()
+        atexit.register(self.close_all)
+
+    def _new_session(self):
+        profile_dir = os.path.abspath(f'./{self.profile_prefix}_{uuid.uuid4().hex[:8]}')
+        os.makedirs(profile_dir, exist_ok=True)
+        try:
+            driver = self.factory(profile_dir)
+        except Exception:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        self.created += 1
+        return _Session(driver, profile_dir)
+
+    @staticmethod
+    def healthy(driver):
+        """浏览器进程仍在且能执行脚本"""
+        try:
+            driver.execute_script('return 1')
+            return bool(driver.window_handles)
+        except Exception:
+            return False
+
+    @staticmethod
+    def memory_mb(driver):
+        """浏览器占用的内存（MB）；没有 psutil 时返回当前页面的 JS 堆大小"""
+        if psutil is not None:
+            try:
+                root = psutil.Process(driver.service.process.pid)
+                return sum(p.memory_info().rss for p in root.children(recursive=True)) / 1024 / 1024
+            except Exception:
+                pass
+        try:
+            heap = driver.execute_script('return performance.memory ? performance.memory.totalJSHeapSize : 0')
+            return (heap or 0) / 1024 / 1024
+        except Exception:
+            return 0
+
+    def acquire(self):
+        while True:
+            with self._cond:
+                while not self._idle and len(self._busy) + self._starting >= self.size:
+                    self._cond.wait()
+                if self._idle:
+                    # 检查期间先计入使用中，其它线程不会因此多建会话
+                    session = self._idle.pop()
+                    self._busy[id(session.driver)] = session
+                else:
+                    session = None
+                    self._starting += 1
+            if session is None:
+                break
+            # 健康检查要与浏览器往返，在锁外进行，卡住的会话不会阻塞其它频道线程的 acquire/release
+            if self.healthy(session.driver):
+                with self._cond:
+                    self.reused += 1
+                return session.driver
+            self._close(session, '健康检查失败')
+            with self._cond:
+                self._busy.pop(id(session.driver), None)
+                self._cond.notify_all()
+        try:
+            session = self._new_session()
+        except Exception:
+            with self._cond:
+                self._starting -= 1
+                self._cond.notify_all()
+            raise
+        with self._cond:
+            self._starting -= 1
+            self._busy[id(session.driver)] = session
+        return session.driver
+
+    def release(self, driver, pages=1, broken=False):
+        with self._cond:
+            session = self._busy.get(id(driver))
+            if session is None:
+                return
+            session.pages += pages
+        # 内存检查和回收在锁外进行；期间会话仍计入使用中
+        reason = None
+        if broken:
+            reason = '会话异常'
+        elif session.pages >= self.max_pages:
+            reason = f'已打开 {session.pages} 个页面'
+        else:
+            memory = self.memory_mb(driver)
+            if memory > self.max_memory_mb:
+                reason = f'内存 {memory:.0f} MB'
+        if reason:
+            self._close(session, reason)
+        with self._cond:
+            self._busy.pop(id(driver), None)
+            if not reason:
+                self._idle.append(session)
+            self._cond.notify_all()
+
+    def _close(self, session, reason):
+        """关闭浏览器并删除用户目录；在锁外调用"""
+        with self._cond:
+            self.recycled[reason.split(' ')[0]] += 1
+        print(f"♻️ 回收浏览器会话（{reason}）")
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+        shutil.rmtree(session.profile_dir, ignore_errors=True)
+
+    def close_all(self):
+        with self._cond:
+            sessions = self._idle + list(self._busy.values())
+            self._idle = []
+            self._busy = {}
+        for session in sessions:
+            try:
+                session.driver.quit()
+            except Exception:
+                pass
+            shutil.rmtree(session.profile_dir, ignore_errors=True)
+
+    def describe(self):
+        recycled = sum(self.recycled.values())
+        return (f"浏览器池：新建 {self.created} 次，复用 {self.reused} 次，回收 {recycled} 次，"
+                f"空闲 {len(self._idle)} 个，使用中 {len(self._busy)} 个")
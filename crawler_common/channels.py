@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+频道并行调度 - 多个频道同时爬取，每个频道从浏览器池取得独立的会话，
+文章页统一由共享的 AsyncFetcher 抓取（按主机的在途上限和限速在所有频道之间共用），
+整轮耗时接近最慢的那个频道，而不是各频道之和
+"""
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+def run_channels(channels, crawl, workers=1):
+    """
+    对 channels 中的每一项调用 crawl(channel)。
+    workers <= 1 时在当前线程中按顺序执行（与原来的行为一致，异常直接抛出）；
+    否则最多 workers 个频道同时进行，单个频道的异常只打印，不影响其他频道。
+    workers 应不超过浏览器池的 size，否则多出的线程会在 acquire() 处等待。
+    返回 {频道: 耗时秒数}，失败的频道耗时为 None。
+    """
+    channels = list(channels)
+    elapsed = {}
+    start = time.monotonic()
+    if workers <= 1 or len(channels) <= 1:
+        for channel in channels:
+            t0 = time.monotonic()
+            crawl(channel)
+            elapsed[channel] = time.monotonic() - t0
+        return elapsed
+
+    def timed(channel):
+        t0 = time.monotonic()
+        crawl(channel)
+        return time.monotonic() - t0
+
+    executor = ThreadPoolExecutor(max_workers=min(workers, len(channels)), thread_name_prefix='channel')
+    try:
+        futures = {executor.submit(timed, channel): channel for channel in channels}
+        for future in as_completed(futures):
+            channel = futures[future]
+            try:
+                elapsed[channel] = future.result()
+            except Exception as e:
+                elapsed[channel] = None
+                print(f"❌ 频道 {channel} 异常: {e}")
+                traceback.print_exc()
+    finally:
+        # Ctrl+C 时不再启动排队中的频道；已在进行的频道由调用方关闭浏览器池后自行结束
+        executor.shutdown(wait=False, cancel_futures=True)
+    total = sum(t for t in elapsed.values() if t is not None)
+    print(f"⏱️ {len(channels)} 个频道并行完成，耗时 {time.monotonic() - start:.0f} 秒（各频道合计 {total:.0f} 秒）")
+    return elapsed
+
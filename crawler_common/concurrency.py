@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+自适应并发控制（AIMD）- 延迟和错误率正常时逐步提高每个主机的并发上限，
+遇到 429/5xx、超时、SSL/连接错误时按比例下调
+"""
+import threading
+import time
+
+import requests
+
+# 视为“服务端吃不消”的信号
+CONGESTION_STATUS = (429, 500, 502, 503, 504)
+CONGESTION_ERRORS = (requests.exceptions.Timeout, requests.exceptions.ConnectionError)
+
+
+class _HostState:
+    __slots__ = ('limit', 'successes', 'latency', 'last_decrease', 'errors', 'requests')
+
+    def __init__(self, limit):
+        self.limit = float(limit)
+        self.successes = 0
+        self.latency = None
+        self.last_decrease = 0.0
+        self.errors = 0
+        self.requests = 0
+
+
+class AdaptiveConcurrency:
+    """
+    每个主机一个并发上限，初始为 initial，范围 [minimum, maximum]。
+    加性增：连续 limit 个“健康”的请求（非拥塞且延迟不超过平均延迟的 slow_factor 倍）后上限 +increase；
+    乘性减：出现拥塞信号时上限 ×decrease，cooldown 秒内只下调一次，避免同一批失败连续砍半。
+    """
+
+    def __init__(self, initial=2, minimum=1, maximum=8, increase=1, decrease=0.5,
+                 slow_factor=2.0, cooldown=2.0):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_factor = slow_factor
+        self.cooldown = cooldown
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(min(max(self.initial, self.minimum), self.maximum))
+        return state
+
+    def limit(self, host):
+        """当前允许的在途请求数"""
+        with self._lock:
+            return max(self.minimum, int(self._state(host).limit))
+
+    def record(self, host, result):
+        """根据一次请求的结果（FetchResult）调整该主机的上限"""
+        congested = (isinstance(result.error, CONGESTION_ERRORS)
+                     or result.status_code in CONGESTION_STATUS)
+        with self._lock:
+            state = self._state(host)
+            state.requests += 1
+            if congested:
+                state.errors += 1
+                state.successes = 0
+                now = time.monotonic()
+                if now - state.last_decrease >= self.cooldown:
+                    state.limit = max(self.minimum, state.limit * self.decrease)
+                    state.last_decrease = now
+                return
+            if result.error is not None:
+                return
+            slow = state.latency is not None and result.elapsed > state.latency * self.slow_factor
+            # 指数滑动平均作为延迟基线
+            state.latency = result.elapsed if state.latency is None else state.latency * 0.8 + result.elapsed * 0.2
+            if slow:
+                state.successes = 0
+                return
+            state.successes += 1
+            if state.successes >= int(state.limit):
+                state.successes = 0
+                state.limit = min(self.maximum, state.limit + self.increase)
+
+    def report(self):
+        """各主机的当前并发上限、平均延迟和拥塞次数"""
+        with self._lock:
+            return {
+                host: {
+                    'limit': max(self.minimum, int(state.limit)),
+                    'latency': round(state.latency, 3) if state.latency is not None else None,
+                    'errors': state.errors,
+                    'requests': state.requests,
+                }
+                for host, state in self._hosts.items()
+            }
+
+    def describe(self):
+        return '；'.join(
+            f"{host} 并发上限 {info['limit']}（平均延迟 {info['latency']}s，拥塞 {info['errors']}/{info['requests']}）"
+            for host, info in self.report().items()
+        )
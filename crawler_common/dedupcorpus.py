@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+语料近似去重 - 用 NearDupIndex 一次遍历已保存的 data/ 目录，找出（并可删除）各站点之间的近似重复文章，
+同时把其余文章记入索引，之后爬虫保存新文章时即可与全部历史语料比较
+用法: python -m crawler_common.dedupcorpus [data目录] [--threshold 0.8] [--apply]
+"""
+import glob
+import json
+import os
+import sys
+import time
+
+from .fingerprint import fingerprint
+from .neardup import DEFAULT_THRESHOLD, NearDupIndex
+
+
+def dedup_corpus(index, data_dir='data', apply=False):
+    """
+    按修改时间从早到晚遍历 data_dir 下的 JSON 文件，逐篇查询并记入索引，较晚出现的近似重复文章列入报告；
+    apply=True 时把重复文章从原文件中删除（文件中的文章全部重复时删除该文件）。返回报告列表
+    """
+    report = []
+    # 本次遍历中记入索引的无链接文章键 -> 文章；同一文件里完全相同的两篇键也相同，索引不会拿它们互相比较
+    keyless = {}
+    paths = sorted(glob.glob(os.path.join(data_dir, '*.json')), key=os.path.getmtime)
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                articles = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 跳过 {path}: {e}")
+            continue
+        if not isinstance(articles, list):
+            continue
+        # 文件名以站点编号开头，如 62_国际_20250101_120000.json
+        site = os.path.basename(path).split('_', 1)[0]
+        kept = []
+        for art in articles:
+            title, content = art.get('title', ''), art.get('content', '')
+            url = art.get('sources', {}).get('origin_url')
+            has_url = bool(url)
+            if not has_url:
+                # 没有原文链接时以文件路径和标题、正文的指纹为键：删除重复文章后其余文章在文件中的位置会变，键不变
+                url = f"{path}#{fingerprint(title + chr(10) + content):016x}"
+            match = keyless.get(url) or index.check(site, url, title, content)
+            if match:
+                report.append({'file': path, 'title': title, 'url': url, 'duplicate_of': match})
+            else:
+                # 文章已经在文件里，直接记入索引
+                index.add(site, url, title, content)
+                if not has_url:
+                    keyless[url] = {'site': site, 'url': url, 'title': title, 'similarity': 1.0}
+                kept.append(art)
+        if apply and len(kept) < len(articles):
+            if kept:
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(kept, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, path)
+            else:
+                os.remove(path)
+            print(f"🧹 {path}: 删除 {len(articles) - len(kept)} 篇近似重复文章")
+    return report
+
+
+def main(argv):
+    data_dir = 'data'
+    threshold = DEFAULT_THRESHOLD
+    apply = False
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == '--apply':
+            apply = True
+        elif arg == '--threshold' and args:
+            threshold = float(args.pop(0))
+        elif arg.startswith('-'):
+            print("用法: python -m crawler_common.dedupcorpus [data目录] [--threshold 0.8] [--apply]")
+            return 1
+        else:
+            data_dir = arg
+    index = NearDupIndex(threshold=threshold)
+    start = time.monotonic()
+    report = dedup_corpus(index, data_dir, apply)
+    report_path = 'neardup_report.json'
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"🔍 {data_dir} 中发现 {len(report)} 篇近似重复文章，耗时 {time.monotonic() - start:.0f} 秒，明细见 {report_path}")
+    print(index.describe())
+    if report and not apply:
+        print("加上 --apply 可从原文件中删除这些文章")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+ChromeDriver 持久缓存 - 按本机 Chrome 主版本号保存已验证的 ChromeDriver 及其 SHA-256，
+命中时只做一次校验即可返回，不再每次运行都查找路径、尝试镜像或重新下载；
+Chrome 升级到新的主版本后自动重新获取。可在后台线程中解析，与首批 HTTP 请求同时进行
+"""
+import hashlib
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+
+VERSION_RE = re.compile(r'(\d+)\.\d+\.\d+(?:\.\d+)?')
+
+# 各平台 Chrome 可执行文件的常见位置，按顺序尝试 --version
+CHROME_BINARIES = {
+    'Windows': (
+        r'C:\Program Files\Google\Chrome\Application\chrome.exe',
+        r'C:\Program Files (x86)\Google\Chrome\Application\chrome.exe',
+    ),
+    'Darwin': (
+        '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+        '/Applications/Chromium.app/Contents/MacOS/Chromium',
+    ),
+    'Linux': ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser'),
+}
+
+_chrome_major = None
+
+
+def _windows_registry_version():
+    try:
+        import winreg
+    except ImportError:
+        return None
+    for hive in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+        for reg_path in (r'SOFTWARE\Google\Chrome\BLBeacon', r'SOFTWARE\WOW6432Node\Google\Chrome\BLBeacon'):
+            try:
+                with winreg.OpenKey(hive, reg_path) as key:
+                    return winreg.QueryValueEx(key, 'version')[0]
+            except OSError:
+                continue
+    return None
+
+
+def _binary_version(path):
+    try:
+        result = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def chrome_major_version(refresh=False):
+    """本机 Chrome 的主版本号（字符串），检测不到时返回 None；结果在进程内缓存"""
+    global _chrome_major
+    if _chrome_major is not None and not refresh:
+        return _chrome_major
+    system = platform.system()
+    output = _windows_registry_version() if system == 'Windows' else None
+    for binary in CHROME_BINARIES.get(system, ()):
+        if output:
+            break
+        output = _binary_version(binary)
+    m = VERSION_RE.search(output or '')
+    _chrome_major = m.group(1) if m else None
+    return _chrome_major
+
+
+def driver_major_version(path):
+    """ChromeDriver 自身报告的主版本号，无法运行时返回 None"""
+    m = VERSION_RE.search(_binary_version(path) or '')
+    return m.group(1) if m else None
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DriverCache:
+    """
+    root 下每个 Chrome 主版本一个子目录，manifest.json 记录 {主版本: {file, sha256, driver_version, stored}}。
+    resolve(install) 先按当前主版本查缓存并校验 SHA-256，命中即返回；未命中时调用 install(主版本)
+    （站点自己的下载逻辑，可返回 None），确认驱动版本与 Chrome 一致后复制进缓存再返回缓存中的路径。
+    检测不到 Chrome 版本时以 "any" 作为键。多个爬虫可以共用同一个 root。
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, root='chromedriver_store'):
+        self.root = os.path.abspath(root)
+        self._lock = threading.Lock()
+
+    def _manifest_path(self):
+        return os.path.join(self.root, self.MANIFEST)
+
+    def _load_manifest(self):
+        try:
+            with open(self._manifest_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self._manifest_path() + f'.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self._manifest_path())
+
+    def lookup(self, major):
+        """返回通过校验的缓存路径；文件缺失或校验失败时删除该条目并返回 None"""
+        key = major or 'any'
+        with self._lock:
+            manifest = self._load_manifest()
+            entry = manifest.get(key)
+            if not entry:
+                return None
+            path = os.path.join(self.root, entry['file'])
+            if os.path.isfile(path) and file_sha256(path) == entry['sha256']:
+                return path
+            print(f"⚠️ 缓存的ChromeDriver校验失败（Chrome {key}），重新获取")
+            manifest.pop(key, None)
+            self._save_manifest(manifest)
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+            return None
+
+    def store(self, major, source):
+        """把 install() 得到的驱动复制进缓存，返回缓存中的路径；驱动与 Chrome 主版本不一致时不缓存，返回 None"""
+        key = major or 'any'
+        source = shutil.which(source) or source
+        driver_version = driver_major_version(source)
+        if major and driver_version and driver_version != major:
+            print(f"⚠️ ChromeDriver版本 {driver_version} 与 Chrome {major} 不一致，本次使用但不缓存")
+            return None
+        name = 'chromedriver.exe' if platform.system() == 'Windows' else 'chromedriver'
+        target_dir = os.path.join(self.root, key)
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, name)
+        tmp_path = target + f'.{os.getpid()}.tmp'
+        shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, target)
+        if platform.system() != 'Windows':
+            os.chmod(target, 0o755)
+        with self._lock:
+            manifest = self._load_manifest()
+            manifest[key] = {
+                'file': os.path.relpath(target, self.root),
+                'sha256': file_sha256(target),
+                'driver_version': driver_version,
+                'stored': time.time(),
+            }
+            self._save_manifest(manifest)
+        return target
+
+    def resolve(self, install):
+        """返回可用的 ChromeDriver 路径，install(主版本) 只在缓存未命中时调用；都失败时返回 None"""
+        start = time.monotonic()
+        major = chrome_major_version()
+        path = self.lookup(major)
+        if path:
+            print(f"✅ ChromeDriver缓存命中（Chrome {major or '版本未知'}，{(time.monotonic() - start) * 1000:.0f} ms）: {path}")
+            return path
+        path = install(major)
+        if not path:
+            return None
+        cached = self.store(major, path)
+        if cached:
+            print(f"💾 ChromeDriver已存入缓存（Chrome {major or '版本未知'}）: {cached}")
+        return cached or path
+
+    def resolve_async(self, install):
+        """在后台线程中执行 resolve()，返回 Future；调用方在真正启动浏览器时再取 result()"""
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(self.resolve(install))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name='DriverCache', daemon=True).start()
+        return future
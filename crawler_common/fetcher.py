@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+异步抓取引擎 - 各站点爬虫共用，按主机限制在途请求数，结果按完成顺序返回
+"""
+import asyncio
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+from .session import RETRY_STATUS, create_session
+
+_DONE = object()
+
+
+class FetchResult(namedtuple('FetchResult', ['url', 'response', 'error', 'elapsed'])):
+    """单个URL的抓取结果：response 与 error 二者必有其一"""
+    __slots__ = ()
+
+    @property
+    def status_code(self):
+        return self.response.status_code if self.response is not None else None
+
+    def get_response(self):
+        """返回响应；请求阶段出现的异常在调用方重新抛出，便于沿用原有的 try/except"""
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+class AsyncFetcher:
+    """
+    基于 asyncio 的抓取引擎。
+    底层仍使用 requests.Session（在线程池中执行），每个主机同时在途的请求数不超过 max_per_host。
+    未传入 session 时使用 create_session() 创建，连接池大小与 max_per_host 一致。
+    爬虫通过 iter_fetch() 提交一批URL，并在主线程中逐个消费结果。
+    GET/HEAD 遇到 429/5xx（retry_status）时由引擎按指数退避重试最多 status_retries 次（优先使用 Retry-After），
+    传入的 session 应以 create_session(status_forcelist=()) 创建，关闭会话层的状态码重试，
+    否则这些重试发生在 session.get 内部，既不经过限速器也不会反馈给并发控制器。
+    传入 rate_limiter（HostRateLimiter）后，每次发出请求（含重试）前都先向对应主机的令牌桶取令牌。
+    传入 cache（HttpCache）后，对已缓存的URL发送条件请求，304 时返回磁盘上的内容。
+    传入 concurrency（AdaptiveConcurrency）后，每个主机的在途上限由它按响应情况动态调整（AIMD），
+    max_per_host 不再生效；concurrency.maximum 同时决定默认连接池大小。每次尝试（含中间的 429/5xx）都反馈给控制器。
+    每个主机的在途请求数在整个实例内统计：多个频道线程同时调用 iter_fetch() 时共用同一上限和限速器，
+    相当于所有频道的文章页进入同一个抓取队列。
+    """
+
+    def __init__(self, session=None, max_per_host=4, max_in_flight=16, timeout=15, rate_limiter=None,
+                 cache=None, concurrency=None, retries=0, retry_delay=2, retry_on=(requests.exceptions.ConnectionError,
+                                                     requests.exceptions.Timeout),
+                 status_retries=3, backoff_factor=1.0, retry_status=RETRY_STATUS, **request_kwargs):
+        if concurrency is not None:
+            max_per_host = concurrency.maximum
+        self.session = session or create_session(pool_maxsize=max_per_host, status_forcelist=())
+        self.max_per_host = max_per_host
+        self.concurrency = concurrency
+        self.max_in_flight = max(max_in_flight, max_per_host)
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.retry_on = retry_on
+        self.status_retries = status_retries
+        self.backoff_factor = backoff_factor
+        self.retry_status = retry_status
+        self.request_kwargs = request_kwargs
+        self._host_busy = {}
+        self._host_cond = threading.Condition()
+
+    @staticmethod
+    def host_of(url):
+        return urlsplit(url).netloc.lower()
+
+    def fetch(self, url, method='GET', options=None):
+        """
+        同步抓取单个URL，返回 FetchResult；method='HEAD' 时只探测是否存在，不经过缓存。
+        options 为本次请求额外的 requests 参数（如 headers、data、json），覆盖构造时的同名参数。
+        自适应模式下每次尝试的结果都反馈给并发控制器，最后一次的结果作为返回值
+        """
+        start = time.monotonic()
+        kwargs = dict(self.request_kwargs, **(options or {}))
+        host = self.host_of(url)
+        status_attempt = 0
+        attempt = 0
+        while True:
+            attempt_start = time.monotonic()
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(url)
+                if method != 'GET':
+                    response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+                elif self.cache is not None:
+                    headers = dict(kwargs.get('headers') or {}, **self.cache.conditional_headers(url))
+                    response = self.session.get(url, timeout=self.timeout, **dict(kwargs, headers=headers))
+                    response = self.cache.update(url, response)
+                else:
+                    response = self.session.get(url, timeout=self.timeout, **kwargs)
+            except self.retry_on as e:
+                self._record(host, FetchResult(url, None, e, time.monotonic() - attempt_start))
+                if attempt < self.retries:
+                    attempt += 1
+                    time.sleep(self.retry_delay * attempt)
+                    continue
+                return FetchResult(url, None, e, time.monotonic() - start)
+            except Exception as e:
+                self._record(host, FetchResult(url, None, e, time.monotonic() - attempt_start))
+                return FetchResult(url, None, e, time.monotonic() - start)
+            self._record(host, FetchResult(url, response, None, time.monotonic() - attempt_start))
+            # 与会话层原来的重试一致，只重试 GET/HEAD
+            if (response.status_code not in self.retry_status or status_attempt >= self.status_retries
+                    or method not in ('GET', 'HEAD')):
+                return FetchResult(url, response, None, time.monotonic() - start)
+            time.sleep(self._retry_wait(response, status_attempt))
+            status_attempt += 1
+
+    def _retry_wait(self, response, status_attempt):
+        """429/5xx 后的等待秒数：优先使用 Retry-After（秒数形式），否则按 backoff_factor 指数退避"""
+        retry_after = response.headers.get('Retry-After', '').strip()
+        if retry_after.isdigit():
+            return int(retry_after)
+        return self.backoff_factor * (2 ** status_attempt)
+
+    def _record(self, host, result):
+        if self.concurrency is not None:
+            self.concurrency.record(host, result)
+
+    def host_limit(self, host):
+        return self.concurrency.limit(host) if self.concurrency is not None else self.max_per_host
+
+    def _gated_fetch(self, url, method, options=None):
+        """在工作线程中执行：等待该主机有空闲名额后抓取（每次尝试的结果由 fetch() 反馈给控制器）"""
+        host = self.host_of(url)
+        with self._host_cond:
+            self._host_cond.wait_for(lambda: self._host_busy.get(host, 0) < self.host_limit(host))
+            self._host_busy[host] = self._host_busy.get(host, 0) + 1
+        try:
+            result = self.fetch(url, method, options)
+        finally:
+            with self._host_cond:
+                self._host_busy[host] -= 1
+                self._host_cond.notify_all()
+        return result
+
+    def iter_fetch(self, urls, ordered=False, method='GET'):
+        """
+        并发抓取 urls（可以是惰性生成器），以生成器形式逐个返回 FetchResult。
+        ordered=False 时按完成顺序返回，ordered=True 时按提交顺序返回；method 可设为 'HEAD' 做存在性探测，
+        或设为 'POST' 等方法重放接口请求，此时 urls 的元素可以是 (url, options) 二元组，options 同 fetch()。
+        调用方提前结束迭代（break）后，引擎不再提交新的URL。
+        """
+        out = queue.Queue(maxsize=self.max_in_flight)
+        stop = threading.Event()
+        failure = []
+
+        def runner():
+            try:
+                asyncio.run(self._run(urls, out, stop, ordered, method))
+            except BaseException as e:
+                failure.append(e)
+            finally:
+                while not stop.is_set():
+                    try:
+                        out.put(_DONE, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+
+        thread = threading.Thread(target=runner, name='AsyncFetcher', daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = out.get()
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            stop.set()
+        if failure:
+            raise failure[0]
+
+    async def _run(self, urls, out, stop, ordered, method):
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='fetch')
+        window = asyncio.Semaphore(self.max_in_flight)
+        finished = {}
+        next_seq = 0
+        tasks = set()
+
+        async def emit(seq, result):
+            nonlocal next_seq
+            if not ordered:
+                await self._put(out, result, stop)
+                window.release()
+                return
+            finished[seq] = result
+            while next_seq in finished:
+                await self._put(out, finished.pop(next_seq), stop)
+                next_seq += 1
+                window.release()
+
+        async def worker(seq, item):
+            url, options = item if isinstance(item, tuple) else (item, None)
+            # 主机名额在线程中等待，自适应模式下每次放行前重新读取当前上限
+            result = await loop.run_in_executor(executor, self._gated_fetch, url, method, options)
+            await emit(seq, result)
+
+        try:
+            for seq, item in enumerate(urls):
+                await window.acquire()
+                if stop.is_set():
+                    break
+                task = asyncio.create_task(worker(seq, item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    async def _put(out, item, stop):
+        while not stop.is_set():
+            try:
+                out.put_nowait(item)
+                return
+            except queue.Full:
+                await asyncio.sleep(0.05)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+紧凑指纹集合 - 只需要判断“是否出现过”、不需要取回原文的去重键（如标题哈希），
+以 64 位指纹保存：有序数组文件通过 mmap 直接映射、二分查找，新增部分写入追加日志，
+攒够一定数量后合并回有序数组。每条记录 8 字节，百万条约 8 MB，打开时不需要读入或重建
+"""
+import bisect
+import hashlib
+import heapq
+import mmap
+import os
+import threading
+from array import array
+
+_ITEM_SIZE = array('Q').itemsize
+
+
+def fingerprint(text):
+    """文本的 64 位指纹：MD5 的前 8 个字节，与 hex_fingerprint(md5 十六进制串) 相同，旧的 MD5 记录可以直接换算"""
+    return int.from_bytes(hashlib.md5(text.encode('utf-8')).digest()[:8], 'big')
+
+
+def hex_fingerprint(hex_digest):
+    """由十六进制哈希（如 MD5 hexdigest）换算出指纹"""
+    return int(hex_digest[:16], 16)
+
+
+class FingerprintSet:
+    """
+    path 为有序 uint64 数组（本机字节序），只读映射后用 bisect 查找，O(log n)，不复制到内存；
+    path + '.log' 为增量日志，打开时读入 set，add() 每条追加 8 字节并立即写出。
+    日志超过 compact_threshold 条时（或调用 compact()）归并成新的有序数组并原子替换。
+    同一文件同一时间只应由一个进程写入；线程安全。
+    """
+
+    def __init__(self, path, compact_threshold=100000):
+        path_dir = os.path.dirname(path)
+        if path_dir:
+            os.makedirs(path_dir, exist_ok=True)
+        self.path = path
+        self.log_path = path + '.log'
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._mmap = None
+        self._base = ()
+        self._open_base()
+        self._delta = set()
+        self._load_log()
+        self._log = open(self.log_path, 'ab')
+
+    def _open_base(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < _ITEM_SIZE:
+            return
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        usable = len(self._mmap) - len(self._mmap) % _ITEM_SIZE
+        self._base = memoryview(self._mmap)[:usable].cast('Q')
+
+    def _close_base(self):
+        if self._mmap is not None:
+            # 先释放 memoryview 才能关闭映射；Windows 下关闭映射后才能替换文件
+            self._base.release()
+            self._mmap.close()
+        self._mmap = None
+        self._base = ()
+
+    def _load_log(self):
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, 'rb') as f:
+            data = f.read()
+        # 上次写到一半中断时丢掉末尾不完整的记录
+        complete = len(data) - len(data) % _ITEM_SIZE
+        if complete != len(data):
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(complete)
+        entries = array('Q')
+        entries.frombytes(data[:complete])
+        self._delta = set(entries)
+
+    def _in_base(self, fp):
+        i = bisect.bisect_left(self._base, fp)
+        return i < len(self._base) and self._base[i] == fp
+
+    def __contains__(self, fp):
+        with self._lock:
+            return fp in self._delta or self._in_base(fp)
+
+    def __len__(self):
+        return len(self._base) + len(self._delta)
+
+    def add(self, fp):
+        """记录指纹，返回是否为新记录"""
+        with self._lock:
+            if fp in self._delta or self._in_base(fp):
+                return False
+            self._delta.add(fp)
+            self._log.write(array('Q', [fp]).tobytes())
+            self._log.flush()
+            if len(self._delta) >= self.compact_threshold:
+                self._compact()
+            return True
+
+    def update(self, fps):
+        """批量记录，返回新增的条数；用于从旧的去重记录一次性导入"""
+        with self._lock:
+            new = array('Q', {fp for fp in fps if fp not in self._delta and not self._in_base(fp)})
+            self._delta.update(new)
+            self._log.write(new.tobytes())
+            self._log.flush()
+            if len(self._delta) >= self.compact_threshold:
+                self._compact()
+            return len(new)
+
+    def import_lines(self, path, key=fingerprint):
+        """
+        把旧的文本去重文件（每行一条）换算成指纹导入并合并，返回新增的条数；文件不存在时返回 0。
+        key 为一行到指纹的换算：原文（如标题）用 fingerprint，MD5 十六进制记录用 hex_fingerprint
+        """
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'r', encoding='utf-8') as f:
+            added = self.update(key(line.strip()) for line in f if line.strip())
+        self.compact()
+        return added
+
+    def _compact(self):
+        if not self._delta:
+            return
+        merged = array('Q', heapq.merge(self._base, sorted(self._delta)))
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            merged.tofile(f)
+        self._close_base()
+        os.replace(tmp_path, self.path)
+        self._log.close()
+        self._log = open(self.log_path, 'wb')
+        self._delta = set()
+        self._open_base()
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def describe(self):
+        size = (len(self._base) + len(self._delta)) * _ITEM_SIZE
+        return (f"指纹集合 {os.path.basename(self.path)}：{len(self)} 条"
+                f"（有序 {len(self._base)} + 增量 {len(self._delta)}），约 {size / 1024 / 1024:.1f} MB")
+
+    def close(self):
+        with self._lock:
+            self._log.close()
+            self._close_base()
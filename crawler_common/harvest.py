@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+浏览器内链接收集 - 在列表页注入脚本，用 MutationObserver 记录“加载更多”后新增的文章链接，
+每轮只通过 WebDriver 传回新出现的 href，代替每轮读取整页 page_source 再重新解析
+"""
+
+# arguments[0]: {key, selector, closest, pattern}
+# 已见过的 href 保存在页面内；observer 没有记录到新链接时再在浏览器内全量扫描一次兜底
+_HARVEST_JS = r"""
+var cfg = arguments[0];
+var h = window.__linkHarvest;
+if (!h || h.key !== cfg.key) {
+    if (h && h.observer) h.observer.disconnect();
+    h = window.__linkHarvest = {key: cfg.key, seen: new Set(), pending: [], reset: true};
+    var re = cfg.pattern ? new RegExp(cfg.pattern) : null;
+    var take = function (el) {
+        var a = cfg.closest ? el.closest(cfg.closest) : el;
+        if (!a) return;
+        var href = a.getAttribute('href');
+        if (!href || (re && !re.test(href)) || h.seen.has(href)) return;
+        h.seen.add(href);
+        h.pending.push(href);
+    };
+    h.scan = function (root) {
+        if (!root || root.nodeType !== 1) return;
+        if (root.matches(cfg.selector)) take(root);
+        root.querySelectorAll(cfg.selector).forEach(take);
+    };
+    h.scan(document.documentElement);
+    h.observer = new MutationObserver(function (mutations) {
+        mutations.forEach(function (m) {
+            if (m.type === 'attributes') {
+                h.scan(m.target);
+            } else {
+                m.addedNodes.forEach(h.scan);
+            }
+        });
+    });
+    h.observer.observe(document.documentElement,
+                       {childList: true, subtree: true, attributes: true, attributeFilter: ['href']});
+}
+if (!h.pending.length) h.scan(document.documentElement);
+var out = {links: h.pending, total: h.seen.size, reset: h.reset};
+h.pending = [];
+h.reset = false;
+return out;
+"""
+
+
+class LinkHarvester:
+    """
+    selector 为要收集的元素（CSS 选择器）；closest 不为空时取该元素最近的匹配祖先（如外层 <a>）的 href；
+    pattern 为 JS 正则，只收集匹配的 href。返回的是原始 href 属性值，补全和过滤由调用方完成。
+    页面跳转或刷新后脚本状态随之丢失，下一次 collect() 会重新注入并把当前页面上的链接全部返回一次（reset 为 True）。
+    """
+
+    def __init__(self, driver, selector, closest=None, pattern=None):
+        self.driver = driver
+        self.config = {
+            'key': f'{selector}|{closest}|{pattern}',
+            'selector': selector,
+            'closest': closest,
+            'pattern': pattern,
+        }
+        self.total = 0
+        self.reset = False
+        self.transferred = 0
+
+    def collect(self):
+        """返回上次调用之后页面上新出现的 href 列表"""
+        result = self.driver.execute_script(_HARVEST_JS, self.config) or {}
+        links = result.get('links') or []
+        self.total = result.get('total', 0)
+        self.reset = bool(result.get('reset'))
+        self.transferred += len(links)
+        return links
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+磁盘 HTTP 缓存 - 按URL保存响应体与校验信息（ETag / Last-Modified），
+重复抓取时发送条件请求，服务端返回 304 则直接使用磁盘上的内容；总大小超限时按 LRU 淘汰
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# 只保留解析所需的响应头，避免缓存无关内容
+_KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class HttpCache:
+    """
+    cache_dir 下保存 index.sqlite3（URL -> 校验信息、大小、最近访问时间）和 bodies/ 目录（响应体）。
+    max_bytes 为响应体总大小上限，超出后淘汰最久未访问的条目，直到低于上限的 90%。
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.body_dir = os.path.join(cache_dir, 'bodies')
+        self.max_bytes = max_bytes
+        os.makedirs(self.body_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite3'), check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, headers TEXT, encoding TEXT,'
+            ' size INTEGER NOT NULL, last_access REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS idx_entries_access ON entries (last_access)')
+        self._db.commit()
+        self.total_bytes = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        self.hits = 0
+        self.stores = 0
+
+    def _body_path(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.body_dir, key[:2], key)
+
+    def conditional_headers(self, url):
+        """返回该URL的条件请求头；没有缓存时返回空字典"""
+        with self._lock:
+            row = self._db.execute('SELECT etag, last_modified FROM entries WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return {}
+        headers = {}
+        if row[0]:
+            headers['If-None-Match'] = row[0]
+        if row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def update(self, url, response):
+        """
+        处理一次条件请求的响应：304 时用缓存内容构造 200 响应返回；
+        带校验信息的 200 响应写入缓存；其它情况原样返回。
+        """
+        if response.status_code == 304:
+            cached = self._load(url)
+            return cached if cached is not None else response
+        if response.status_code == 200:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self._store(url, response, etag, last_modified)
+        return response
+
+    def _load(self, url):
+        with self._lock:
+            row = self._db.execute('SELECT headers, encoding FROM entries WHERE url = ?', (url,)).fetchone()
+            if row is None:
+                return None
+            try:
+                with open(self._body_path(url), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                self._delete(url)
+                self._db.commit()
+                return None
+            self._db.execute('UPDATE entries SET last_access = ? WHERE url = ?', (time.time(), url))
+            self._db.commit()
+            self.hits += 1
+        cached = requests.Response()
+        cached.status_code = 200
+        cached.reason = 'OK'
+        cached.url = url
+        cached.headers = CaseInsensitiveDict(json.loads(row[0]))
+        cached.encoding = row[1]
+        cached._content = body
+        cached.from_cache = True
+        return cached
+
+    def _store(self, url, response, etag, last_modified):
+        body = response.content
+        headers = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+        path = self._body_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        with self._lock:
+            os.replace(tmp_path, path)
+            row = self._db.execute('SELECT size FROM entries WHERE url = ?', (url,)).fetchone()
+            if row is not None:
+                self.total_bytes -= row[0]
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries (url, etag, last_modified, headers, encoding, size, last_access)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, etag, last_modified, json.dumps(headers), response.encoding, len(body), time.time())
+            )
+            self.total_bytes += len(body)
+            self.stores += 1
+            if self.total_bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+            self._db.commit()
+
+    def _delete(self, url):
+        row = self._db.execute('SELECT size FROM entries WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return
+        self._db.execute('DELETE FROM entries WHERE url = ?', (url,))
+        self.total_bytes -= row[0]
+        try:
+            os.remove(self._body_path(url))
+        except OSError:
+            pass
+
+    def _evict(self, target_bytes):
+        rows = self._db.execute('SELECT url FROM entries ORDER BY last_access').fetchall()
+        for (url,) in rows:
+            if self.total_bytes <= target_bytes:
+                break
+            self._delete(url)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
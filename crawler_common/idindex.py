@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+文章编号索引 - 按 (路径, 日期) 持久化保存“哪些编号存在”的位图和当天的最大编号，
+探测一次后，后续运行只对存在的编号（或上限以内的编号）发起完整抓取；
+完成台账按 (频道, 路径, 日期) 记录抓取进度，已完成的日期按主键直接跳过，未完成的从上次的编号继续
+"""
+import os
+import sqlite3
+import threading
+import time
+
+
+def encode_bitmap(ids):
+    """把编号集合编码为位图（第 n 位为 1 表示编号 n 存在）"""
+    ids = list(ids)
+    if not ids:
+        return b''
+    bitmap = bytearray(max(ids) // 8 + 1)
+    for n in ids:
+        bitmap[n // 8] |= 1 << (n % 8)
+    return bytes(bitmap)
+
+
+def decode_bitmap(bitmap):
+    """位图还原为升序编号列表"""
+    ids = []
+    for byte_index, byte in enumerate(bitmap):
+        if not byte:
+            continue
+        for bit in range(8):
+            if byte & (1 << bit):
+                ids.append(byte_index * 8 + bit)
+    return ids
+
+
+def find_id_ceiling(probe, max_id, tolerance=10):
+    """
+    指数 + 二分探测当天已发布的最大编号。
+    probe(ids) 接收编号列表，返回 {编号: 是否存在}；同一编号只探测一次。
+    编号之间允许最多 tolerance-1 个连续空缺：窗口 [n, n+tolerance) 内任一编号存在即认为 n 未超过上限。
+    返回最大的存在编号，当天没有任何文章时返回 0。
+    """
+    known = {}
+
+    def window(n):
+        ids = range(n, min(n + tolerance, max_id + 1))
+        missing = [k for k in ids if k not in known]
+        if missing:
+            known.update(probe(missing))
+        return any(known.get(k) for k in ids)
+
+    if not window(1):
+        return 0
+    good, n = 1, 2
+    while n <= max_id and window(n):
+        good, n = n, n * 2
+    bad = min(n, max_id + 1)
+    while bad - good > 1:
+        mid = (good + bad) // 2
+        if window(mid):
+            good = mid
+        else:
+            bad = mid
+    return max(k for k in range(good, min(good + tolerance, max_id + 1)) if known.get(k))
+
+
+class IdIndex:
+    """
+    基于 SQLite 的编号索引。
+    bitmaps 表：key（通常为 "路径|日期"）-> 存在位图、最大编号、是否已完结（完结的日期不再重新探测）。
+    ceilings 表：key（通常为日期）-> 当天最大编号、是否已完结。
+    id_history 表：(scope, 日期) -> 星期几、最大有效编号、最大空缺，供自适应停止条件学习。
+    ledger 表：(频道, 路径, 日期) -> 状态（partial / done）、最后处理完的编号、已找到的文章数。
+    """
+
+    def __init__(self, db_path):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        # 可重入：爬虫的 SIGINT 处理函数会写台账，而信号可能恰好在主线程持有锁时到达
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS bitmaps ('
+            ' key TEXT PRIMARY KEY, bitmap BLOB NOT NULL, max_id INTEGER NOT NULL,'
+            ' complete INTEGER NOT NULL, updated REAL NOT NULL)'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS ceilings ('
+            ' key TEXT PRIMARY KEY, ceiling INTEGER NOT NULL, complete INTEGER NOT NULL, updated REAL NOT NULL)'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS id_history ('
+            ' scope TEXT NOT NULL, date TEXT NOT NULL, weekday INTEGER NOT NULL,'
+            ' max_id INTEGER NOT NULL, max_gap INTEGER NOT NULL, PRIMARY KEY (scope, date))'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS ledger ('
+            ' channel TEXT NOT NULL, path TEXT NOT NULL, date TEXT NOT NULL, status TEXT NOT NULL,'
+            ' last_id INTEGER NOT NULL, found INTEGER NOT NULL, updated REAL NOT NULL,'
+            ' PRIMARY KEY (channel, path, date)) WITHOUT ROWID'
+        )
+        self._db.commit()
+
+    def get_ids(self, key, complete_only=True):
+        """返回已记录的存在编号列表；没有记录（或要求完结但尚未完结）时返回 None"""
+        with self._lock:
+            row = self._db.execute('SELECT bitmap, complete FROM bitmaps WHERE key = ?', (key,)).fetchone()
+        if row is None or (complete_only and not row[1]):
+            return None
+        return decode_bitmap(row[0])
+
+    def put_ids(self, key, ids, complete):
+        ids = sorted(ids)
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO bitmaps (key, bitmap, max_id, complete, updated) VALUES (?, ?, ?, ?, ?)',
+                (key, encode_bitmap(ids), ids[-1] if ids else 0, int(bool(complete)), time.time())
+            )
+            self._db.commit()
+
+    def get_ceiling(self, key, complete_only=True):
+        """返回已记录的最大编号；没有记录（或要求完结但尚未完结）时返回 None"""
+        with self._lock:
+            row = self._db.execute('SELECT ceiling, complete FROM ceilings WHERE key = ?', (key,)).fetchone()
+        if row is None or (complete_only and not row[1]):
+            return None
+        return row[0]
+
+    def put_ceiling(self, key, ceiling, complete):
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO ceilings (key, ceiling, complete, updated) VALUES (?, ?, ?, ?)',
+                (key, ceiling, int(bool(complete)), time.time())
+            )
+            self._db.commit()
+
+    def record_history(self, scope, date_str, weekday, max_id, max_gap):
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO id_history (scope, date, weekday, max_id, max_gap) VALUES (?, ?, ?, ?, ?)',
+                (scope, date_str, weekday, max_id, max_gap)
+            )
+            self._db.commit()
+
+    def get_history(self, scope, weekday=None):
+        """返回 [(最大有效编号, 最大空缺), ...]；weekday 不为 None 时只取同一星期几的记录"""
+        sql = 'SELECT max_id, max_gap FROM id_history WHERE scope = ?'
+        params = [scope]
+        if weekday is not None:
+            sql += ' AND weekday = ?'
+            params.append(weekday)
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def get_progress(self, channel, path, date_str):
+        """返回 (状态, 最后处理完的编号, 已找到的文章数)，没有记录时返回 None"""
+        with self._lock:
+            return self._db.execute(
+                'SELECT status, last_id, found FROM ledger WHERE channel = ? AND path = ? AND date = ?',
+                (channel, path, date_str)).fetchone()
+
+    def put_progress(self, channel, path, date_str, status, last_id, found):
+        self.put_progress_many([(channel, path, date_str, status, last_id, found)])
+
+    def put_progress_many(self, rows):
+        """rows 为 [(频道, 路径, 日期, 状态, 最后编号, 文章数), ...]，在同一个事务中写入"""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO ledger (channel, path, date, status, last_id, found, updated)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(*row, now) for row in rows]
+            )
+            self._db.commit()
+
+    def completed(self, channel):
+        """该频道已完成的 {(路径, 日期), ...}，供按日期跳过时做 O(1) 判断"""
+        with self._lock:
+            rows = self._db.execute("SELECT path, date FROM ledger WHERE channel = ? AND status = 'done'",
+                                    (channel,)).fetchall()
+        return set(rows)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
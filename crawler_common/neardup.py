@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+近似重复检测 - 对文章正文计算 MinHash 签名，按 LSH 分段放入桶中，各站点共用一个 SQLite 索引；
+保存文章前查询同桶的候选并按签名估计相似度，同一篇通稿小改后重发（包括其他站点转载）不再重复保存。
+已有的 data/ 目录用 crawler_common.dedupcorpus 一次性去重
+"""
+import atexit
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+
+DEFAULT_DB_PATH = 'crawler_neardup.sqlite3'
+# 估计相似度不低于该值视为近似重复
+DEFAULT_THRESHOLD = 0.8
+
+# 梅森素数 2^61-1，作为 MinHash 排列 (a*x+b) mod p 的模数
+_PRIME = (1 << 61) - 1
+_SPACES = re.compile(r'\s+')
+
+
+def shingles(text, k=5):
+    """正文的字符 k-gram 集合（转小写、空白合并）；对中日文和拼音文字都适用，不需要分词"""
+    text = _SPACES.sub(' ', text.lower()).strip()
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def _shingle_hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _permutations(num_perm, seed):
+    rng = random.Random(seed)
+    return [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+
+def lsh_params(threshold, num_perm):
+    """
+    选择分段数 bands 和每段行数 rows（bands * rows <= num_perm），
+    使相似度在 threshold 两侧被误判的概率之和（按相似度积分）最小
+    """
+    def probability(s, b, r):
+        return 1 - (1 - s ** r) ** b
+
+    def integrate(f, lo, hi, steps=100):
+        width = (hi - lo) / steps
+        return sum(f(lo + (i + 0.5) * width) for i in range(steps)) * width
+
+    best = None
+    for b in range(1, num_perm + 1):
+        for r in range(1, num_perm // b + 1):
+            false_positive = integrate(lambda s: probability(s, b, r), 0.0, threshold)
+            false_negative = integrate(lambda s: 1 - probability(s, b, r), threshold, 1.0)
+            error = false_positive + false_negative
+            if best is None or error < best[0]:
+                best = (error, b, r)
+    return best[1], best[2]
+
+
+class NearDupIndex:
+    """
+    docs 表：每篇已保存文章的站点、链接、标题和 MinHash 签名；buckets 表：(分段, 桶哈希) -> 文章，带主键索引。
+    check(site, url, title, content) 只查询不写入：估计相似度不低于 threshold 的最相似文章作为 dict 返回
+    （site, url, title, similarity），没有时返回 None，签名暂存在本进程内，之后检查的文章也会与它比较
+    （同一批尚未保存的文章之间不会漏掉重复）。文章写入文件后再调用 add() 记入索引；
+    进程中断或没有保存的文章不会留在索引里，下次运行不会被误判为重复。同一链接只记录一次，不与自己比较。
+    num_perm、bands、rows 在索引创建时确定并保存在 meta 表中，之后打开时沿用；threshold 每次打开都可以调整。
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, threshold=DEFAULT_THRESHOLD, num_perm=64, shingle_size=5, seed=1):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.checked = Counter()
+        self.duplicates = Counter()
+        self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS docs ('
+            ' doc_id INTEGER PRIMARY KEY, site TEXT NOT NULL, url TEXT NOT NULL UNIQUE, title TEXT,'
+            ' signature BLOB NOT NULL, added REAL NOT NULL)'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS buckets ('
+            ' band INTEGER NOT NULL, bucket INTEGER NOT NULL, doc_id INTEGER NOT NULL,'
+            ' PRIMARY KEY (band, bucket, doc_id)) WITHOUT ROWID'
+        )
+        meta = dict(self._db.execute('SELECT name, value FROM meta').fetchall())
+        if meta:
+            self.num_perm = int(meta['num_perm'])
+            self.bands = int(meta['bands'])
+            self.rows = int(meta['rows'])
+            self.shingle_size = int(meta['shingle_size'])
+            seed = int(meta['seed'])
+        else:
+            self.num_perm = num_perm
+            self.bands, self.rows = lsh_params(threshold, num_perm)
+            self.shingle_size = shingle_size
+            self._db.executemany('INSERT INTO meta (name, value) VALUES (?, ?)', [
+                ('num_perm', str(self.num_perm)), ('bands', str(self.bands)), ('rows', str(self.rows)),
+                ('shingle_size', str(self.shingle_size)), ('seed', str(seed)),
+            ])
+        self._db.commit()
+        self._perms = _permutations(self.num_perm, seed)
+        # 已检查、尚未 add() 的文章：链接 -> (站点, 标题, 签名)，以及它们的 (分段, 桶哈希) -> 链接
+        self._pending = {}
+        self._pending_buckets = defaultdict(set)
+        atexit.register(self.close)
+
+    def signature(self, content):
+        """正文的 MinHash 签名（num_perm 个整数）；正文为空时返回 None"""
+        hashes = [_shingle_hash(s) for s in shingles(content, self.shingle_size)]
+        if not hashes:
+            return None
+        return [min((a * x + b) % _PRIME for x in hashes) for a, b in self._perms]
+
+    def _bucket_keys(self, sig):
+        for band in range(self.bands):
+            rows = array('Q', sig[band * self.rows:(band + 1) * self.rows]).tobytes()
+            # SQLite 的整数为有符号 64 位
+            yield band, int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), 'little', signed=True)
+
+    @staticmethod
+    def similarity(sig_a, sig_b):
+        """两个签名估计的 Jaccard 相似度"""
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+    def _query(self, sig, url):
+        keys = list(self._bucket_keys(sig))
+        candidates = set()
+        for band, bucket in keys:
+            candidates.update(doc_id for (doc_id,) in self._db.execute(
+                'SELECT doc_id FROM buckets WHERE band = ? AND bucket = ?', (band, bucket)))
+        found = []
+        for doc_id in candidates:
+            found.append(self._db.execute(
+                'SELECT site, url, title, signature FROM docs WHERE doc_id = ?', (doc_id,)).fetchone())
+        pending_urls = set()
+        for key in keys:
+            pending_urls.update(self._pending_buckets.get(key, ()))
+        for pending_url in pending_urls:
+            site, title, pending_sig = self._pending[pending_url]
+            found.append((site, pending_url, title, pending_sig))
+        best = None
+        for site, doc_url, title, other in found:
+            if doc_url == url:
+                continue
+            score = self.similarity(sig, array('Q', other) if isinstance(other, bytes) else other)
+            if score >= self.threshold and (best is None or score > best['similarity']):
+                best = {'site': site, 'url': doc_url, 'title': title, 'similarity': score}
+        return best
+
+    def query(self, content, url=None):
+        """只查询不记录，返回最相似的近似重复文章或 None"""
+        sig = self.signature(content)
+        if sig is None:
+            return None
+        with self._lock:
+            return self._query(sig, url)
+
+    def check(self, site, url, title, content):
+        """查询近似重复，不写入索引，见类说明；正文为空时不检查"""
+        sig = self.signature(content)
+        if sig is None:
+            return None
+        with self._lock:
+            self.checked[site] += 1
+            match = self._query(sig, url)
+            if match:
+                self.duplicates[site] += 1
+                return match
+            if url not in self._pending:
+                self._pending[url] = (site, title, sig)
+                for key in self._bucket_keys(sig):
+                    self._pending_buckets[key].add(url)
+            return None
+
+    def add(self, site, url, title='', content=None):
+        """
+        文章写入文件后记入索引，返回是否为新记录。check() 过的文章直接使用暂存的签名，
+        否则由 content 计算；链接已在索引中时不重复计算
+        """
+        with self._lock:
+            pending = self._pending.pop(url, None)
+            if pending is not None:
+                site, title, sig = pending
+                for key in self._bucket_keys(sig):
+                    self._pending_buckets[key].discard(url)
+                    if not self._pending_buckets[key]:
+                        del self._pending_buckets[key]
+            elif self._db.execute('SELECT 1 FROM docs WHERE url = ?', (url,)).fetchone():
+                return False
+        if pending is None:
+            sig = self.signature(content or '')
+            if sig is None:
+                return False
+        with self._lock:
+            cursor = self._db.execute(
+                'INSERT OR IGNORE INTO docs (site, url, title, signature, added) VALUES (?, ?, ?, ?, ?)',
+                (site, url, title, array('Q', sig).tobytes(), time.time()))
+            new = cursor.rowcount == 1
+            if new:
+                self._db.executemany('INSERT OR IGNORE INTO buckets (band, bucket, doc_id) VALUES (?, ?, ?)',
+                                     [(band, bucket, cursor.lastrowid) for band, bucket in self._bucket_keys(sig)])
+            self._db.commit()
+            return new
+
+    @staticmethod
+    def article_url(art):
+        """文章（爬虫通用的 title / content / sources.origin_url 结构）在索引中的键，没有链接时用标题"""
+        return art.get('sources', {}).get('origin_url') or art.get('title', '')
+
+    def filter_articles(self, site, articles):
+        """保存前过滤一批文章（爬虫通用结构），返回不重复的部分；写入文件后对返回的文章调用 add_articles()"""
+        kept = []
+        for art in articles:
+            match = self.check(site, self.article_url(art), art.get('title', ''), art.get('content', ''))
+            if match:
+                print(f"  × 近似重复（相似度 {match['similarity']:.2f}）: {art.get('title')} ≈ "
+                      f"[{match['site']}] {match['title']}")
+                continue
+            kept.append(art)
+        return kept
+
+    def add_articles(self, site, articles):
+        """已写入文件的文章记入索引"""
+        for art in articles:
+            self.add(site, self.article_url(art), art.get('title', ''), art.get('content', ''))
+
+    def count(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM docs').fetchone()[0]
+
+    def describe(self, site=None):
+        sites = [site] if site else sorted(self.checked)
+        detail = '，'.join(f"{s} 检查 {self.checked[s]} 篇、重复 {self.duplicates[s]} 篇" for s in sites)
+        return (f"近似去重：索引 {self.count()} 篇（阈值 {self.threshold}，{self.bands}×{self.rows} 分段），"
+                f"{detail or '本次未检查'}")
+
+    def close(self):
+        with self._lock:
+            try:
+                self._db.commit()
+                self._db.close()
+            except sqlite3.ProgrammingError:
+                # 已经关闭
+                pass
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_index():
+    """各站点爬虫共用的索引（DEFAULT_DB_PATH、DEFAULT_THRESHOLD），同一进程内只打开一次"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = NearDupIndex()
+        return _shared
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+HTML 解析层 - 各站点提取函数统一通过 make_soup() 构建 BeautifulSoup，
+解析后端默认为 html.parser（与原来的提取结果一致），lxml（C 实现）按站点在 SITE_BACKENDS 中显式启用，
+或在调用时传入 backend；文章页可按站点的提取规则（SITE_SPECS）只构建需要的子树
+"""
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+BACKENDS = ('lxml', 'html.parser')
+
+
+def _backend_available(name):
+    if name == 'html.parser':
+        return True
+    try:
+        __import__(name)
+    except ImportError:
+        return False
+    return True
+
+
+def available_backends():
+    return [name for name in BACKENDS if _backend_available(name)]
+
+
+# 两种后端对未闭合标签构建的树不同，默认保持 html.parser；
+# 某个站点用 python -m crawler_common.benchparse --compare 核对保存的页面输出一致后，再在 SITE_BACKENDS 中改用 lxml
+DEFAULT_BACKEND = 'html.parser'
+SITE_BACKENDS = {}
+
+
+def resolve_backend(backend=None):
+    """backend 为 None 时返回默认后端；指定的后端未安装时退回 html.parser"""
+    if backend is None:
+        return DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的解析后端: {backend}，可选: {', '.join(BACKENDS)}")
+    return backend if _backend_available(backend) else 'html.parser'
+
+
+def make_soup(markup, backend=None, parse_only=None):
+    """
+    构建 BeautifulSoup；parse_only 可传入 SoupStrainer，只保留需要的子树。
+    未指定 backend 时使用 site_strainer() 所带的站点后端，没有时使用 DEFAULT_BACKEND
+    """
+    if backend is None:
+        backend = getattr(parse_only, 'backend', None)
+    return BeautifulSoup(markup, resolve_backend(backend), parse_only=parse_only)
+
+
+class TagStrainer(SoupStrainer):
+    """
+    rules 为 [(标签名, class), ...]，任一规则匹配的标签连同整个子树被保留，其余节点不构建。
+    class 为 None 表示不限；为字符串时要求包含该 class；也可以是正则，匹配任一 class 即可。
+    同时兼容 bs4 4.13 之前的 search_tag() 和之后的 allow_tag_creation() 接口。
+    """
+
+    def __init__(self, rules, backend=None):
+        self.backend = backend
+        self.rules = [(name, re.compile(re.escape(cls) + '$') if isinstance(cls, str) else cls)
+                      for name, cls in rules]
+        # 传入标签名列表，使顶层的文本节点被丢弃
+        super().__init__(sorted({name for name, _ in rules}))
+
+    def allows(self, name, attrs):
+        classes = (attrs or {}).get('class') or ''
+        if isinstance(classes, str):
+            classes = classes.split()
+        for rule_name, pattern in self.rules:
+            if rule_name != name:
+                continue
+            if pattern is None or any(pattern.match(c) for c in classes):
+                return True
+        return False
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self.allows(name, attrs)
+
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        if isinstance(markup_name, str):
+            return self.allows(markup_name, markup_attrs)
+        return super().search_tag(markup_name, markup_attrs)
+
+
+# 各站点文章页提取时用到的全部元素，需与对应爬虫中的 find()/find_all() 保持一致
+SITE_SPECS = {
+    'fijitimes': [
+        ('h1', 'fijitimes_title'),
+        ('div', 'fijitimes_post__info'),
+        ('div', 'entry-content'),
+    ],
+    'cna': [
+        ('div', 'breadcrumb'),
+        ('h1', None),
+        ('div', 'paragraph'),
+        ('div', 'updatetime'),
+        ('div', 'names'),
+    ],
+    'yomiuri': [
+        ('h1', None),
+        ('p', re.compile(r'par\d+$')),
+        ('div', 'article-body'),
+        ('article', None),
+        ('div', 'content'),
+        ('time', None),
+        ('span', 'date'),
+        ('div', 'article-author__item'),
+        ('span', 'author'),
+    ],
+}
+
+
+def site_strainer(site, backend=None):
+    """站点文章页的 TagStrainer；backend 未指定时取 SITE_BACKENDS 中该站点的设置"""
+    return TagStrainer(SITE_SPECS[site], backend or SITE_BACKENDS.get(site))
+
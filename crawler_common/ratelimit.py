@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+按主机的令牌桶限速器 - 替代各爬虫中固定的 sleep，请求慢时不再额外叠加等待
+"""
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """令牌桶：rate 为每秒补充的令牌数（即每秒请求数），burst 为桶容量"""
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError('rate 必须大于0')
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """预占一个令牌，返回调用方需要等待的秒数（0 表示可以立即发送）"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """阻塞直到取得一个令牌"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class HostRateLimiter:
+    """
+    每个主机一个令牌桶。
+    rate/burst 为默认配置，overrides 可按主机单独指定 {host: (rate, burst)}。
+    """
+
+    def __init__(self, rate=1.0, burst=1, overrides=None):
+        self.rate = rate
+        self.burst = burst
+        self.overrides = {host.lower(): conf for host, conf in (overrides or {}).items()}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host):
+        host = host.lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, burst = self.overrides.get(host, (self.rate, self.burst))
+                bucket = self._buckets[host] = TokenBucket(rate, burst)
+            return bucket
+
+    def acquire(self, url):
+        """url 可以是完整URL或主机名；阻塞直到该主机放行，返回实际等待的秒数"""
+        host = urlsplit(url).netloc or url
+        return self.bucket(host).acquire()
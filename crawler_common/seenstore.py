@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+去重记录库 - 各站点爬虫共用一个 SQLite 文件，按 (站点, 键) 建主键索引，
+按需查询是否已爬取，写入攒批提交；取代每个站点一份、启动时整份读入内存的标题/哈希文本文件。
+同一文件中的 URL 索引记录每个文章链接的处理结果，抓取前先过滤，已处理过的链接不再发出请求
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .fingerprint import fingerprint
+
+# 规范化 URL 时去掉的跟踪参数（小写）；以 utm_ 开头的参数也会去掉
+TRACKING_PARAMS = ('fbclid', 'gclid', 'yclid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'cmpid')
+
+# URL 的复查周期（秒）：status -> 间隔，None 或未列出表示不再请求。
+# saved / duplicate 的文章内容不会变化；invalid（页面正常返回但解析不出文章，如专题页、尚未发布完的页面）隔一天再看
+URL_RECHECK = {'invalid': 24 * 3600}
+
+# 一条 IN (...) 查询中的 URL 数，低于 SQLite 的变量个数上限
+_QUERY_CHUNK = 500
+
+
+def normalize_url(url):
+    """
+    URL 索引使用的规范形式：协议和主机名小写，去掉默认端口、片段、跟踪参数和末尾的斜杠，其余查询参数按名称排序。
+    同一篇文章从列表页、接口和分享链接得到的不同写法会落到同一个键上
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme, netloc.rpartition(':')[2]) in (('http', '80'), ('https', '443')):
+        netloc = netloc.rpartition(':')[0]
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMS)
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+class SeenStore:
+    """
+    seen 表：(site, key) -> 首次记录时间。key 通常是文章标题（或其哈希）。
+    add(site, key) 在同一条 INSERT OR IGNORE 中完成“检查并记录”，多个频道线程同时调用也不会重复；
+    写入留在当前事务中，每 batch_size 条或 flush_interval 秒（后台线程定时检查）提交一次，进程退出时自动提交剩余部分。
+    同一连接内未提交的记录对 contains()/add() 立即可见。多个爬虫进程可共用同一个文件（WAL 模式）。
+    urls 表：(site, 规范化 URL) -> 处理结果与最后检查时间。unseen_urls() 在抓取前过滤掉已处理且未到复查时间的链接，
+    mark_url() 在解析后记录结果；请求失败的链接不要记录，下次运行会重新请求。url_recheck 为复查周期，默认 URL_RECHECK。
+    fingerprints 为 {站点: FingerprintSet}：这些站点的标题只需判断是否出现过，claim_title() 把标题记在指纹集合中
+    （每条 8 字节），不写 seen 表；需要取回原标题的站点（如 rg.ru 从标题中读日期）不传。
+    """
+
+    def __init__(self, db_path='crawler_seen.sqlite3', batch_size=50, flush_interval=5.0, url_recheck=None,
+                 fingerprints=None):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.url_recheck = URL_RECHECK if url_recheck is None else url_recheck
+        self.fingerprints = dict(fingerprints or {})
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self.hits = Counter()
+        self.added = Counter()
+        self.url_skipped = Counter()
+        self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS seen ('
+            ' site TEXT NOT NULL, key TEXT NOT NULL, first_seen REAL NOT NULL,'
+            ' PRIMARY KEY (site, key)) WITHOUT ROWID'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS imports ('
+            ' site TEXT NOT NULL, path TEXT NOT NULL, rows INTEGER NOT NULL, imported REAL NOT NULL,'
+            ' PRIMARY KEY (site, path))'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS urls ('
+            ' site TEXT NOT NULL, url TEXT NOT NULL, status TEXT NOT NULL,'
+            ' first_seen REAL NOT NULL, last_checked REAL NOT NULL,'
+            ' PRIMARY KEY (site, url)) WITHOUT ROWID'
+        )
+        self._db.commit()
+        self._closed = threading.Event()
+        # 没有新写入时也按时提交，避免未提交的事务长时间占住写锁，挡住其他爬虫进程
+        threading.Thread(target=self._flush_loop, name='SeenStore', daemon=True).start()
+        atexit.register(self.close)
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                if self._pending and not self._closed.is_set():
+                    self._db.commit()
+                    self._pending = 0
+                    self._last_flush = time.monotonic()
+
+    def _maybe_flush(self):
+        if self._pending >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self._db.commit()
+            self._pending = 0
+            self._last_flush = time.monotonic()
+
+    def contains(self, site, key):
+        with self._lock:
+            row = self._db.execute('SELECT 1 FROM seen WHERE site = ? AND key = ?', (site, key)).fetchone()
+            if row is not None:
+                self.hits[site] += 1
+        return row is not None
+
+    def add(self, site, key):
+        """记录 key，返回是否为新记录"""
+        with self._lock:
+            cursor = self._db.execute('INSERT OR IGNORE INTO seen (site, key, first_seen) VALUES (?, ?, ?)',
+                                      (site, key, time.time()))
+            new = cursor.rowcount == 1
+            if new:
+                self._pending += 1
+                self.added[site] += 1
+                self._maybe_flush()
+            else:
+                self.hits[site] += 1
+            return new
+
+    def count(self, site):
+        if site in self.fingerprints:
+            return len(self.fingerprints[site])
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM seen WHERE site = ?', (site,)).fetchone()[0]
+
+    def keys(self, site):
+        """该站点的全部键，按记录时间排序"""
+        with self._lock:
+            rows = self._db.execute('SELECT key FROM seen WHERE site = ? ORDER BY first_seen', (site,)).fetchall()
+        return [key for (key,) in rows]
+
+    def import_lines(self, site, path):
+        """
+        把旧的文本去重文件（每行一条）导入到该站点，同一文件只导入一次；返回导入的行数，已导入过或文件不存在时返回 0。
+        导入后原文件不再被读取或写入，可以保留备查。
+        """
+        if not os.path.exists(path):
+            return 0
+        with self._lock:
+            done = self._db.execute('SELECT 1 FROM imports WHERE site = ? AND path = ?',
+                                    (site, os.path.abspath(path))).fetchone()
+        if done:
+            return 0
+        now = time.time()
+        with open(path, 'r', encoding='utf-8') as f:
+            keys = [(site, line.strip(), now) for line in f if line.strip()]
+        with self._lock:
+            self._db.executemany('INSERT OR IGNORE INTO seen (site, key, first_seen) VALUES (?, ?, ?)', keys)
+            self._db.execute('INSERT INTO imports (site, path, rows, imported) VALUES (?, ?, ?, ?)',
+                             (site, os.path.abspath(path), len(keys), now))
+            self._db.commit()
+            self._pending = 0
+        return len(keys)
+
+    def unseen_urls(self, site, urls):
+        """
+        返回 urls 中需要请求的链接（保持顺序，规范化后相同的只保留第一个）：
+        URL 索引中没有的，或者其状态的复查周期已到的。其余的计入 url_skipped，不产生任何网络请求
+        """
+        keys = {}
+        for url in urls:
+            keys.setdefault(normalize_url(url), url)
+        known = {}
+        key_list = list(keys)
+        with self._lock:
+            for i in range(0, len(key_list), _QUERY_CHUNK):
+                chunk = key_list[i:i + _QUERY_CHUNK]
+                rows = self._db.execute(
+                    f'SELECT url, status, last_checked FROM urls WHERE site = ? AND url IN ({",".join("?" * len(chunk))})',
+                    (site, *chunk)).fetchall()
+                known.update((key, (status, checked)) for key, status, checked in rows)
+        now = time.time()
+        pending = []
+        for key, url in keys.items():
+            if key in known:
+                status, checked = known[key]
+                interval = self.url_recheck.get(status)
+                if interval is None or now - checked < interval:
+                    continue
+            pending.append(url)
+        with self._lock:
+            self.url_skipped[site] += len(keys) - len(pending)
+        return pending
+
+    def mark_url(self, site, url, status):
+        """记录 url 的处理结果（saved / duplicate / invalid 等），并把最后检查时间设为现在"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO urls (site, url, status, first_seen, last_checked) VALUES (?, ?, ?, ?, ?)'
+                ' ON CONFLICT (site, url) DO UPDATE SET status = excluded.status, last_checked = excluded.last_checked',
+                (site, normalize_url(url), status, now, now))
+            self._pending += 1
+            self._maybe_flush()
+
+    def claim_title(self, site, title, url=None):
+        """
+        标题未出现过时记录并返回 True；检查与写入是同一条语句，多个频道同时认领同一标题时只有一个成功。
+        url 不为空时同时把文章链接记入 URL 索引（saved / duplicate），之后的运行不再请求该链接
+        """
+        titles = self.fingerprints.get(site)
+        if titles is None:
+            new = self.add(site, title)
+        else:
+            new = titles.add(fingerprint(title))
+            with self._lock:
+                (self.added if new else self.hits)[site] += 1
+        if url:
+            self.mark_url(site, url, 'saved' if new else 'duplicate')
+        return new
+
+    def mark_unparsed(self, site, result):
+        """抓取结果（FetchResult）正常返回却解析不出文章时记为 invalid，按复查周期再检查；请求失败的不记录，下次运行重试"""
+        if result.error is None and result.status_code == 200:
+            self.mark_url(site, result.url, 'invalid')
+
+    def url_count(self, site):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM urls WHERE site = ?', (site,)).fetchone()[0]
+
+    def flush(self):
+        with self._lock:
+            self._db.commit()
+            self._pending = 0
+            self._last_flush = time.monotonic()
+
+    def stats(self):
+        """各站点的累计记录数和 URL 索引条数，以及本进程内的重复命中数、新增数和免请求的链接数"""
+        with self._lock:
+            totals = dict(self._db.execute('SELECT site, COUNT(*) FROM seen GROUP BY site').fetchall())
+            urls = dict(self._db.execute('SELECT site, COUNT(*) FROM urls GROUP BY site').fetchall())
+        totals.update((site, len(titles)) for site, titles in self.fingerprints.items())
+        return {
+            site: {'total': totals.get(site, 0), 'hits': self.hits[site], 'added': self.added[site],
+                   'urls': urls.get(site, 0), 'url_skipped': self.url_skipped[site]}
+            for site in totals.keys() | urls.keys()
+        }
+
+    def describe(self, site):
+        info = self.stats().get(site, {'total': 0, 'hits': 0, 'added': 0, 'urls': 0, 'url_skipped': 0})
+        return (f"去重库 {site}：累计 {info['total']} 条，本次新增 {info['added']} 条，重复命中 {info['hits']} 次；"
+                f"URL 索引 {info['urls']} 条，本次免请求 {info['url_skipped']} 个")
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            try:
+                self._db.commit()
+                self._db.close()
+            except sqlite3.ProgrammingError:
+                # 已经关闭
+                pass
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+共享的 HTTP 会话工厂 - 连接池复用（keep-alive）、urllib3 重试退避、统一默认请求头
+"""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+# 限流与服务端临时错误时按退避重试
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def create_session(headers=None, pool_maxsize=4, pool_connections=4, retries=3, backoff_factor=1.0,
+                   status_forcelist=RETRY_STATUS, verify=True):
+    """
+    创建带连接池和重试的 requests.Session。
+    pool_maxsize 为每个主机保持的连接数，应不小于抓取引擎的 max_per_host；
+    pool_connections 为缓存的主机连接池个数。headers 会覆盖 DEFAULT_HEADERS 中的同名项。
+    交给 AsyncFetcher 的会话应传入 status_forcelist=()，429/5xx 由引擎重试，每次重试都经过限速和并发控制。
+    """
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    if headers:
+        session.headers.update(headers)
+    session.verify = verify
+
+    # urllib3 对带 Retry-After 的 413/429/503 不论 status_forcelist 都会重试，关闭状态码重试时一并关闭
+    retry_status = bool(status_forcelist)
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries if retry_status else 0,
+        backoff_factor=backoff_factor,
+        status_forcelist=status_forcelist,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=retry_status,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+自适应停止条件 - 根据历史上每个路径的最大有效编号和最大空缺，决定编号枚举何时可以提前结束
+"""
+import math
+
+
+def quantile(values, q):
+    """线性插值分位数，values 为空时返回 None"""
+    if not values:
+        return None
+    values = sorted(values)
+    pos = (len(values) - 1) * q
+    lower = int(math.floor(pos))
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (pos - lower)
+
+
+def max_gap(ids):
+    """升序编号列表中最长的连续空缺（含从 1 开始的前导空缺）"""
+    gap, previous = 0, 0
+    for n in ids:
+        gap = max(gap, n - previous - 1)
+        previous = n
+    return gap
+
+
+class AdaptiveStop:
+    """
+    history 为 [(最大有效编号, 最大空缺), ...]，优先传入同一星期几的记录。
+    样本数不少于 min_samples 时：
+      预测上限 = 历史最大编号的 q 分位数 × margin；
+      超过预测上限后，连续 tail_misses 个无效即停止（tail_misses 取历史空缺的 q 分位数，不少于 min_misses）。
+    样本不足或尚未超过预测上限时，沿用固定的 max_misses。
+    """
+
+    def __init__(self, history, max_misses=150, min_misses=5, margin=1.2, q=0.95, min_samples=5):
+        self.max_misses = max_misses
+        self.samples = len(history)
+        self.ceiling = None
+        self.tail_misses = max_misses
+        if self.samples >= min_samples:
+            self.ceiling = int(math.ceil(quantile([h[0] for h in history], q) * margin))
+            gap = quantile([h[1] for h in history], q)
+            self.tail_misses = min(max_misses, max(min_misses, int(math.ceil(gap * margin))))
+
+    def should_stop(self, current_id, consecutive_misses):
+        if consecutive_misses >= self.max_misses:
+            return True
+        return self.ceiling is not None and current_id > self.ceiling and consecutive_misses >= self.tail_misses
+
+    def report(self):
+        """可读的置信度说明"""
+        if self.ceiling is None:
+            return f"历史样本 {self.samples} 个，不足以建模，使用固定阈值 {self.max_misses}"
+        level = '高' if self.samples >= 20 else '中'
+        return (f"历史样本 {self.samples} 个（置信度{level}），预测上限 {self.ceiling}，"
+                f"超过上限后连续 {self.tail_misses} 个无效即停止")
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+“加载更多”接口重放 - Selenium 点击一次“加载更多”时，从 Chrome 性能日志中记录它发出的数据请求，
+识别其中的分页参数（page / offset 等）并保存为模板；之后的运行直接通过 HTTP 按模板并发请求多页，
+翻页不再需要浏览器
+"""
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 按“第几页”递增的参数名，步长为 1
+PAGE_PARAMS = ('page', 'p', 'paged', 'pageNumber', 'page_number', 'pageNo', 'pageIndex', 'pn')
+# 按“跳过条数”递增的参数名，步长为每页条数
+OFFSET_PARAMS = ('offset', 'from', 'start', 'skip')
+SIZE_PARAMS = ('limit', 'size', 'per_page', 'perPage', 'pageSize', 'page_size', 'count', 'rows', 'num')
+# 重放时保留的请求头（小写）；以 x- 开头的自定义头也会保留，Cookie 与 User-Agent 交给会话
+KEEP_HEADERS = ('accept', 'content-type', 'referer', 'origin', 'authorization')
+
+
+def enable_performance_log(options):
+    """在创建 WebDriver 之前对 ChromeOptions 调用，开启性能日志（其中包含 Network 事件）"""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+
+def captured_xhr(driver, host=None):
+    """
+    读取并清空性能日志，返回其间发出的 XHR/Fetch 请求 [{url, method, headers, body}, ...]。
+    host 不为空时只保留该主机（或其子域名）的请求。未开启性能日志时返回空列表。
+    """
+    try:
+        entries = driver.get_log('performance')
+    except Exception:
+        return []
+    requests = []
+    for entry in entries:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+        if message.get('method') != 'Network.requestWillBeSent':
+            continue
+        params = message.get('params', {})
+        if params.get('type') not in ('XHR', 'Fetch'):
+            continue
+        request = params.get('request', {})
+        url = request.get('url', '')
+        netloc = urlsplit(url).netloc.lower()
+        if host and netloc != host and not netloc.endswith('.' + host):
+            continue
+        requests.append({
+            'url': url,
+            'method': request.get('method', 'GET'),
+            'headers': request.get('headers', {}),
+            'body': request.get('postData'),
+        })
+    return requests
+
+
+def _as_int(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+def _find_paging(params):
+    """
+    params 为 {名称: 值}，返回 (参数名, 当前值, 步长)；找不到可递增的分页参数时返回 None。
+    offset 类参数的步长取同一请求中的每页条数，没有时取当前值（第一次“加载更多”的 offset 即为每页条数）。
+    """
+    for name in PAGE_PARAMS:
+        value = _as_int(params.get(name))
+        if value is not None:
+            return name, value, 1
+    for name in OFFSET_PARAMS:
+        value = _as_int(params.get(name))
+        if value is None:
+            continue
+        size = next((_as_int(params.get(s)) for s in SIZE_PARAMS if _as_int(params.get(s))), None)
+        step = size or value
+        if step > 0:
+            return name, value, step
+    return None
+
+
+class XhrTemplate:
+    """
+    一个可重放的分页请求。location 表示分页参数所在位置：query（URL查询串）、form（表单请求体）或 json（JSON请求体）。
+    request(k) 返回第 k 个后续页面的 (url, options)，k=0 即捕获到的那一页，可直接交给 AsyncFetcher.iter_fetch()。
+    """
+
+    def __init__(self, url, method, headers, body, location, param, value, step):
+        self.url = url
+        self.method = method
+        self.headers = headers
+        self.body = body
+        self.location = location
+        self.param = param
+        self.value = value
+        self.step = step
+
+    @classmethod
+    def from_capture(cls, requests):
+        """从 captured_xhr() 的结果中挑出第一个带分页参数的请求构建模板，没有时返回 None"""
+        for request in requests:
+            headers = {k: v for k, v in request['headers'].items()
+                       if k.lower() in KEEP_HEADERS or k.lower().startswith('x-')}
+            query = dict(parse_qsl(urlsplit(request['url']).query, keep_blank_values=True))
+            candidates = [('query', query)]
+            body = request.get('body')
+            if body:
+                try:
+                    data = json.loads(body)
+                except ValueError:
+                    candidates.append(('form', dict(parse_qsl(body, keep_blank_values=True))))
+                else:
+                    if isinstance(data, dict):
+                        candidates.append(('json', data))
+            for location, params in candidates:
+                paging = _find_paging(params)
+                if paging:
+                    return cls(request['url'], request['method'], headers, body, location, *paging)
+        return None
+
+    def request(self, k):
+        value = self.value + self.step * k
+        options = {'headers': self.headers} if self.headers else {}
+        url = self.url
+        if self.location == 'query':
+            parts = urlsplit(url)
+            query = [(name, str(value) if name == self.param else v)
+                     for name, v in parse_qsl(parts.query, keep_blank_values=True)]
+            url = urlunsplit(parts._replace(query=urlencode(query)))
+            if self.body:
+                options['data'] = self.body
+        elif self.location == 'form':
+            form = [(name, str(value) if name == self.param else v)
+                    for name, v in parse_qsl(self.body, keep_blank_values=True)]
+            options['data'] = urlencode(form)
+        else:
+            data = json.loads(self.body)
+            # 保持原来的类型：捕获时是字符串就仍用字符串
+            data[self.param] = str(value) if isinstance(data[self.param], str) else value
+            options['data'] = json.dumps(data, ensure_ascii=False)
+        return url, options
+
+    def to_dict(self):
+        return {'url': self.url, 'method': self.method, 'headers': self.headers, 'body': self.body,
+                'location': self.location, 'param': self.param, 'value': self.value, 'step': self.step}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['url'], data['method'], data['headers'], data['body'],
+                   data['location'], data['param'], data['value'], data['step'])
+
+    def describe(self):
+        return f"{self.method} {urlsplit(self.url).path} {self.param}={self.value}（步长 {self.step}，{self.location}）"
+
+
+class XhrTemplateStore:
+    """按频道保存的重放模板（JSON 文件）；重放失效时 drop() 删除，下次 Selenium 翻页时重新捕获"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data):
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key):
+        with self._lock:
+            data = self._load().get(key)
+        return XhrTemplate.from_dict(data) if data else None
+
+    def put(self, key, template):
+        with self._lock:
+            data = self._load()
+            data[key] = dict(template.to_dict(), captured=time.time())
+            self._save(data)
+
+    def drop(self, key):
+        with self._lock:
+            data = self._load()
+            if data.pop(key, None) is not None:
+                self._save(data)
+
+
+def links_in_text(text, pattern):
+    """
+    从接口响应（JSON 或 HTML 片段）中提取文章链接：先还原 JSON 转义的斜杠，
+    再返回 pattern 第一个分组（没有分组时为整个匹配）的去重列表，保持出现顺序
+    """
+    text = text.replace('\\/', '/').replace('\\u002F', '/')
+    seen = {}
+    for m in pattern.finditer(text):
+        seen.setdefault(m.group(1) if pattern.groups else m.group(0), None)
+    return list(seen)
+
+
+def replay_pages(fetcher, template, extract, batch=4, max_pages=50):
+    """
+    按模板每批并发请求 batch 页，逐批返回本批新出现的链接列表。
+    extract(text) 从响应正文中提取链接。整批没有新链接、或某一页请求失败时停止；
+    第一批就全部失败或没有任何链接时抛出 ValueError，表示模板可能已经失效。
+    """
+    seen = set()
+    k = 0
+    while k < max_pages:
+        pages = [template.request(i) for i in range(k, min(k + batch, max_pages))]
+        k += len(pages)
+        new_links = []
+        failed = False
+        for result in fetcher.iter_fetch(pages, ordered=True, method=template.method):
+            if result.error is not None or result.status_code != 200:
+                failed = True
+                continue
+            for link in extract(result.response.text):
+                if link not in seen:
+                    seen.add(link)
+                    new_links.append(link)
+        if not seen:
+            raise ValueError(f"重放模板未返回任何链接: {template.describe()}")
+        if new_links:
+            yield new_links
+        if failed or not new_links:
+            return
+
+
+def capture_template(driver, store, key, host):
+    """在“加载更多”点击并等待之后调用：从性能日志中识别分页请求并保存，返回模板或 None"""
+    template = XhrTemplate.from_capture(captured_xhr(driver, host))
+    if template is not None:
+        store.put(key, template)
+        print(f"📡 已记录“加载更多”接口: {template.describe()}")
+    return template
+
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""AdaptiveConcurrency（AIMD）的测试"""
+import pytest
+import requests
+
+from crawler_common import concurrency
+from crawler_common.concurrency import AdaptiveConcurrency
+
+
+class Result:
+    """只包含 record() 用到的字段的 FetchResult 替身"""
+
+    def __init__(self, status_code=200, error=None, elapsed=0.1):
+        self.status_code = status_code
+        self.error = error
+        self.elapsed = elapsed
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(concurrency.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_additive_increase_up_to_maximum(clock):
+    control = AdaptiveConcurrency(initial=2, maximum=4)
+    host = 'example.com'
+    for _ in range(2):
+        control.record(host, Result())
+    assert control.limit(host) == 3
+    for _ in range(3):
+        control.record(host, Result())
+    assert control.limit(host) == 4
+    for _ in range(20):
+        control.record(host, Result())
+    assert control.limit(host) == 4
+
+
+def test_multiplicative_decrease_with_cooldown(clock):
+    control = AdaptiveConcurrency(initial=8, minimum=1, maximum=8, cooldown=2.0)
+    host = 'example.com'
+    control.record(host, Result(status_code=503))
+    assert control.limit(host) == 4
+    # 冷却时间内的同一批失败只下调一次
+    control.record(host, Result(status_code=429))
+    control.record(host, Result(error=requests.exceptions.Timeout()))
+    assert control.limit(host) == 4
+    clock[0] += 2.0
+    control.record(host, Result(error=requests.exceptions.ConnectionError()))
+    assert control.limit(host) == 2
+    for _ in range(5):
+        clock[0] += 2.0
+        control.record(host, Result(status_code=500))
+    assert control.limit(host) == 1
+    assert control.report()[host]['errors'] == 9
+
+
+def test_slow_or_failed_requests_do_not_increase(clock):
+    control = AdaptiveConcurrency(initial=2, maximum=8, slow_factor=2.0)
+    host = 'example.com'
+    control.record(host, Result(elapsed=0.1))
+    # 超过平均延迟 2 倍的请求清零计数
+    control.record(host, Result(elapsed=1.0))
+    assert control.limit(host) == 2
+    # 非拥塞的错误（如 404、解析前的其它异常）不影响上限
+    control.record(host, Result(status_code=404, error=requests.exceptions.HTTPError()))
+    assert control.limit(host) == 2
+    assert control.report()[host]['errors'] == 0
+
+
+def test_hosts_are_independent(clock):
+    control = AdaptiveConcurrency(initial=4)
+    control.record('a.com', Result(status_code=503))
+    assert control.limit('a.com') == 2
+    assert control.limit('b.com') == 4
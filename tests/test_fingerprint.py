@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""FingerprintSet 的测试：增量日志、合并与重新打开"""
+import hashlib
+import os
+
+from crawler_common.fingerprint import FingerprintSet, fingerprint, hex_fingerprint
+
+
+def test_fingerprint_matches_md5_records():
+    title = '台风登陆 多地停课'
+    assert fingerprint(title) == hex_fingerprint(hashlib.md5(title.encode('utf-8')).hexdigest())
+
+
+def test_add_and_contains_across_base_and_delta(tmp_path):
+    path = str(tmp_path / 'titles.bin')
+    fps = FingerprintSet(path, compact_threshold=1000)
+    assert fps.update([5, 1, 3, 3]) == 3
+    fps.compact()
+    assert len(fps._delta) == 0 and len(fps) == 3
+
+    assert fps.add(2) is True
+    # 已在有序数组或增量日志中的指纹都不重复记录
+    assert fps.add(3) is False
+    assert fps.add(2) is False
+    assert fps.update([1, 2, 4]) == 1
+    assert all(fp in fps for fp in (1, 2, 3, 4, 5))
+    assert 6 not in fps
+    assert len(fps) == 5
+    fps.close()
+
+    reopened = FingerprintSet(path, compact_threshold=1000)
+    assert len(reopened._base) == 3 and reopened._delta == {2, 4}
+    assert all(fp in reopened for fp in (1, 2, 3, 4, 5))
+    reopened.close()
+
+
+def test_merge_keeps_base_sorted(tmp_path):
+    path = str(tmp_path / 'titles.bin')
+    fps = FingerprintSet(path, compact_threshold=3)
+    fps.update([2 ** 63 + 1, 10])
+    fps.add(7)
+    # 达到阈值自动合并，日志清空
+    assert len(fps._delta) == 0
+    fps.update([1, 8, 2 ** 64 - 1])
+    assert list(fps._base) == [1, 7, 8, 10, 2 ** 63 + 1, 2 ** 64 - 1]
+    assert os.path.getsize(fps.log_path) == 0
+    fps.close()
+
+
+def test_truncated_log_is_repaired(tmp_path):
+    path = str(tmp_path / 'titles.bin')
+    fps = FingerprintSet(path)
+    fps.add(11)
+    fps.add(12)
+    fps.close()
+    # 模拟写到一半中断
+    with open(path + '.log', 'ab') as f:
+        f.write(b'\x01\x02\x03')
+    reopened = FingerprintSet(path)
+    assert reopened._delta == {11, 12}
+    assert os.path.getsize(reopened.log_path) == 16
+    reopened.add(13)
+    reopened.close()
+    assert FingerprintSet(path)._delta == {11, 12, 13}
+
+
+def test_import_lines(tmp_path):
+    legacy = tmp_path / 'titles.txt'
+    legacy.write_text('标题一\n\n标题二\n标题一\n', encoding='utf-8')
+    fps = FingerprintSet(str(tmp_path / 'titles.bin'))
+    assert fps.import_lines(str(tmp_path / 'missing.txt')) == 0
+    assert fps.import_lines(str(legacy)) == 2
+    assert fingerprint('标题二') in fps
+    assert len(fps._delta) == 0
+    fps.close()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""HttpCache 的测试：条件请求与 LRU 淘汰"""
+import os
+
+import pytest
+import requests
+
+from crawler_common import httpcache
+from crawler_common.httpcache import HttpCache
+
+
+def make_response(status_code, body=b'', headers=None, url='https://example.com/a'):
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = url
+    response.headers = requests.structures.CaseInsensitiveDict(headers or {})
+    response.encoding = 'utf-8'
+    response._content = body
+    return response
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+
+    def tick():
+        now[0] += 1
+        return now[0]
+
+    monkeypatch.setattr(httpcache.time, 'time', tick)
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = HttpCache(str(tmp_path / 'cache'))
+    yield cache
+    cache.close()
+
+
+def test_conditional_get_round_trip(cache):
+    url = 'https://example.com/a'
+    assert cache.conditional_headers(url) == {}
+    fresh = make_response(200, '<html>正文</html>'.encode('utf-8'),
+                          {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT', 'Set-Cookie': 'x=1'})
+    assert cache.update(url, fresh) is fresh
+    assert cache.conditional_headers(url) == {'If-None-Match': '"v1"',
+                                              'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+
+    cached = cache.update(url, make_response(304))
+    assert cached.status_code == 200
+    assert cached.from_cache
+    assert cached.text == '<html>正文</html>'
+    assert cached.headers['etag'] == '"v1"'
+    # 只保留解析需要的响应头
+    assert 'Set-Cookie' not in cached.headers
+    assert cache.hits == 1
+
+
+def test_responses_without_validators_are_not_stored(cache):
+    url = 'https://example.com/b'
+    cache.update(url, make_response(200, b'body'))
+    assert cache.conditional_headers(url) == {}
+    assert cache.stores == 0
+    # 没有缓存时 304 原样返回
+    not_modified = make_response(304)
+    assert cache.update(url, not_modified) is not_modified
+
+
+def test_replacing_entry_keeps_total_size(cache):
+    url = 'https://example.com/c'
+    cache.update(url, make_response(200, b'x' * 100, {'ETag': '"1"'}))
+    cache.update(url, make_response(200, b'x' * 40, {'ETag': '"2"'}))
+    assert cache.total_bytes == 40
+    assert cache.conditional_headers(url) == {'If-None-Match': '"2"'}
+
+
+def test_missing_body_drops_entry(cache):
+    url = 'https://example.com/d'
+    cache.update(url, make_response(200, b'body', {'ETag': '"1"'}))
+    os.remove(cache._body_path(url))
+    not_modified = make_response(304)
+    assert cache.update(url, not_modified) is not_modified
+    assert cache.conditional_headers(url) == {}
+    assert cache.total_bytes == 0
+
+
+def test_lru_eviction(tmp_path, clock):
+    cache = HttpCache(str(tmp_path / 'cache'), max_bytes=250)
+    urls = [f'https://example.com/{i}' for i in range(3)]
+    cache.update(urls[0], make_response(200, b'a' * 100, {'ETag': '"0"'}))
+    cache.update(urls[1], make_response(200, b'b' * 100, {'ETag': '"1"'}))
+    # 命中缓存会刷新访问时间，最久未访问的变成 urls[1]
+    cache.update(urls[0], make_response(304))
+    cache.update(urls[2], make_response(200, b'c' * 100, {'ETag': '"2"'}))
+
+    assert cache.total_bytes == 200
+    assert cache.conditional_headers(urls[1]) == {}
+    assert not os.path.exists(cache._body_path(urls[1]))
+    assert cache.update(urls[0], make_response(304)).content == b'a' * 100
+    assert cache.update(urls[2], make_response(304)).content == b'c' * 100
+    cache.close()
+
+    # 重新打开时总大小从索引中恢复
+    reopened = HttpCache(str(tmp_path / 'cache'), max_bytes=250)
+    assert reopened.total_bytes == 200
+    reopened.close()
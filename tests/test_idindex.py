@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""find_id_ceiling 的测试"""
+from crawler_common.idindex import find_id_ceiling
+
+
+def make_probe(existing):
+    """模拟站点：existing 中的编号存在；记录每个编号被探测的次数"""
+    calls = {}
+
+    def probe(ids):
+        for k in ids:
+            calls[k] = calls.get(k, 0) + 1
+        return {k: k in existing for k in ids}
+
+    return probe, calls
+
+
+def test_contiguous_ids():
+    probe, calls = make_probe(set(range(1, 538)))
+    assert find_id_ceiling(probe, 10000) == 537
+    # 每个编号只探测一次，且远少于逐个枚举
+    assert max(calls.values()) == 1
+    assert len(calls) < 200
+
+
+def test_gaps_shorter_than_tolerance():
+    existing = {k for k in range(1, 301) if k % 7} | {305, 312}
+    probe, _ = make_probe(existing)
+    assert find_id_ceiling(probe, 1000, tolerance=10) == 312
+
+
+def test_long_gap_ends_search():
+    # 300 之后长时间空缺，远处孤立的 400 不计入
+    probe, _ = make_probe(set(range(1, 301)) | {400})
+    assert find_id_ceiling(probe, 1000, tolerance=10) == 300
+
+
+def test_no_articles():
+    probe, _ = make_probe(set())
+    assert find_id_ceiling(probe, 1000) == 0
+
+
+def test_capped_by_max_id():
+    probe, calls = make_probe(set(range(1, 5000)))
+    assert find_id_ceiling(probe, 999) == 999
+    assert max(calls) <= 999
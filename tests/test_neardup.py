@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+crawler_common.neardup / dedupcorpus 的测试：阈值边界、LSH 分段召回、check/add 分离、已去重语料重复运行
+"""
+import json
+import os
+import random
+
+import pytest
+
+from crawler_common.dedupcorpus import dedup_corpus
+from crawler_common.neardup import NearDupIndex, lsh_params, shingles
+
+rng = random.Random(7)
+WORDS = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 9))) for _ in range(2000)]
+
+
+def make_doc(rng, n=300):
+    return [rng.choice(WORDS) for _ in range(n)]
+
+
+def edit_doc(rng, words, changes):
+    """随机替换 changes 个词，得到同一篇文章的小改版本"""
+    words = list(words)
+    for i in rng.sample(range(len(words)), changes):
+        words[i] = rng.choice(WORDS)
+    return words
+
+
+def jaccard(a, b):
+    a, b = shingles(a), shingles(b)
+    return len(a & b) / len(a | b)
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = NearDupIndex(str(tmp_path / 'neardup.sqlite3'))
+    yield idx
+    idx.close()
+
+
+def article(title, content, url=None):
+    art = {'title': title, 'content': content, 'sources': {}}
+    if url:
+        art['sources']['origin_url'] = url
+    return art
+
+
+def test_lsh_params_separates_threshold():
+    bands, rows = lsh_params(0.8, 64)
+    assert bands * rows <= 64
+
+    def probability(s):
+        return 1 - (1 - s ** rows) ** bands
+
+    assert probability(0.97) > 0.99
+    assert probability(0.5) < 0.01
+    assert probability(0.7) < 0.5 < probability(0.9)
+
+
+def test_threshold_boundary(index):
+    """估计相似度恰好等于阈值时算重复，低一档（1/num_perm）时不算"""
+    r = random.Random(1)
+    base = make_doc(r)
+    while True:
+        text_a, text_b = ' '.join(base), ' '.join(edit_doc(r, base, 5))
+        sig_a, sig_b = index.signature(text_a), index.signature(text_b)
+        score = index.similarity(sig_a, sig_b)
+        # 需要两篇落入同一个桶且签名不完全相同，才能检验相似度比较本身
+        if score < 1 and set(index._bucket_keys(sig_a)) & set(index._bucket_keys(sig_b)):
+            break
+    index.add('1', 'a', 'A', text_a)
+
+    index.threshold = score
+    match = index.check('1', 'b', 'B', text_b)
+    assert match['url'] == 'a'
+    assert match['similarity'] == score
+
+    index.threshold = score + 1 / index.num_perm
+    assert index.check('1', 'b', 'B', text_b) is None
+
+
+def test_banding_recall(index):
+    """小改版本（Jaccard 约 0.97）几乎都能查出，无关文章不会误报"""
+    r = random.Random(2)
+    originals = [make_doc(r) for _ in range(40)]
+    for i, words in enumerate(originals):
+        index.add('1', f'orig{i}', f'orig{i}', ' '.join(words))
+
+    found = 0
+    for i, words in enumerate(originals):
+        edited = ' '.join(edit_doc(r, words, 3))
+        assert jaccard(' '.join(words), edited) > 0.95
+        match = index.query(edited)
+        found += bool(match and match['url'] == f'orig{i}')
+    assert found >= 38
+
+    assert not any(index.query(' '.join(make_doc(r))) for _ in range(40))
+
+
+def test_check_does_not_persist_until_add(index, tmp_path):
+    text = ' '.join(make_doc(random.Random(3)))
+    # 同一批尚未保存的文章之间可以查出重复
+    kept = index.filter_articles('1', [article('A', text, 'a'), article('B', text, 'b')])
+    assert [art['title'] for art in kept] == ['A']
+    assert index.count() == 0
+
+    # 没有 add 的文章不留在索引里
+    reopened = NearDupIndex(str(tmp_path / 'neardup.sqlite3'))
+    assert reopened.check('1', 'b', 'B', text) is None
+    reopened.close()
+
+    index.add_articles('1', kept)
+    assert index.count() == 1
+    assert index.add('1', 'a', 'A', text) is False
+    assert index.check('1', 'a', 'A', text) is None
+    assert index.check('1', 'c', 'C', text)['url'] == 'a'
+
+
+def write_corpus(data_dir, files):
+    os.makedirs(data_dir, exist_ok=True)
+    for mtime, (name, articles) in enumerate(files, start=1):
+        path = os.path.join(data_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(articles, f, ensure_ascii=False)
+        os.utime(path, (mtime, mtime))
+
+
+def read_corpus(data_dir):
+    result = {}
+    for name in sorted(os.listdir(data_dir)):
+        with open(os.path.join(data_dir, name), encoding='utf-8') as f:
+            result[name] = json.load(f)
+    return result
+
+
+def test_rerun_on_deduplicated_corpus(tmp_path):
+    r = random.Random(4)
+    texts = [' '.join(make_doc(r)) for _ in range(4)]
+    data_dir = str(tmp_path / 'data')
+    write_corpus(data_dir, [
+        # 没有链接、完全相同的两篇键也相同，同样要查出
+        ('62_a_1.json', [article('A', texts[0], 'https://a/1'), article('B', texts[1]), article('B', texts[1])]),
+        ('146_b_1.json', [article('A2', texts[0], 'https://b/1'), article('B2', texts[1]),
+                          article('C', texts[2]), article('D', texts[3], 'https://b/2')]),
+        ('254_c_1.json', [article('A3', texts[0])]),
+    ])
+
+    index = NearDupIndex(str(tmp_path / 'first.sqlite3'))
+    report = dedup_corpus(index, data_dir, apply=True)
+    assert sorted(item['title'] for item in report) == ['A2', 'A3', 'B', 'B2']
+    deduplicated = read_corpus(data_dir)
+    assert [art['title'] for art in deduplicated['62_a_1.json']] == ['A', 'B']
+    assert '254_c_1.json' not in deduplicated
+    assert [art['title'] for art in deduplicated['146_b_1.json']] == ['C', 'D']
+
+    # 同一个索引再运行一次：文章在文件中的位置变了，也不会被当成自己的重复
+    assert dedup_corpus(index, data_dir, apply=True) == []
+    index.close()
+    # 新索引从头运行一次
+    fresh = NearDupIndex(str(tmp_path / 'second.sqlite3'))
+    assert dedup_corpus(fresh, data_dir, apply=True) == []
+    fresh.close()
+    assert read_corpus(data_dir) == deduplicated
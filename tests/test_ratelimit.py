@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""TokenBucket / HostRateLimiter 的测试（用假时钟，不真正等待）"""
+import pytest
+
+from crawler_common import ratelimit
+from crawler_common.ratelimit import HostRateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(ratelimit.time, 'monotonic', fake.monotonic)
+    monkeypatch.setattr(ratelimit.time, 'sleep', fake.sleep)
+    return fake
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_burst_then_steady_rate(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # 桶空后每个令牌要等 1/rate 秒，预占的令牌依次排队
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_refill_is_capped_at_burst(clock):
+    bucket = TokenBucket(rate=1, burst=2)
+    bucket.reserve()
+    bucket.reserve()
+    clock.now += 100
+    assert [bucket.reserve() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_acquire_sleeps_only_when_needed(clock):
+    bucket = TokenBucket(rate=4, burst=1)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.25)
+    assert clock.slept == [pytest.approx(0.25)]
+
+
+def test_host_limiter_keeps_one_bucket_per_host(clock):
+    limiter = HostRateLimiter(rate=1, burst=1, overrides={'API.example.com': (10, 5)})
+    assert limiter.bucket('www.example.com') is limiter.bucket('WWW.EXAMPLE.COM')
+    api = limiter.bucket('api.example.com')
+    assert (api.rate, api.burst) == (10.0, 5)
+
+    assert limiter.acquire('https://www.example.com/a') == 0.0
+    # 另一个主机不受影响
+    assert limiter.acquire('https://other.example.com/a') == 0.0
+    assert limiter.acquire('https://www.example.com/b') == pytest.approx(1.0)
+    assert limiter.acquire('www.example.com') == pytest.approx(1.0)
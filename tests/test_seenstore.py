@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""normalize_url 的测试"""
+from crawler_common.seenstore import normalize_url
+
+
+def test_scheme_host_and_default_port():
+    assert normalize_url(' HTTPS://WWW.Example.COM:443/News/1 ') == 'https://www.example.com/News/1'
+    assert normalize_url('http://example.com:80/a') == 'http://example.com/a'
+    assert normalize_url('http://example.com:8080/a') == 'http://example.com:8080/a'
+
+
+def test_trailing_slash_and_fragment():
+    assert normalize_url('https://example.com/a/b/#comments') == 'https://example.com/a/b'
+    assert normalize_url('https://example.com') == 'https://example.com/'
+    assert normalize_url('https://example.com/') == 'https://example.com/'
+
+
+def test_tracking_params_dropped_and_query_sorted():
+    url = 'https://example.com/a?utm_source=x&b=2&UTM_Medium=y&fbclid=z&a=1&ref=home&empty='
+    assert normalize_url(url) == 'https://example.com/a?a=1&b=2&empty='
+
+
+def test_variants_share_one_key():
+    variants = [
+        'https://www.example.com/2024/01/01/story.html',
+        'https://WWW.example.com:443/2024/01/01/story.html/',
+        'https://www.example.com/2024/01/01/story.html?utm_campaign=share#top',
+    ]
+    assert len({normalize_url(url) for url in variants}) == 1
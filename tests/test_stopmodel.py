@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""AdaptiveStop 及分位数、最大空缺的测试"""
+from crawler_common.stopmodel import AdaptiveStop, max_gap, quantile
+
+
+def test_quantile():
+    assert quantile([], 0.5) is None
+    assert quantile([3, 1, 2], 0.5) == 2
+    assert quantile([0, 10], 0.95) == 9.5
+    assert quantile([5], 0.95) == 5
+
+
+def test_max_gap():
+    assert max_gap([]) == 0
+    assert max_gap([1, 2, 3]) == 0
+    assert max_gap([4, 5, 9]) == 3
+    assert max_gap([1, 2, 10, 11]) == 7
+
+
+def test_falls_back_to_fixed_threshold_without_history():
+    stop = AdaptiveStop([(100, 3)] * 4, max_misses=150)
+    assert stop.ceiling is None
+    assert not stop.should_stop(10000, 149)
+    assert stop.should_stop(10, 150)
+    assert '不足以建模' in stop.report()
+
+
+def test_learns_ceiling_and_tail_misses():
+    history = [(100, 3), (110, 4), (120, 2), (105, 5), (115, 3)]
+    stop = AdaptiveStop(history, max_misses=150, margin=1.2, q=0.95)
+    # 最大编号的 95% 分位数 119 × 1.2，空缺的 95% 分位数 4.8 × 1.2 向上取整
+    assert stop.ceiling == 143
+    assert stop.tail_misses == 6
+    # 未超过预测上限时仍按固定阈值
+    assert not stop.should_stop(143, 100)
+    assert not stop.should_stop(144, 5)
+    assert stop.should_stop(144, 6)
+    assert stop.should_stop(50, 150)
+
+
+def test_tail_misses_bounds():
+    assert AdaptiveStop([(100, 0)] * 5, min_misses=5).tail_misses == 5
+    assert AdaptiveStop([(100, 500)] * 5, max_misses=150).tail_misses == 150
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""XhrTemplate / XhrTemplateStore 的测试"""
+import json
+from urllib.parse import parse_qsl, urlsplit
+
+from crawler_common.xhrreplay import XhrTemplate, XhrTemplateStore
+
+
+def captured(url, method='GET', body=None, headers=None):
+    return {'url': url, 'method': method, 'body': body,
+            'headers': headers or {'Accept': 'application/json', 'Cookie': 'sid=1', 'X-Requested-With': 'XMLHttpRequest'}}
+
+
+def query_of(url):
+    return dict(parse_qsl(urlsplit(url).query))
+
+
+def test_query_page_param():
+    template = XhrTemplate.from_capture([
+        captured('https://example.com/static/app.js'),
+        captured('https://example.com/api/list?category=news&page=2&size=20'),
+    ])
+    assert (template.location, template.param, template.value, template.step) == ('query', 'page', 2, 1)
+    # 只保留需要的请求头
+    assert template.headers == {'Accept': 'application/json', 'X-Requested-With': 'XMLHttpRequest'}
+
+    url, options = template.request(0)
+    assert query_of(url) == {'category': 'news', 'page': '2', 'size': '20'}
+    url, options = template.request(3)
+    assert query_of(url)['page'] == '5'
+    assert options == {'headers': template.headers}
+
+
+def test_offset_step_uses_page_size():
+    template = XhrTemplate.from_capture([captured('https://example.com/api?offset=40&limit=20')])
+    assert (template.param, template.value, template.step) == ('offset', 40, 20)
+    assert query_of(template.request(2)[0])['offset'] == '80'
+
+    # 没有每页条数时，步长取当前 offset
+    template = XhrTemplate.from_capture([captured('https://example.com/api?start=10')])
+    assert (template.param, template.step) == ('start', 10)
+    assert template.from_capture([captured('https://example.com/api?offset=0')]) is None
+
+
+def test_form_body():
+    template = XhrTemplate.from_capture([
+        captured('https://example.com/api/more', 'POST', 'action=load_more&paged=1&cat=7'),
+    ])
+    assert (template.location, template.param) == ('form', 'paged')
+    url, options = template.request(2)
+    assert url == 'https://example.com/api/more'
+    assert dict(parse_qsl(options['data'])) == {'action': 'load_more', 'paged': '3', 'cat': '7'}
+
+
+def test_json_body_keeps_value_type():
+    template = XhrTemplate.from_capture([
+        captured('https://example.com/graphql', 'POST', json.dumps({'pageNo': '1', 'channel': 'world'})),
+    ])
+    assert (template.location, template.param, template.value) == ('json', 'pageNo', 1)
+    assert json.loads(template.request(4)[1]['data']) == {'pageNo': '5', 'channel': 'world'}
+
+    template = XhrTemplate.from_capture([
+        captured('https://example.com/graphql', 'POST', json.dumps({'page': 3})),
+    ])
+    assert json.loads(template.request(1)[1]['data']) == {'page': 4}
+
+
+def test_no_paging_param():
+    assert XhrTemplate.from_capture([captured('https://example.com/api?id=5&flag=true')]) is None
+    assert XhrTemplate.from_capture([]) is None
+
+
+def test_store_round_trip(tmp_path):
+    store = XhrTemplateStore(str(tmp_path / 'templates.json'))
+    assert store.get('news') is None
+    template = XhrTemplate.from_capture([captured('https://example.com/api/list?page=1')])
+    store.put('news', template)
+    loaded = store.get('news')
+    assert loaded.to_dict() == template.to_dict()
+    assert loaded.request(1) == template.request(1)
+    store.drop('news')
+    assert store.get('news') is None